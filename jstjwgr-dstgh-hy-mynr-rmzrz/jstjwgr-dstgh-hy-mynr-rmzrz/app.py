@@ -10,7 +10,6 @@ from flask import Flask, render_template, request, jsonify, redirect, url_for, s
 from flask_sqlalchemy import SQLAlchemy
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime, timedelta
-import socket
 import threading
 import subprocess
 import psutil
@@ -26,6 +25,18 @@ import logging
 from concurrent.futures import ThreadPoolExecutor
 import uuid
 import secrets
+import asyncio
+from signature_pack import get_signature_store
+from process_watcher import get_process_watcher
+from cpu_sampler import get_cpu_sampler
+from cgminer_poller import API_PORTS, CGMinerPoller, TelemetrySeries
+from stratum_prober import StratumProber, apply_stratum_verdicts
+from neighbor_cache import get_neighbor_cache
+from oui_index import get_oui_index
+from reverse_dns import get_reverse_resolver
+from port_scanner import scan_ports
+from cascade import CascadeCheck, DetectorCascade
+from scan_prioritizer import ScanPrioritizer
 
 # تنظیمات لاگ
 logging.basicConfig(level=logging.INFO)
@@ -85,6 +96,16 @@ class ScanSession(db.Model):
     progress = db.Column(db.Integer, default=0)
     results = db.Column(db.Text)
 
+class ScanDetection(db.Model):
+    # هر ردیف یک نقطه از منحنی تشخیص در طول زمان برای یک جلسه اسکن
+    id = db.Column(db.Integer, primary_key=True)
+    scan_session_id = db.Column(db.Integer, db.ForeignKey('scan_session.id'), nullable=False, index=True)
+    ip_address = db.Column(db.String(45), nullable=False)
+    threat_level = db.Column(db.String(20))
+    elapsed_seconds = db.Column(db.Float, nullable=False)
+    hosts_scanned = db.Column(db.Integer, nullable=False)
+    detected_at = db.Column(db.DateTime, default=datetime.utcnow)
+
 class NetworkActivity(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     ip_address = db.Column(db.String(45), nullable=False)
@@ -96,6 +117,14 @@ class NetworkActivity(db.Model):
     data_size = db.Column(db.BigInteger)
     is_suspicious = db.Column(db.Boolean, default=False)
 
+class MinerMetric(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    miner_id = db.Column(db.Integer, db.ForeignKey('detected_miner.id'), nullable=False, index=True)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    hash_rate = db.Column(db.Float)
+    temperature = db.Column(db.Float)
+    power = db.Column(db.Float)
+
 class SystemMetrics(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
@@ -109,28 +138,35 @@ class SystemMetrics(db.Model):
 # کلاس اصلی شناسایی ماینر
 class MinerDetectionEngine:
     def __init__(self):
-        self.miner_ports = {
-            4028: "CGMiner API", 4029: "SGMiner API", 4030: "BFGMiner API",
-            3333: "Stratum Pool", 4444: "Stratum Pool Alt", 5555: "Stratum Pool",
-            7777: "Stratum Pool", 8080: "Web Interface", 8888: "Web Interface Alt",
-            9999: "Stratum SSL", 14444: "Stratum SSL Alt", 1080: "SOCKS Proxy",
-            3128: "HTTP Proxy", 8118: "Privoxy", 9050: "Tor SOCKS",
-            8332: "Bitcoin RPC", 8333: "Bitcoin P2P", 9332: "Litecoin RPC",
-            25: "SMTP", 587: "SMTP TLS", 465: "SMTP SSL"
-        }
+        # پورت‌ها، فرآیندها و کلیدواژه‌ها از بسته امضای مشترک خوانده می‌شوند
+        self.signatures = get_signature_store()
         
-        self.miner_processes = [
-            'cgminer', 'bfgminer', 'sgminer', 'cpuminer', 'xmrig', 'xmr-stak',
-            'claymore', 'phoenixminer', 't-rex', 'gminer', 'nbminer', 'teamredminer',
-            'lolminer', 'miniZ', 'bminer', 'z-enemy', 'ccminer', 'ethminer',
-            'nanominer', 'srbminer', 'wildrig'
-        ]
+        # جدول افزایشی فرآیندها؛ فقط PIDهای جدید یا تغییرکرده دوباره بررسی می‌شوند
+        self.process_watcher = get_process_watcher()
+        self._process_lock = threading.Lock()
+        self._process_cursor = None
+        self._process_pack = None
+        self._suspicious_processes = {}
+        self.cpu_sampler = get_cpu_sampler()
+        self.stratum_prober = StratumProber()
         
-        self.suspicious_domains = [
-            'stratum+tcp', 'mining.pool', 'pool.mining', 'btc.pool', 'eth.pool',
-            'xmr.pool', 'nicehash.com', 'f2pool.com', 'antpool.com',
-            'slushpool.com', 'poolin.com', 'viabtc.com'
-        ]
+        # اولویت‌بندی پیش‌فرض (بدون سابقه)؛ هر اسکن نمونه خود را به scan_network_range می‌دهد
+        self.prioritizer = ScanPrioritizer()
+        
+        # بررسی‌های امتیازدهی به ترتیب ارزش به هزینه؛ جدول اتصالات فقط برای میزبان‌های مشکوک
+        self.cascade = DetectorCascade([
+            CascadeCheck('asic_vendor', self._check_vendor, cost_hint=0.001, value_hint=4),
+            CascadeCheck('learned_ports', self._check_learned_ports, cost_hint=0.5, value_hint=10),
+            CascadeCheck('ports', self._check_ports, cost_hint=1.0, value_hint=8),
+            CascadeCheck('hostname', self._check_hostname, cost_hint=0.05, value_hint=2),
+            CascadeCheck('network_traffic', self._check_network_traffic, gate=20,
+                         cost_hint=0.2, value_hint=3),
+        ], critical=70)
+
+    @property
+    def miner_ports(self):
+        # همان پورت‌هایی که وب‌اپ پیش از بسته امضا پویش می‌کرد
+        return self.signatures.pack.profile_ports('web_app')
 
     def ping_host(self, ip):
         """بررسی دسترسی به IP"""
@@ -141,41 +177,13 @@ class MinerDetectionEngine:
         except:
             return False
 
-    def scan_port(self, ip, port, timeout=2):
-        """اسکن تک پورت"""
-        try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(timeout)
-            result = sock.connect_ex((ip, port))
-            sock.close()
-            return result == 0
-        except:
-            return False
-
     def get_mac_address(self, ip):
-        """دریافت آدرس MAC"""
-        try:
-            arp_result = subprocess.run(['arp', '-n', ip], 
-                                      capture_output=True, text=True)
-            if arp_result.returncode == 0:
-                lines = arp_result.stdout.split('\n')
-                for line in lines:
-                    if ip in line:
-                        parts = line.split()
-                        for part in parts:
-                            if ':' in part and len(part) == 17:
-                                return part
-        except:
-            pass
-        return None
+        """دریافت آدرس MAC از کش مشترک جدول همسایه"""
+        return get_neighbor_cache().lookup(ip)
 
     def get_hostname(self, ip):
-        """دریافت نام میزبان"""
-        try:
-            hostname = socket.gethostbyaddr(ip)[0]
-            return hostname
-        except:
-            return None
+        """دریافت نام میزبان با PTR ناهمگام و کش مثبت/منفی"""
+        return get_reverse_resolver().resolve_sync(ip)
 
     def geolocate_ip(self, ip):
         """مکان‌یابی IP"""
@@ -199,59 +207,78 @@ class MinerDetectionEngine:
 
     def detect_miner_processes(self):
         """تشخیص فرآیندهای ماینر"""
-        suspicious_processes = []
-        for proc in psutil.process_iter(['pid', 'name', 'cpu_percent', 'memory_info']):
-            try:
-                proc_info = proc.info
-                process_name = proc_info['name'].lower()
-                
-                if any(miner in process_name for miner in self.miner_processes):
-                    suspicious_processes.append({
-                        'pid': proc_info['pid'],
-                        'name': proc_info['name'],
-                        'cpu_percent': proc_info['cpu_percent'],
-                        'memory_mb': proc_info['memory_info'].rss / 1024 / 1024,
-                        'suspicion_level': 'high'
-                    })
-            except:
-                continue
+        signatures = self.signatures.pack
         
-        return suspicious_processes
+        with self._process_lock:
+            if signatures is not self._process_pack:
+                # بسته امضا عوض شده؛ کل جدول دوباره امتیازدهی می‌شود
+                self._process_pack = signatures
+                self._process_cursor = None
+            
+            self._process_cursor, updated, removed = self.process_watcher.changes_since(
+                self._process_cursor
+            )
+            if removed is None:
+                self._suspicious_processes.clear()
+            else:
+                for pid in removed:
+                    self._suspicious_processes.pop(pid, None)
+            
+            for record in updated:
+                if signatures.process_name_automaton.contains(record.name):
+                    self._suspicious_processes[record.pid] = {
+                        'pid': record.pid,
+                        'name': record.name,
+                        'cpu_percent': 0.0,
+                        'memory_mb': record.memory_mb,
+                        'suspicion_level': 'high'
+                    }
+                else:
+                    self._suspicious_processes.pop(record.pid, None)
+            
+            # مصرف CPU و حافظه از آخرین تیک نمونه‌بردار
+            self.cpu_sampler.sample_if_stale()
+            for pid, info in self._suspicious_processes.items():
+                info['cpu_percent'] = self.cpu_sampler.percent(pid)
+                if pid in self.cpu_sampler.rss_bytes:
+                    info['memory_mb'] = self.cpu_sampler.rss_bytes[pid] / 1024 / 1024
+            
+            return list(self._suspicious_processes.values())
 
     def advanced_port_scan(self, ip, ports=None):
-        """اسکن پیشرفته پورت"""
+        """اسکن پیشرفته پورت (همه پورت‌ها هم‌زمان در سقف بودجه مشترک سوکت)"""
         if ports is None:
-            ports = list(self.miner_ports.keys())
-        
-        open_ports = []
-        for port in ports:
-            if self.scan_port(ip, port):
-                open_ports.append(port)
-        
-        return open_ports
+            ports = self.miner_ports
+        return scan_ports(ip, ports, timeout=2)
 
     def analyze_network_traffic(self, ip):
         """تحلیل ترافیک شبکه"""
         try:
             connections = psutil.net_connections()
+            miner_ports = self.miner_ports
             suspicious_connections = []
             
             for conn in connections:
                 if conn.raddr and conn.raddr.ip == ip:
-                    if conn.raddr.port in self.miner_ports:
+                    if conn.raddr.port in miner_ports:
                         suspicious_connections.append({
                             'local_port': conn.laddr.port,
                             'remote_port': conn.raddr.port,
                             'status': conn.status,
-                            'service': self.miner_ports[conn.raddr.port]
+                            'service': miner_ports[conn.raddr.port]
                         })
             
             return suspicious_connections
         except:
             return []
 
-    def scan_network_range(self, network_range, progress_callback=None):
-        """اسکن رنج شبکه"""
+    def scan_network_range(self, network_range, progress_callback=None, detection_callback=None,
+                           prioritizer=None):
+        """اسکن رنج شبکه؛ زیرشبکه‌های با سابقه تشخیص بیشتر زودتر پویش می‌شوند
+
+        prioritizer مخصوص همین اسکن است تا اسکن‌های هم‌زمان مدل یکدیگر را عوض نکنند.
+        """
+        prioritizer = prioritizer or self.prioritizer
         results = []
         
         try:
@@ -259,13 +286,15 @@ class MinerDetectionEngine:
             total_hosts = network.num_addresses
             scanned_hosts = 0
             
-            for ip in network.hosts():
+            for ip in prioritizer.order_targets(network):
                 ip_str = str(ip)
                 
                 if self.ping_host(ip_str):
-                    device_info = self.analyze_device(ip_str)
+                    device_info = self.analyze_device(ip_str, prioritizer)
                     if device_info:
                         results.append(device_info)
+                        if detection_callback:
+                            detection_callback(device_info, scanned_hosts + 1)
                 
                 scanned_hosts += 1
                 if progress_callback:
@@ -277,45 +306,26 @@ class MinerDetectionEngine:
         
         return results
 
-    def analyze_device(self, ip):
-        """تحلیل جامع دستگاه"""
+    def analyze_device(self, ip, prioritizer=None):
+        """تحلیل جامع دستگاه با آبشار بررسی‌ها"""
+        learned, rest = (prioritizer or self.prioritizer).port_tiers(list(self.miner_ports))
         device_info = {
             'ip': ip,
             'timestamp': datetime.utcnow().isoformat(),
             'open_ports': [],
             'services': {},
             'mac_address': self.get_mac_address(ip),
-            'hostname': self.get_hostname(ip),
-            'geolocation': self.geolocate_ip(ip),
+            'hostname': None,
+            'geolocation': {},
             'suspicion_score': 0,
             'detection_methods': [],
-            'threat_level': 'low'
+            'threat_level': 'low',
+            # لایه‌های پورت همین اسکن؛ بررسی‌های آبشار فقط device_info را می‌گیرند
+            'port_tiers': {'learned': learned, 'rest': rest}
         }
         
-        # اسکن پورت‌ها
-        open_ports = self.advanced_port_scan(ip)
-        device_info['open_ports'] = open_ports
-        
-        for port in open_ports:
-            service = self.miner_ports.get(port, "Unknown Service")
-            device_info['services'][port] = service
-            device_info['suspicion_score'] += 20
-            device_info['detection_methods'].append(f'port_{port}')
-        
-        # تحلیل hostname
-        if device_info['hostname']:
-            hostname = device_info['hostname'].lower()
-            if any(keyword in hostname for keyword in 
-                  ['miner', 'mining', 'asic', 'antminer', 'whatsminer']):
-                device_info['suspicion_score'] += 30
-                device_info['detection_methods'].append('hostname')
-        
-        # تحلیل ترافیک شبکه
-        network_analysis = self.analyze_network_traffic(ip)
-        if network_analysis:
-            device_info['network_connections'] = network_analysis
-            device_info['suspicion_score'] += 25
-            device_info['detection_methods'].append('network_traffic')
+        # بررسی‌ها تا رسیدن به سطح بحرانی یا نبود بررسی واجد شرایط اجرا می‌شوند
+        device_info['cascade'] = self.cascade.run(device_info)
         
         # تعیین سطح تهدید
         if device_info['suspicion_score'] >= 70:
@@ -327,10 +337,119 @@ class MinerDetectionEngine:
         else:
             device_info['threat_level'] = 'low'
         
-        return device_info if device_info['suspicion_score'] > 15 else None
+        if device_info['suspicion_score'] <= 15:
+            return None
+        
+        # مکان‌یابی (درخواست HTTP) فقط برای دستگاه‌هایی که گزارش می‌شوند
+        device_info['geolocation'] = self.geolocate_ip(ip) or {}
+        return device_info
+
+    def _check_vendor(self, device_info):
+        """سازنده از پیشوند OUI؛ سازنده ASIC قوی‌ترین نشانه ارزان است"""
+        vendor = get_oui_index().lookup(device_info['mac_address'])
+        if vendor:
+            device_info['vendor'] = vendor
+            if self.signatures.pack.asic_vendor_keywords.contains(vendor):
+                device_info['suspicion_score'] += 40
+                device_info['detection_methods'].append('asic_vendor')
+
+    def _check_learned_ports(self, device_info):
+        """اسکن پورت‌هایی که در سابقه تشخیص بیشترین برخورد را داشته‌اند"""
+        self._scan_port_tier(device_info, device_info['port_tiers']['learned'])
+
+    def _check_ports(self, device_info):
+        """اسکن بقیه پورت‌ها؛ اگر لایه اول به سطح بحرانی برسد آبشار به اینجا نمی‌رسد"""
+        self._scan_port_tier(device_info, device_info['port_tiers']['rest'])
+
+    def _scan_port_tier(self, device_info, ports):
+        """اسکن یک لایه پورت؛ پورت‌های Stratum فقط با پاسخ واقعی به mining.subscribe امتیاز کامل می‌گیرند"""
+        if not ports:
+            return
+        ip = device_info['ip']
+        signatures = self.signatures.pack
+        open_ports = self.advanced_port_scan(ip, ports)
+        device_info['open_ports'] = sorted(device_info['open_ports'] + open_ports)
+        stratum_verdicts = self.stratum_prober.probe_ports(ip, open_ports, signatures)
+        
+        for port in open_ports:
+            service = signatures.port_services.get(port, "Unknown Service")
+            device_info['services'][port] = service
+            if port not in stratum_verdicts:
+                device_info['suspicion_score'] += 20
+                device_info['detection_methods'].append(f'port_{port}')
+        
+        apply_stratum_verdicts(device_info, stratum_verdicts)
+
+    def _check_hostname(self, device_info):
+        """تحلیل hostname"""
+        hostname = self.get_hostname(device_info['ip'])
+        device_info['hostname'] = hostname
+        if hostname and self.signatures.pack.hostname_keywords.contains(hostname):
+            device_info['suspicion_score'] += 30
+            device_info['detection_methods'].append('hostname')
+
+    def _check_network_traffic(self, device_info):
+        """تحلیل ترافیک شبکه (پیمایش کامل جدول اتصالات)"""
+        network_analysis = self.analyze_network_traffic(device_info['ip'])
+        if network_analysis:
+            device_info['network_connections'] = network_analysis
+            device_info['suspicion_score'] += 25
+            device_info['detection_methods'].append('network_traffic')
 
 # نمونه detection engine
 detection_engine = MinerDetectionEngine()
+detection_engine.signatures.start_watching()
+
+# سری زمانی آخرین پرسش‌های API ماینرها (در حافظه)
+telemetry_series = TelemetrySeries()
+
+def poll_miner_apis(miners):
+    """پرسش API ماینرها و تکمیل نرخ هش، توان و مدل دستگاه"""
+    endpoints = {}
+    for miner in miners:
+        try:
+            ports = json.loads(miner.open_ports or '[]')
+        except ValueError:
+            continue
+        for port in ports:
+            if port in API_PORTS:
+                endpoints[(miner.ip_address, port)] = miner
+    
+    if not endpoints:
+        return 0
+    
+    async def poll_all():
+        poller = CGMinerPoller(series=telemetry_series)
+        try:
+            return await poller.poll_many(list(endpoints))
+        finally:
+            poller.close()
+    
+    metrics = []
+    now = datetime.utcnow()
+    for telemetry in asyncio.run(poll_all()):
+        if telemetry.error:
+            continue
+        miner = endpoints[(telemetry.ip, telemetry.port)]
+        if telemetry.hash_rate is not None:
+            miner.hash_rate = telemetry.hash_rate_display
+        if telemetry.power is not None:
+            miner.power_consumption = telemetry.power
+        if telemetry.model:
+            miner.device_type = telemetry.model
+        miner.last_seen = now
+        metrics.append({
+            'miner_id': miner.id,
+            'timestamp': now,
+            'hash_rate': telemetry.hash_rate,
+            'temperature': telemetry.max_temperature,
+            'power': telemetry.power
+        })
+    
+    # درج دسته‌ای سری زمانی
+    db.session.bulk_insert_mappings(MinerMetric, metrics)
+    db.session.commit()
+    return len(metrics)
 
 # Routes
 @app.route('/')
@@ -439,6 +558,13 @@ def scan():
     
     return render_template('scan.html')
 
+def fit_prioritizer(user_id):
+    """اولویت‌بندی اسکن از سابقه تشخیص یک کاربر (داده کاربران دیگر استفاده نمی‌شود)"""
+    return ScanPrioritizer().fit(
+        DetectedMiner.query.filter_by(user_id=user_id).with_entities(
+            DetectedMiner.ip_address, DetectedMiner.open_ports).all()
+    )
+
 def run_scan(session_id):
     """اجرای اسکن در پس‌زمینه"""
     scan_session = ScanSession.query.filter_by(session_id=session_id).first()
@@ -452,12 +578,33 @@ def run_scan(session_id):
             scan_session.total_hosts = total
             db.session.commit()
         
+        # نرخ برخورد پورت‌ها و تراکم /24ها فقط از تشخیص‌های قبلی همین کاربر
+        prioritizer = fit_prioritizer(scan_session.user_id)
+        
+        # منحنی تشخیص: زمان و تعداد میزبان پویش‌شده تا هر تشخیص
+        started = time.monotonic()
+        detections = []
+        
+        def detection_callback(device_info, scanned):
+            detections.append({
+                'scan_session_id': scan_session.id,
+                'ip_address': device_info['ip'],
+                'threat_level': device_info['threat_level'],
+                'elapsed_seconds': round(time.monotonic() - started, 3),
+                'hosts_scanned': scanned,
+                'detected_at': datetime.utcnow()
+            })
+        
         results = detection_engine.scan_network_range(
             scan_session.target_range, 
-            progress_callback
+            progress_callback,
+            detection_callback,
+            prioritizer=prioritizer
         )
+        db.session.bulk_insert_mappings(ScanDetection, detections)
         
         # ذخیره نتایج
+        saved_miners = []
         for result in results:
             miner = DetectedMiner(
                 ip_address=result['ip'],
@@ -474,6 +621,14 @@ def run_scan(session_id):
                 user_id=scan_session.user_id
             )
             db.session.add(miner)
+            saved_miners.append(miner)
+        
+        # تکمیل نرخ هش و مدل از API ماینرهایی که پورت 4028/4029/4030 باز دارند
+        db.session.flush()
+        try:
+            poll_miner_apis(saved_miners)
+        except Exception as e:
+            logger.error(f"خطا در پرسش API ماینرها: {e}")
         
         scan_session.status = 'completed'
         scan_session.end_time = datetime.utcnow()
@@ -516,6 +671,44 @@ def scan_status(session_id):
         'detected_miners': scan_session.detected_miners
     })
 
+@app.route('/api/scan_curve/<session_id>')
+def scan_curve(session_id):
+    if 'user_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    scan_session = ScanSession.query.filter_by(session_id=session_id, user_id=session['user_id']).first()
+    if not scan_session:
+        return jsonify({'error': 'Session not found'}), 404
+    
+    # منحنی تجمعی تشخیص‌ها بر حسب زمان و تعداد میزبان پویش‌شده
+    points = ScanDetection.query.filter_by(scan_session_id=scan_session.id).order_by(
+        ScanDetection.elapsed_seconds
+    ).all()
+    
+    return jsonify({
+        'time_to_first_detection': points[0].elapsed_seconds if points else None,
+        'hosts_to_first_detection': points[0].hosts_scanned if points else None,
+        'total_hosts': scan_session.total_hosts,
+        'curve': [
+            {
+                'elapsed_seconds': point.elapsed_seconds,
+                'hosts_scanned': point.hosts_scanned,
+                'detections': i + 1,
+                'ip': point.ip_address,
+                'threat_level': point.threat_level
+            }
+            for i, point in enumerate(points)
+        ]
+    })
+
+@app.route('/api/prioritizer')
+def prioritizer_stats():
+    if 'user_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    # پورت‌ها و زیرشبکه‌های با بیشترین سابقه تشخیص در ماینرهای همین کاربر
+    return jsonify(fit_prioritizer(session['user_id']).stats())
+
 @app.route('/miners')
 def miners():
     if 'user_id' not in session:
@@ -618,14 +811,15 @@ def live_monitor():
     suspicious_processes = detection_engine.detect_miner_processes()
     
     # نظارت بر اتصالات شبکه
+    miner_ports = detection_engine.miner_ports
     network_connections = []
     for conn in psutil.net_connections():
-        if conn.raddr and conn.raddr.port in detection_engine.miner_ports:
+        if conn.raddr and conn.raddr.port in miner_ports:
             network_connections.append({
                 'local_addr': f"{conn.laddr.ip}:{conn.laddr.port}",
                 'remote_addr': f"{conn.raddr.ip}:{conn.raddr.port}",
                 'status': conn.status,
-                'service': detection_engine.miner_ports[conn.raddr.port]
+                'service': miner_ports[conn.raddr.port]
             })
     
     return jsonify({
@@ -634,6 +828,57 @@ def live_monitor():
         'timestamp': datetime.utcnow().isoformat()
     })
 
+@app.route('/api/miners/poll', methods=['POST'])
+def poll_miners():
+    if 'user_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    miners = DetectedMiner.query.filter_by(user_id=session['user_id'], is_active=True).all()
+    polled = poll_miner_apis(miners)
+    
+    return jsonify({
+        'polled_miners': polled,
+        'timestamp': datetime.utcnow().isoformat()
+    })
+
+@app.route('/api/signatures')
+def signatures_status():
+    if 'user_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    # نسخه، زمان بارگذاری و حافظه ساختارهای تطبیق بسته امضا
+    return jsonify(detection_engine.signatures.stats())
+
+@app.route('/api/vendors')
+def vendor_stats():
+    if 'user_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    # سازنده همه ماینرهای شناسایی‌شده با یک جستجوی دسته‌ای در نمایه OUI
+    macs = [row.mac_address for row in DetectedMiner.query.with_entities(
+        DetectedMiner.mac_address).filter_by(user_id=session['user_id']).all()]
+    oui_index = get_oui_index()
+    signatures = detection_engine.signatures.pack
+    vendors = {}
+    for vendor in oui_index.lookup_many(macs):
+        if vendor:
+            vendors[vendor] = vendors.get(vendor, 0) + 1
+    
+    return jsonify({
+        'vendors': vendors,
+        'asic_vendors': {v: c for v, c in vendors.items() if signatures.asic_vendor_keywords.contains(v)},
+        'unknown': len(macs) - sum(vendors.values()),
+        'index': oui_index.stats()
+    })
+
+@app.route('/api/cascade')
+def cascade_stats():
+    if 'user_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    # هزینه، نرخ برخورد و ترتیب فعلی بررسی‌های آبشار امتیازدهی
+    return jsonify(detection_engine.cascade.stats())
+
 # ایجاد جداول دیتابیس
 with app.app_context():
     db.create_all()
@@ -10,7 +10,6 @@ import sys
 import socket
 import threading
 import subprocess
-import re
 import json
 import time
 import sqlite3
@@ -33,6 +32,21 @@ import win32con
 import win32security
 import win32net
 import win32netcon
+import pythoncom
+
+# Shared modules (signature pack, ...) live next to app.py
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from signature_pack import get_signature_store
+from process_watcher import get_process_watcher
+from cpu_sampler import get_cpu_sampler
+from banner_grabber import get_banner_grabber
+from stratum_prober import StratumProber, apply_stratum_verdicts
+from scan_graph import ScanStep, run_graph
+from port_scanner import get_socket_budget, scan_ports
+from neighbor_cache import get_neighbor_cache
+from oui_index import get_oui_index
+from reverse_dns import get_reverse_resolver
+from os_fingerprint import HostProbe, classify, ping
 
 class AdvancedMinerDetector:
     def __init__(self):
@@ -63,43 +77,31 @@ class AdvancedMinerDetector:
             'Zarneh': (33.2833, 46.8167)
         }
         
-        # Comprehensive miner detection ports
-        self.miner_ports = {
-            # Mining APIs
-            4028: "CGMiner API", 4029: "SGMiner API", 4030: "BFGMiner API",
-            4031: "CPUMiner API", 4032: "XMRig API", 4033: "T-Rex API",
-            4034: "PhoenixMiner API", 4035: "Claymore API", 4036: "Gminer API",
-            
-            # Web Interfaces
-            8080: "Web Interface", 8888: "Web Interface Alt", 8081: "Miner Web UI",
-            3000: "Miner Dashboard", 3001: "Mining Pool UI", 8000: "HTTP Server",
-            
-            # Stratum Pools
-            3333: "Stratum Pool", 4444: "Stratum Pool Alt", 9999: "Stratum SSL",
-            14444: "Stratum SSL Alt", 5555: "Stratum Pool", 7777: "Stratum Pool",
-            
-            # Proxy and VPN
-            1080: "SOCKS Proxy", 3128: "HTTP Proxy", 8118: "Privoxy",
-            9050: "Tor SOCKS", 1194: "OpenVPN", 1723: "PPTP VPN",
-            
-            # Cryptocurrency specific
-            8332: "Bitcoin RPC", 8333: "Bitcoin P2P", 9332: "Litecoin RPC",
-            19332: "Bitcoin Testnet", 18332: "Bitcoin Regtest",
-            
-            # Mining Pool Connections
-            4001: "Mining Pool", 4002: "Mining Pool Alt", 6666: "Mining Pool",
-            25: "SMTP (suspicious)", 587: "SMTP TLS", 465: "SMTP SSL"
-        }
+        # Ports, process names and keywords come from the shared signature pack
+        self.signatures = get_signature_store()
         
-        # Known miner process signatures
-        self.miner_processes = {
-            'cgminer.exe', 'bfgminer.exe', 'sgminer.exe', 'cpuminer.exe',
-            'xmrig.exe', 'xmr-stak.exe', 'claymore.exe', 'phoenixminer.exe',
-            't-rex.exe', 'gminer.exe', 'nbminer.exe', 'teamredminer.exe',
-            'lolminer.exe', 'miniZ.exe', 'bminer.exe', 'z-enemy.exe',
-            'ccminer.exe', 'ethminer.exe', 'nanominer.exe', 'srbminer.exe',
-            'wildrig.exe', 'xmrig-nvidia.exe', 'xmrig-amd.exe'
-        }
+        # Incremental process table; only new or changed PIDs are rescored
+        self.process_watcher = get_process_watcher()
+        self._process_cursor = None
+        self._process_pack = None
+        self._process_scores = {}
+        self._saved_process_generations = set()
+        
+        # Per-PID CPU baselines kept across ticks (one /proc pass per tick)
+        self.cpu_sampler = get_cpu_sampler()
+        self.sustained_cpu_threshold = 80
+        self.sustained_cpu_seconds = 300
+        
+        # Async protocol-aware banner probes with a per-(ip, port) TTL cache
+        self.banner_grabber = get_banner_grabber()
+        
+        # Active Stratum handshake to confirm pool/proxy ports
+        self.stratum_prober = StratumProber()
+        
+        # Live hosts are deep-scanned in parallel; all their port scans share
+        # one budget of concurrently open sockets
+        self.host_scan_workers = 16
+        self.socket_budget = get_socket_budget()
         
         # Suspicious registry keys
         self.suspicious_registry_keys = [
@@ -109,19 +111,41 @@ class AdvancedMinerDetector:
             r"SYSTEM\CurrentControlSet\Services"
         ]
         
-        # Initialize WMI connection
+        # Initialize WMI connection (COM objects are per-thread; see thread_wmi)
         try:
             self.wmi_conn = wmi.WMI()
         except Exception as e:
             print(f"WMI initialization failed: {e}")
             self.wmi_conn = None
+        self._wmi_local = threading.local()
+        
+        # Baseline for non-blocking system CPU usage: the next cpu_percent(None)
+        # reports the average since this call instead of sleeping for a second
+        psutil.cpu_percent(interval=None)
+        
+        # Per-step timeouts (seconds) of the comprehensive_scan graph
+        self.step_timeouts = {
+            'system_info': 30,
+            'suspicious_processes': 120,
+            'suspicious_connections': 60,
+            'suspicious_registry': 120,
+            'gpu_usage': 30,
+            'power_analysis': 10,
+            'network_devices': 1800,
+        }
         
         # Initialize database
         self.init_database()
 
+    @property
+    def miner_ports(self):
+        return self.signatures.pack.port_services
+
     def init_database(self):
         """Initialize enhanced SQLite database"""
-        self.conn = sqlite3.connect('advanced_miners.db')
+        # Scan steps run in worker threads; writes are serialised by db_lock
+        self.conn = sqlite3.connect('advanced_miners.db', check_same_thread=False)
+        self.db_lock = threading.Lock()
         cursor = self.conn.cursor()
         
         # Main miners table
@@ -195,6 +219,21 @@ class AdvancedMinerDetector:
         
         self.conn.commit()
 
+    def thread_wmi(self):
+        """WMI connection usable from the calling thread"""
+        if threading.current_thread() is threading.main_thread():
+            return self.wmi_conn
+        conn = getattr(self._wmi_local, 'conn', None)
+        if conn is None:
+            try:
+                pythoncom.CoInitialize()
+                conn = wmi.WMI()
+            except Exception as e:
+                print(f"WMI initialization failed: {e}")
+                conn = False
+            self._wmi_local.conn = conn
+        return conn or None
+
     def get_system_info(self):
         """Get comprehensive system information"""
         system_info = {
@@ -220,9 +259,10 @@ class AdvancedMinerDetector:
             system_info['network_interfaces'].append(interface_info)
         
         # GPU information using WMI
-        if self.wmi_conn:
+        wmi_conn = self.thread_wmi()
+        if wmi_conn:
             try:
-                for gpu in self.wmi_conn.Win32_VideoController():
+                for gpu in wmi_conn.Win32_VideoController():
                     if gpu.Name:
                         system_info['gpu_info'].append({
                             'name': gpu.Name,
@@ -234,91 +274,130 @@ class AdvancedMinerDetector:
         
         return system_info
 
+    def score_process_record(self, record, signatures):
+        """Static checks for a process: name, keywords, memory and command line"""
+        process_name = record.name.lower()
+        suspicion_score = 0
+        detection_reasons = []
+        
+        # Check against known miner processes
+        if signatures.is_known_process(process_name):
+            suspicion_score += 50
+            detection_reasons.append('known_miner_process')
+        
+        # Check for suspicious keywords in process name
+        if signatures.process_keywords.contains(process_name):
+            suspicion_score += 30
+            detection_reasons.append('suspicious_name')
+        
+        # Check memory usage
+        if record.memory_mb > 500:  # More than 500MB
+            suspicion_score += 10
+            detection_reasons.append('high_memory_usage')
+        
+        # Check command line arguments
+        if signatures.cmdline_arguments.contains(record.cmdline):
+            suspicion_score += 35
+            detection_reasons.append('mining_arguments')
+        
+        return suspicion_score, detection_reasons
+
     def monitor_processes(self):
         """Advanced process monitoring"""
         suspicious_processes = []
+        signatures = self.signatures.pack
+        
+        if signatures is not self._process_pack:
+            # Signature pack changed: rescore the whole table
+            self._process_pack = signatures
+            self._process_cursor = None
+        
+        self._process_cursor, updated, removed = self.process_watcher.changes_since(
+            self._process_cursor
+        )
+        if removed is None:
+            self._process_scores.clear()
+        else:
+            for pid in removed:
+                self._process_scores.pop(pid, None)
         
-        for proc in psutil.process_iter(['pid', 'name', 'cpu_percent', 'memory_info', 
-                                       'cmdline', 'connections', 'ppid']):
-            try:
-                proc_info = proc.info
-                process_name = proc_info['name'].lower()
-                
-                # Check against known miner processes
-                suspicion_score = 0
-                detection_reasons = []
-                
-                if process_name in [p.lower() for p in self.miner_processes]:
-                    suspicion_score += 50
-                    detection_reasons.append('known_miner_process')
-                
-                # Check for suspicious keywords in process name
-                suspicious_keywords = ['miner', 'mining', 'crypto', 'bitcoin', 'ethereum', 
-                                     'monero', 'xmr', 'btc', 'eth', 'hash', 'pool']
-                if any(keyword in process_name for keyword in suspicious_keywords):
-                    suspicion_score += 30
-                    detection_reasons.append('suspicious_name')
-                
-                # Check CPU usage
-                cpu_percent = proc_info['cpu_percent'] or 0
-                if cpu_percent > 80:
-                    suspicion_score += 20
-                    detection_reasons.append('high_cpu_usage')
-                
-                # Check memory usage
-                memory_mb = proc_info['memory_info'].rss / 1024 / 1024 if proc_info['memory_info'] else 0
-                if memory_mb > 500:  # More than 500MB
-                    suspicion_score += 10
-                    detection_reasons.append('high_memory_usage')
-                
-                # Check network connections
-                connections = proc_info['connections'] or []
-                mining_ports = set(self.miner_ports.keys())
-                for conn in connections:
-                    if hasattr(conn, 'raddr') and conn.raddr:
-                        if conn.raddr.port in mining_ports:
-                            suspicion_score += 25
-                            detection_reasons.append('mining_port_connection')
-                
-                # Check command line arguments
-                cmdline = ' '.join(proc_info['cmdline'] or []).lower()
-                mining_args = ['--algo', '--pool', '--user', '--pass', '--worker', 
-                             'stratum+tcp', '--cuda', '--opencl', '--intensity']
-                if any(arg in cmdline for arg in mining_args):
-                    suspicion_score += 35
-                    detection_reasons.append('mining_arguments')
-                
-                # Debug log
-                print(f"Checking process: {proc_info['name']}, Suspicion Score: {suspicion_score}, Reasons: {detection_reasons}")
+        # Only new or changed processes go through the static checks
+        for record in updated:
+            suspicion_score, detection_reasons = self.score_process_record(record, signatures)
+            self._process_scores[record.pid] = (record, suspicion_score, detection_reasons)
+            
+            # Debug log
+            print(f"Checking process: {record.name}, Suspicion Score: {suspicion_score}, Reasons: {detection_reasons}")
+        
+        # CPU utilization for all processes from one sampling pass
+        self.cpu_sampler.sample_if_stale()
+        
+        # One walk of the connection table for all processes
+        connection_counts = defaultdict(int)
+        mining_connections = defaultdict(int)
+        try:
+            for conn in psutil.net_connections(kind='inet'):
+                if conn.pid:
+                    connection_counts[conn.pid] += 1
+                    if conn.raddr and signatures.is_miner_port(conn.raddr.port):
+                        mining_connections[conn.pid] += 1
+        except (psutil.AccessDenied, OSError) as e:
+            print(f"Connection table error: {e}")
+        
+        for pid, (record, base_score, base_reasons) in self._process_scores.items():
+            suspicion_score = base_score
+            detection_reasons = list(base_reasons)
+            
+            # Check CPU usage
+            cpu_percent = self.cpu_sampler.percent(pid)
+            if cpu_percent > self.sustained_cpu_threshold:
+                suspicion_score += 20
+                detection_reasons.append('high_cpu_usage')
+            if self.cpu_sampler.sustained(pid, self.sustained_cpu_threshold,
+                                          self.sustained_cpu_seconds):
+                suspicion_score += 15
+                detection_reasons.append('sustained_high_cpu')
+            
+            # Check network connections
+            for _ in range(mining_connections.get(pid, 0)):
+                suspicion_score += 25
+                detection_reasons.append('mining_port_connection')
+            
+            if suspicion_score > 10:  # Reduced threshold from 20 to 10
+                suspicious_processes.append({
+                    'pid': pid,
+                    'name': record.name,
+                    'cpu_percent': cpu_percent,
+                    'memory_mb': self.cpu_sampler.rss_bytes.get(pid, record.rss_bytes) / 1024 / 1024,
+                    'cmdline': record.cmdline.lower(),
+                    'connections': connection_counts.get(pid, 0),
+                    'suspicion_score': suspicion_score,
+                    'detection_reasons': detection_reasons,
+                    'parent_pid': record.ppid
+                })
                 
-                if suspicion_score > 10:  # Reduced threshold from 20 to 10
-                    suspicious_processes.append({
-                        'pid': proc_info['pid'],
-                        'name': proc_info['name'],
+                # Save to database once per process generation
+                if record.generation not in self._saved_process_generations:
+                    self._saved_process_generations.add(record.generation)
+                    self.save_process_to_db({
+                        'name': record.name,
+                        'pid': pid,
                         'cpu_percent': cpu_percent,
-                        'memory_mb': memory_mb,
-                        'cmdline': cmdline,
-                        'connections': len(connections),
-                        'suspicion_score': suspicion_score,
-                        'detection_reasons': detection_reasons,
-                        'parent_pid': proc_info['ppid']
-                    })
-                    
-                    # Save to database
-                    self.save_process_to_db(proc_info, suspicion_score)
-                    
-            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                continue
+                        'memory_info': {'rss': record.rss_bytes},
+                        'cmdline': record.cmdline.split(),
+                        'ppid': record.ppid
+                    }, suspicion_score)
         
         return suspicious_processes
 
     def monitor_network_connections(self):
         """Monitor network connections for mining activity"""
         suspicious_connections = []
+        signatures = self.signatures.pack
         
         for conn in psutil.net_connections(kind='inet'):
             try:
-                if conn.raddr and conn.raddr.port in self.miner_ports:
+                if conn.raddr and signatures.is_miner_port(conn.raddr.port):
                     # Get process info
                     try:
                         proc = psutil.Process(conn.pid) if conn.pid else None
@@ -332,7 +411,7 @@ class AdvancedMinerDetector:
                         'protocol': 'TCP' if conn.type == socket.SOCK_STREAM else 'UDP',
                         'status': conn.status,
                         'process_name': process_name,
-                        'service': self.miner_ports.get(conn.raddr.port, 'Unknown'),
+                        'service': signatures.port_services.get(conn.raddr.port, 'Unknown'),
                         'suspicion_score': 40
                     }
                     
@@ -352,6 +431,7 @@ class AdvancedMinerDetector:
     def scan_registry_for_miners(self):
         """Scan Windows registry for miner-related entries"""
         suspicious_entries = []
+        signatures = self.signatures.pack
         
         for key_path in self.suspicious_registry_keys:
             try:
@@ -371,21 +451,19 @@ class AdvancedMinerDetector:
                                 detection_reasons = []
                                 
                                 # Check value name
-                                if any(keyword in value_name.lower() for keyword in 
-                                      ['miner', 'mining', 'crypto', 'bitcoin', 'ethereum']):
+                                if signatures.registry_name_keywords.contains(value_name):
                                     suspicion_score += 30
                                     detection_reasons.append('suspicious_value_name')
                                 
                                 # Check value data
                                 if isinstance(value_data, str):
-                                    if any(keyword in value_data.lower() for keyword in 
-                                          ['miner', 'mining', 'crypto', 'pool', 'stratum']):
+                                    if signatures.registry_data_keywords.contains(value_data):
                                         suspicion_score += 25
                                         detection_reasons.append('suspicious_value_data')
                                     
                                     # Check for executable paths
-                                    if value_data.endswith('.exe') and any(proc in value_data.lower() 
-                                                                          for proc in self.miner_processes):
+                                    if (value_data.endswith('.exe') and
+                                            signatures.process_name_automaton.contains(value_data)):
                                         suspicion_score += 40
                                         detection_reasons.append('miner_executable')
                                 
@@ -418,34 +496,11 @@ class AdvancedMinerDetector:
         
         return suspicious_entries
 
-    def advanced_port_scan(self, ip, ports=None, timeout=1):
-        """Advanced port scanning with threading"""
+    def advanced_port_scan(self, ip, ports=None, timeout=1, on_connect=None):
+        """Non-blocking connect scan; open sockets are capped by the shared budget"""
         if ports is None:
-            ports = list(self.miner_ports.keys())
-        
-        open_ports = []
-        
-        def scan_single_port(port):
-            try:
-                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                sock.settimeout(timeout)
-                result = sock.connect_ex((ip, port))
-                sock.close()
-                if result == 0:
-                    return port
-            except:
-                pass
-            return None
-        
-        # Use ThreadPoolExecutor for concurrent scanning
-        with concurrent.futures.ThreadPoolExecutor(max_workers=50) as executor:
-            future_to_port = {executor.submit(scan_single_port, port): port for port in ports}
-            for future in concurrent.futures.as_completed(future_to_port):
-                result = future.result()
-                if result:
-                    open_ports.append(result)
-        
-        return open_ports
+            ports = list(self.signatures.pack.port_services)
+        return scan_ports(ip, ports, timeout=timeout, budget=self.socket_budget, on_connect=on_connect)
 
     def get_network_ranges(self):
         """Get all network ranges to scan"""
@@ -504,6 +559,7 @@ class AdvancedMinerDetector:
         """Comprehensive synchronous network scan"""
         devices = []
         ranges = self.get_network_ranges()
+        signatures = self.signatures.pack
         
         def update_progress(message):
             if progress_callback:
@@ -513,171 +569,141 @@ class AdvancedMinerDetector:
     
         update_progress("Starting network discovery...")
     
-        # Discover active IPs first
-        active_ips = []
+        # Discover active IPs first; each reply's TTL is kept for passive OS fingerprinting
+        probes = {}
         for range_base in ranges:
             update_progress(f"Scanning range {range_base}.x...")
         
-            def ping_ip(i):
-                ip = f"{range_base}.{i}"
-                if self.ping_host(ip):
-                    return ip
-                return None
-        
             # Concurrent ping scanning
             with concurrent.futures.ThreadPoolExecutor(max_workers=100) as executor:
-                futures = [executor.submit(ping_ip, i) for i in range(1, 255)]
+                futures = [executor.submit(ping, f"{range_base}.{i}") for i in range(1, 255)]
                 for future in concurrent.futures.as_completed(futures):
-                    result = future.result()
-                    if result:
-                        active_ips.append(result)
+                    probe = future.result()
+                    if probe.alive:
+                        probes[probe.ip] = probe
+        active_ips = list(probes)
     
         update_progress(f"Found {len(active_ips)} active IPs. Performing detailed scan...")
+
+        # Resolve all PTR records in one concurrent batch; per-host lookups then hit the cache
+        get_reverse_resolver().resolve_many_sync(active_ips)
     
-        # Detailed scan of active IPs
-        for ip in active_ips:
-            update_progress(f"Scanning {ip}...")
-        
-            device_info = {
-                'ip': ip,
-                'timestamp': datetime.now().isoformat(),
-                'open_ports': [],
-                'services': {},
-                'mac_address': self.get_mac_address_advanced(ip),
-                'hostname': self.get_hostname(ip),
-                'os_fingerprint': self.get_os_fingerprint(ip),
-                'suspicion_score': 0,
-                'detection_methods': [],
-                'geolocation': None
-            }
-        
-            # Port scan
-            open_ports = self.advanced_port_scan(ip)
-            device_info['open_ports'] = open_ports
-        
-            for port in open_ports:
-                service = self.miner_ports.get(port, "Unknown Service")
-                device_info['services'][port] = service
-                device_info['suspicion_score'] += 25
-                device_info['detection_methods'].append(f'port_{port}')
-        
-            # Banner grabbing
-            device_info['banners'] = self.grab_banners(ip, open_ports[:5])  # Limit to first 5 ports
-        
-            # Check for mining-specific banners
-            for port, banner in device_info['banners'].items():
-                if any(keyword in banner.lower() for keyword in 
-                      ['miner', 'mining', 'stratum', 'cgminer', 'bfgminer']):
-                    device_info['suspicion_score'] += 30
-                    device_info['detection_methods'].append('mining_banner')
-        
-            # Hostname analysis
-            if device_info['hostname']:
-                hostname = device_info['hostname'].lower()
-                if any(keyword in hostname for keyword in 
-                      ['miner', 'mining', 'asic', 'antminer', 'whatsminer']):
-                    device_info['suspicion_score'] += 35
-                    device_info['detection_methods'].append('suspicious_hostname')
-        
-            # Geolocation (only for suspicious devices)
-            if device_info['suspicion_score'] > 10:  # Reduced threshold from 20 to 10
-                device_info['geolocation'] = self.geolocate_ip_sync(ip)
-        
-            if device_info['suspicion_score'] > 5:  # Reduced threshold from 10 to 5
-                devices.append(device_info)
-                print(f"Suspicious device detected: {ip}, Score: {device_info['suspicion_score']}, Methods: {device_info['detection_methods']}")
+        # Detailed scan of active IPs as a bounded pool of host tasks
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.host_scan_workers) as executor:
+            futures = [executor.submit(self.deep_scan_host, ip, signatures, update_progress, probes[ip])
+                       for ip in active_ips]
+            for ip, future in zip(active_ips, futures):
+                try:
+                    device_info = future.result()
+                except Exception as e:
+                    print(f"Deep scan error for {ip}: {e}")
+                    continue
+                if device_info is not None:
+                    devices.append(device_info)
     
         return devices
 
-    def get_mac_address_advanced(self, ip):
-        """Advanced MAC address retrieval using multiple methods"""
-        # Method 1: ARP table
-        try:
-            result = subprocess.run(['arp', '-a'], capture_output=True, text=True)
-            if result.returncode == 0:
-                for line in result.stdout.split('\n'):
-                    if ip in line:
-                        parts = line.split()
-                        for part in parts:
-                            if re.match(r'^([0-9A-Fa-f]{2}[:-]){5}([0-9A-Fa-f]{2})$', part):
-                                return part.replace('-', ':')
-        except:
-            pass
-        
-        # Method 2: PowerShell
-        try:
-            ps_cmd = f'Get-NetNeighbor -IPAddress {ip} | Select-Object LinkLayerAddress'
-            result = subprocess.run(['powershell', '-Command', ps_cmd], 
-                                  capture_output=True, text=True)
-            if result.returncode == 0 and result.stdout:
-                lines = result.stdout.strip().split('\n')
-                for line in lines:
-                    if re.match(r'^([0-9A-Fa-f]{2}[:-]){5}([0-9A-Fa-f]{2})$', line.strip()):
-                        return line.strip()
-        except:
-            pass
-        
+    def deep_scan_host(self, ip, signatures, update_progress, probe=None):
+        """Detailed scan of one live host; the device record or None if not suspicious"""
+        update_progress(f"Scanning {ip}...")
+        probe = probe or HostProbe(ip)
+    
+        device_info = {
+            'ip': ip,
+            'timestamp': datetime.now().isoformat(),
+            'open_ports': [],
+            'services': {},
+            'mac_address': self.get_mac_address_advanced(ip),
+            'hostname': self.get_hostname(ip),
+            'os_fingerprint': 'Unknown',
+            'suspicion_score': 0,
+            'detection_methods': [],
+            'geolocation': None
+        }
+
+        # Port scan; the first completed handshake records the SYN-ACK window and options
+        open_ports = self.advanced_port_scan(ip, on_connect=probe.record_handshake)
+        device_info['open_ports'] = open_ports
+
+        # Passive OS fingerprint from discovery data, no extra packets
+        os_details = self.get_os_fingerprint(probe)
+        device_info['os_fingerprint'] = os_details['os']
+        device_info['os_details'] = os_details
+        device_info['discovery'] = probe.to_dict()
+
+        # Stratum ports only score fully on a real mining.subscribe reply
+        stratum_verdicts = self.stratum_prober.probe_ports(ip, open_ports, signatures)
+
+        for port in open_ports:
+            service = signatures.port_services.get(port, "Unknown Service")
+            device_info['services'][port] = service
+            if port not in stratum_verdicts:
+                device_info['suspicion_score'] += 25
+                device_info['detection_methods'].append(f'port_{port}')
+
+        apply_stratum_verdicts(device_info, stratum_verdicts)
+
+        # Vendor from the MAC's OUI prefix; an ASIC maker is a cheap, strong signal
+        vendor = get_oui_index().lookup(device_info['mac_address'])
+        if vendor:
+            device_info['vendor'] = vendor
+            if signatures.asic_vendor_keywords.contains(vendor):
+                device_info['suspicion_score'] += 40
+                device_info['detection_methods'].append('asic_vendor')
+
+        # Banner grabbing
+        device_info['banners'] = self.grab_banners(ip, open_ports)
+
+        # Check for mining-specific banners
+        for port, banner in device_info['banners'].items():
+            if signatures.banner_keywords.contains(banner):
+                device_info['suspicion_score'] += 30
+                device_info['detection_methods'].append('mining_banner')
+
+        # Hostname analysis
+        if device_info['hostname']:
+            if signatures.hostname_keywords.contains(device_info['hostname']):
+                device_info['suspicion_score'] += 35
+                device_info['detection_methods'].append('suspicious_hostname')
+
+        # Geolocation (only for suspicious devices)
+        if device_info['suspicion_score'] > 10:  # Reduced threshold from 20 to 10
+            device_info['geolocation'] = self.geolocate_ip_sync(ip)
+
+        if device_info['suspicion_score'] > 5:  # Reduced threshold from 10 to 5
+            print(f"Suspicious device detected: {ip}, Score: {device_info['suspicion_score']}, Methods: {device_info['detection_methods']}")
+            return device_info
         return None
 
+    def get_mac_address_advanced(self, ip):
+        """MAC address from the shared neighbor-table cache (one arp -a per refresh, not per host)"""
+        return get_neighbor_cache().lookup(ip)
+
     def get_hostname(self, ip):
-        """Get hostname for IP address"""
-        try:
-            hostname = socket.gethostbyaddr(ip)[0]
-            return hostname
-        except:
-            return None
+        """Hostname from an asynchronous PTR query with a positive/negative TTL cache"""
+        return get_reverse_resolver().resolve_sync(ip)
 
-    def get_os_fingerprint(self, ip):
-        """Basic OS fingerprinting"""
-        try:
-            # Try to determine OS based on TTL and other characteristics
-            result = subprocess.run(['ping', '-n', '1', ip], 
-                                  capture_output=True, text=True)
-            if result.returncode == 0:
-                output = result.stdout
-                if 'TTL=64' in output:
-                    return 'Linux/Unix'
-                elif 'TTL=128' in output:
-                    return 'Windows'
-                elif 'TTL=255' in output:
-                    return 'Network Device'
-        except:
-            pass
-        
-        return 'Unknown'
+    def get_os_fingerprint(self, probe):
+        """Passive OS fingerprint from the discovery reply TTL and SYN-ACK characteristics"""
+        return classify(probe)
 
     def grab_banners(self, ip, ports):
-        """Grab service banners from open ports"""
-        banners = {}
-        
-        for port in ports:
-            try:
-                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                sock.settimeout(3)
-                sock.connect((ip, port))
-                
-                # Send HTTP request for web services
-                if port in [80, 8080, 8888, 3000, 3001, 8000]:
-                    sock.send(b'GET / HTTP/1.1\r\nHost: ' + ip.encode() + b'\r\n\r\n')
-                
-                banner = sock.recv(1024).decode('utf-8', errors='ignore')
-                if banner.strip():
-                    banners[port] = banner.strip()
-                
-                sock.close()
-            except:
-                continue
-        
-        return banners
+        """Grab service banners from open ports (all ports probed concurrently)"""
+        try:
+            return self.banner_grabber.grab_sync(ip, ports)
+        except Exception as e:
+            print(f"Banner grab error for {ip}: {e}")
+            return {}
 
     def monitor_gpu_usage(self):
         """Monitor GPU usage for mining detection"""
         gpu_info = []
         
-        if self.wmi_conn:
+        wmi_conn = self.thread_wmi()
+        if wmi_conn:
             try:
                 # Get GPU utilization using WMI
-                for gpu in self.wmi_conn.Win32_PerfRawData_GPUPerformanceCounters_GPUEngine():
+                for gpu in wmi_conn.Win32_PerfRawData_GPUPerformanceCounters_GPUEngine():
                     if gpu.UtilizationPercentage:
                         gpu_info.append({
                             'name': gpu.Name,
@@ -711,7 +737,7 @@ class AdvancedMinerDetector:
     def analyze_power_consumption(self):
         """Analyze system power consumption patterns"""
         power_info = {
-            'cpu_usage': psutil.cpu_percent(interval=1),
+            'cpu_usage': psutil.cpu_percent(interval=None),
             'memory_usage': psutil.virtual_memory().percent,
             'disk_usage': psutil.disk_usage('/').percent if os.name != 'nt' else psutil.disk_usage('C:').percent,
             'network_io': psutil.net_io_counters()._asdict(),
@@ -737,8 +763,47 @@ class AdvancedMinerDetector:
         
         return power_info
 
+    def scan_steps(self, update_progress):
+        """Collectors of comprehensive_scan as a dependency graph"""
+        timeouts = self.step_timeouts
+        return [
+            ScanStep('system_info', self.get_system_info, timeout=timeouts['system_info'],
+                     default={}, label="Analyzing system information..."),
+            ScanStep('suspicious_processes', self.monitor_processes,
+                     timeout=timeouts['suspicious_processes'], default=[],
+                     label="Monitoring processes..."),
+            ScanStep('suspicious_connections', self.monitor_network_connections,
+                     timeout=timeouts['suspicious_connections'], default=[],
+                     label="Monitoring network connections..."),
+            ScanStep('suspicious_registry', self.scan_registry_for_miners,
+                     timeout=timeouts['suspicious_registry'], default=[],
+                     label="Scanning registry..."),
+            ScanStep('gpu_usage', self.monitor_gpu_usage, timeout=timeouts['gpu_usage'],
+                     default=[], label="Monitoring GPU usage..."),
+            ScanStep('power_analysis', self.analyze_power_consumption,
+                     timeout=timeouts['power_analysis'], default={},
+                     label="Analyzing power consumption..."),
+            ScanStep('network_devices', lambda: self.comprehensive_network_scan(update_progress),
+                     timeout=timeouts['network_devices'], default=[],
+                     label="Scanning network..."),
+            ScanStep('geolocated_miners', self.find_geolocated_miners, deps=('network_devices',),
+                     default=[], label="Identifying geolocated miners..."),
+        ]
+
+    def find_geolocated_miners(self, network_devices):
+        """Suspicious devices geolocated inside Ilam"""
+        return [
+            device for device in network_devices
+            if device.get('suspicion_score', 0) > 30 and device.get('geolocation')
+            and device['geolocation'].get('in_ilam')
+        ]
+
     def comprehensive_scan(self, progress_callback=None):
-        """Main comprehensive scanning function"""
+        """Main comprehensive scanning function
+        
+        Independent collectors run concurrently; each step has a timeout and
+        falls back to an empty result so one stuck collector cannot stall the scan.
+        """
         def update_progress(message):
             if progress_callback:
                 progress_callback(message)
@@ -746,63 +811,31 @@ class AdvancedMinerDetector:
                 print(message)
     
         update_progress("Starting comprehensive miner detection scan...")
+        values, timings = run_graph(self.scan_steps(update_progress), progress=update_progress)
     
         results = {
             'timestamp': datetime.now().isoformat(),
             'scan_area': 'Ilam Province',
-            'system_info': self.get_system_info(),
-            'network_devices': [],
-            'suspicious_processes': [],
-            'suspicious_connections': [],
-            'suspicious_registry': [],
-            'gpu_usage': [],
-            'power_analysis': {},
-            'geolocated_miners': [],
+            'system_info': values['system_info'],
+            'network_devices': values['network_devices'],
+            'suspicious_processes': values['suspicious_processes'],
+            'suspicious_connections': values['suspicious_connections'],
+            'suspicious_registry': values['suspicious_registry'],
+            'gpu_usage': values['gpu_usage'],
+            'power_analysis': values['power_analysis'],
+            'geolocated_miners': values['geolocated_miners'],
             'statistics': {}
         }
     
-        # System analysis
-        update_progress("Analyzing system information...")
-        results['system_info'] = self.get_system_info()
-    
-        # Process monitoring
-        update_progress("Monitoring processes...")
-        results['suspicious_processes'] = self.monitor_processes()
-    
-        # Network connection monitoring
-        update_progress("Monitoring network connections...")
-        results['suspicious_connections'] = self.monitor_network_connections()
-    
-        # Registry scanning
-        update_progress("Scanning registry...")
-        results['suspicious_registry'] = self.scan_registry_for_miners()
-    
-        # GPU monitoring
-        update_progress("Monitoring GPU usage...")
-        results['gpu_usage'] = self.monitor_gpu_usage()
-    
-        # Power analysis
-        update_progress("Analyzing power consumption...")
-        results['power_analysis'] = self.analyze_power_consumption()
-    
-        # Network scanning
-        update_progress("Scanning network...")
-        results['network_devices'] = self.comprehensive_network_scan(update_progress)
-    
-        # Identify geolocated miners
-        for device in results['network_devices']:
-            if device.get('suspicion_score', 0) > 30 and device.get('geolocation'):
-                if device['geolocation'].get('in_ilam'):
-                    results['geolocated_miners'].append(device)
-    
         # Calculate statistics
         results['statistics'] = self.calculate_comprehensive_statistics(results)
+        results['statistics']['timings'] = timings
     
         # Save to database
         update_progress("Saving results to database...")
         self.save_comprehensive_results(results)
     
-        update_progress("Scan completed successfully!")
+        update_progress(f"Scan completed successfully in {timings['_total']['wall_seconds']:.1f}s!")
         return results
 
     def calculate_comprehensive_statistics(self, results):
@@ -817,7 +850,9 @@ class AdvancedMinerDetector:
             'suspicious_registry_entries': len(results['suspicious_registry']),
             'high_gpu_usage': len([g for g in results['gpu_usage'] if g.get('suspicious')]),
             'threat_level': 'Low',
-            'overall_risk_score': 0
+            'overall_risk_score': 0,
+            'banner_probes': self.banner_grabber.stats(),
+            'stratum_probes': self.stratum_prober.summary()
         }
         
         # Calculate overall risk score
@@ -1187,104 +1222,103 @@ class AdvancedMinerDetector:
     # Database helper methods
     def save_process_to_db(self, proc_info, suspicion_score):
         """Save process information to database"""
-        try:
-            cursor = self.conn.cursor()
-            cursor.execute('''
-                INSERT INTO process_monitoring 
-                (process_name, pid, cpu_percent, memory_mb, command_line, 
-                 parent_process, suspicious_score)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                proc_info.get('name', ''),
-                proc_info.get('pid', 0),
-                proc_info.get('cpu_percent', 0),
-                proc_info.get('memory_info', {}).get('rss', 0) / 1024 / 1024 if proc_info.get('memory_info') else 0,
-                ' '.join(proc_info.get('cmdline', [])),
-                proc_info.get('ppid', 0),
-                suspicion_score
-            ))
-            self.conn.commit()
-        except Exception as e:
-            print(f"Database save error: {e}")
+        with self.db_lock:
+            try:
+                cursor = self.conn.cursor()
+                cursor.execute('''
+                    INSERT INTO process_monitoring 
+                    (process_name, pid, cpu_percent, memory_mb, command_line, 
+                     parent_process, suspicious_score)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', (
+                    proc_info.get('name', ''),
+                    proc_info.get('pid', 0),
+                    proc_info.get('cpu_percent', 0),
+                    proc_info.get('memory_info', {}).get('rss', 0) / 1024 / 1024 if proc_info.get('memory_info') else 0,
+                    ' '.join(proc_info.get('cmdline', [])),
+                    proc_info.get('ppid', 0),
+                    suspicion_score
+                ))
+                self.conn.commit()
+            except Exception as e:
+                print(f"Database save error: {e}")
 
     def save_connection_to_db(self, conn_info):
         """Save network connection to database"""
-        try:
-            cursor = self.conn.cursor()
-            cursor.execute('''
-                INSERT INTO network_monitoring 
-                (local_address, remote_address, protocol, status, process_name)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (
-                conn_info.get('local_address', ''),
-                conn_info.get('remote_address', ''),
-                conn_info.get('protocol', ''),
-                conn_info.get('status', ''),
-                conn_info.get('process_name', '')
-            ))
-            self.conn.commit()
-        except Exception as e:
-            print(f"Database save error: {e}")
+        with self.db_lock:
+            try:
+                cursor = self.conn.cursor()
+                cursor.execute('''
+                    INSERT INTO network_monitoring 
+                    (local_address, remote_address, protocol, status, process_name)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (
+                    conn_info.get('local_address', ''),
+                    conn_info.get('remote_address', ''),
+                    conn_info.get('protocol', ''),
+                    conn_info.get('status', ''),
+                    conn_info.get('process_name', '')
+                ))
+                self.conn.commit()
+            except Exception as e:
+                print(f"Database save error: {e}")
 
     def save_registry_to_db(self, entry):
         """Save registry entry to database"""
-        try:
-            cursor = self.conn.cursor()
-            cursor.execute('''
-                INSERT INTO registry_monitoring 
-                (registry_key, value_name, value_data, suspicious_score)
-                VALUES (?, ?, ?, ?)
-            ''', (
-                f"{entry['hive']}\\{entry['key_path']}",
-                entry['value_name'],
-                entry['value_data'],
-                entry['suspicion_score']
-            ))
-            self.conn.commit()
-        except Exception as e:
-            print(f"Database save error: {e}")
+        with self.db_lock:
+            try:
+                cursor = self.conn.cursor()
+                cursor.execute('''
+                    INSERT INTO registry_monitoring 
+                    (registry_key, value_name, value_data, suspicious_score)
+                    VALUES (?, ?, ?, ?)
+                ''', (
+                    f"{entry['hive']}\\{entry['key_path']}",
+                    entry['value_name'],
+                    entry['value_data'],
+                    entry['suspicion_score']
+                ))
+                self.conn.commit()
+            except Exception as e:
+                print(f"Database save error: {e}")
 
     def save_comprehensive_results(self, results):
         """Save comprehensive results to database"""
-        try:
-            cursor = self.conn.cursor()
+        with self.db_lock:
+            try:
+                cursor = self.conn.cursor()
             
-            # Save detected miners
-            for device in results.get('geolocated_miners', []):
-                if device.get('geolocation'):
-                    geo = device['geolocation']
-                    cursor.execute('''
-                        INSERT INTO detected_miners 
-                        (ip_address, mac_address, hostname, latitude, longitude, city, 
-                         detection_method, device_type, confidence_score, threat_level, notes)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (
-                        device['ip'],
-                        device.get('mac_address', ''),
-                        device.get('hostname', ''),
-                        geo.get('lat', 0),
-                        geo.get('lon', 0),
-                        geo.get('city', ''),
-                        ','.join(device.get('detection_methods', [])),
-                        'cryptocurrency_miner',
-                        device.get('suspicion_score', 0),
-                        results['statistics']['threat_level'],
-                        json.dumps(device, ensure_ascii=False)
-                    ))
+                # Save detected miners
+                for device in results.get('geolocated_miners', []):
+                    if device.get('geolocation'):
+                        geo = device['geolocation']
+                        cursor.execute('''
+                            INSERT INTO detected_miners 
+                            (ip_address, mac_address, hostname, latitude, longitude, city, 
+                             detection_method, device_type, confidence_score, threat_level, notes)
+                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        ''', (
+                            device['ip'],
+                            device.get('mac_address', ''),
+                            device.get('hostname', ''),
+                            geo.get('lat', 0),
+                            geo.get('lon', 0),
+                            geo.get('city', ''),
+                            ','.join(device.get('detection_methods', [])),
+                            'cryptocurrency_miner',
+                            device.get('suspicion_score', 0),
+                            results['statistics']['threat_level'],
+                            json.dumps(device, ensure_ascii=False)
+                        ))
             
-            self.conn.commit()
-        except Exception as e:
-            print(f"Database save error: {e}")
+                self.conn.commit()
+            except Exception as e:
+                print(f"Database save error: {e}")
 
     # Utility methods
     def ping_host(self, ip):
-        """Ping host - Windows 10/11 optimized"""
-        try:
-            result = subprocess.run(['ping', '-n', '1', '-w', '1000', ip], 
-                                  capture_output=True, text=True)
-            return result.returncode == 0
-        except:
-            return False
+        """Ping host with the platform's ping flags"""
+        return ping(ip).alive
 
     def is_in_ilam_bounds(self, lat, lon):
         """Check if coordinates are within Ilam boundaries"""
@@ -5,6 +5,7 @@
 ویژه استان ایلام - جمهوری اسلامی ایران
 """
 
+import sys
 import socket
 import threading
 import subprocess
@@ -28,6 +29,15 @@ from geopy.distance import geodesic
 from scipy.optimize import minimize
 import wifi
 import netifaces
+from pathlib import Path
+
+# ماژول‌های مشترک (بسته امضا و ...) کنار app.py قرار دارند
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from signature_pack import get_signature_store
+from stratum_prober import StratumProber, apply_stratum_verdicts
+from neighbor_cache import get_neighbor_cache
+from oui_index import get_oui_index
+from reverse_dns import get_reverse_resolver
 
 class IlamMinerGeoDetector:
     def __init__(self):
@@ -55,14 +65,11 @@ class IlamMinerGeoDetector:
             'شیروان چرداول': (33.9, 46.95)
         }
         
-        # پورت‌های تشخیص ماینر
-        self.miner_ports = {
-            4028: "CGMiner API", 4029: "SGMiner API", 4030: "BFGMiner API",
-            8080: "Web Interface", 8888: "Web Interface Alt", 9999: "Stratum Pool",
-            3333: "Stratum Pool", 4444: "Stratum Pool Alt", 14444: "Stratum SSL",
-            1080: "SOCKS Proxy", 3128: "HTTP Proxy", 8118: "Privoxy",
-            9050: "Tor SOCKS", 1194: "OpenVPN", 1723: "PPTP VPN"
-        }
+        # پورت‌ها و کلیدواژه‌ها از بسته امضای مشترک خوانده می‌شوند
+        self.signatures = get_signature_store()
+        
+        # پروب فعال Stratum برای تأیید pool/proxy
+        self.stratum_prober = StratumProber()
         
         # محدوده‌های فرکانسی برای تشخیص RF
         self.rf_signatures = {
@@ -74,6 +81,11 @@ class IlamMinerGeoDetector:
         # دیتابیس SQLite برای ذخیره داده‌ها
         self.init_database()
 
+    @property
+    def miner_ports(self):
+        # فقط ۱۵ پورتی که این detector پیش از بسته امضا پویش می‌کرد (پویش سریالی است)
+        return self.signatures.pack.profile_ports('ilam')
+
     def init_database(self):
         """راه‌اندازی دیتابیس محلی"""
         self.conn = sqlite3.connect('ilam_miners.db')
@@ -131,23 +143,8 @@ class IlamMinerGeoDetector:
             return False
 
     def get_mac_address(self, ip):
-        """دریافت آدرس MAC"""
-        try:
-            # استفاده از ARP table
-            arp_result = subprocess.run(['arp', '-n', ip], 
-                                      capture_output=True, text=True)
-            if arp_result.returncode == 0:
-                lines = arp_result.stdout.split('\n')
-                for line in lines:
-                    if ip in line:
-                        parts = line.split()
-                        for part in parts:
-                            if ':' in part and len(part) == 17:
-                                return part
-        except:
-            pass
-        
-        return None
+        """دریافت آدرس MAC از کش مشترک جدول همسایه"""
+        return get_neighbor_cache().lookup(ip)
 
     def geolocate_ip(self, ip_address):
         """مکان‌یابی IP با استفاده از سرویس‌های مختلف"""
@@ -486,14 +483,29 @@ class IlamMinerGeoDetector:
             'suspicion_score': 0,
             'detection_methods': []
         }
+        signatures = self.signatures.pack
         
         # اسکن پورت‌های مشکوک
-        for port, service in self.miner_ports.items():
+        for port, service in signatures.profile_ports('ilam').items():
             if self.scan_port(ip, port, timeout=2):
                 device_info['open_ports'].append(port)
                 device_info['services'][port] = service
+        
+        # پورت‌های Stratum فقط با پاسخ واقعی به mining.subscribe امتیاز کامل می‌گیرند
+        stratum_verdicts = self.stratum_prober.probe_ports(ip, device_info['open_ports'], signatures)
+        for port in device_info['open_ports']:
+            if port not in stratum_verdicts:
                 device_info['suspicion_score'] += 25
                 device_info['detection_methods'].append(f'port_{port}')
+        apply_stratum_verdicts(device_info, stratum_verdicts)
+        
+        # سازنده از پیشوند OUI
+        vendor = get_oui_index().lookup(device_info['mac_address'])
+        if vendor:
+            device_info['vendor'] = vendor
+            if signatures.asic_vendor_keywords.contains(vendor):
+                device_info['suspicion_score'] += 40
+                device_info['detection_methods'].append('asic_vendor')
         
         # تحلیل مصرف برق
         power_data = self.power_consumption_analysis(ip)
@@ -502,16 +514,12 @@ class IlamMinerGeoDetector:
             device_info['suspicion_score'] += 15
             device_info['detection_methods'].append('power_analysis')
         
-        # بررسی نام host
-        try:
-            hostname = socket.gethostbyaddr(ip)[0].lower()
-            suspicious_names = ['miner', 'asic', 'antminer', 'whatsminer', 'mining']
-            if any(name in hostname for name in suspicious_names):
-                device_info['hostname'] = hostname
-                device_info['suspicion_score'] += 30
-                device_info['detection_methods'].append('hostname')
-        except:
-            pass
+        # بررسی نام host (PTR ناهمگام با timeout کوتاه و کش)
+        hostname = get_reverse_resolver().resolve_sync(ip)
+        if hostname and signatures.hostname_keywords.contains(hostname):
+            device_info['hostname'] = hostname
+            device_info['suspicion_score'] += 30
+            device_info['detection_methods'].append('hostname')
         
         return device_info if device_info['suspicion_score'] > 10 else None
 
@@ -15,7 +15,7 @@ INCLUDED SUB‑MODULES
 ─────────────────────────────────────────────────────────────────────────────
   • LAN Stratum / ASIC port scan via Nmap or Scapy
   • TLS JA3 / Stratum banner fingerprinting via PyShark
-  • NetFlow/PCAP offline ML classifier (placeholder model)
+  • NetFlow/PCAP offline flow-feature classifier (NumPy, trainable)
   • BLE beacon and Wi‑Fi probe/SSID matcher (Bleak + Scapy)
   • RF front‑end (RTL‑SDR) hash‑rate‑noise fingerprint (prototype)
   • Acoustic fan‑signature classifier (pyaudio + TF/Lite)
@@ -34,9 +34,15 @@ import asyncio
 import logging
 import os
 import platform
+import ipaddress
+import json
 import re
+import shutil
 import sys
 import tempfile
+import threading
+import time
+import xml.etree.ElementTree as ET
 from datetime import datetime
 from pathlib import Path
 
@@ -46,16 +52,6 @@ try:
 except ImportError:
     scapy = None
 
-try:
-    import nmap  # python‑nmap
-except ImportError:
-    nmap = None
-
-try:
-    import pyshark
-except ImportError:
-    pyshark = None
-
 try:
     from bleak import BleakScanner
 except ImportError:
@@ -74,6 +70,17 @@ try:
 except ImportError:
     RtlSdr = None
 
+# Shared modules (signature pack, capture analyzer, ...) live next to app.py
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from signature_pack import get_signature_store
+import stream_capture
+import pcap_reader
+import capture_pool
+import flow_classifier
+import clock_skew
+import snmp_poller
+from ja3 import Ja3Matcher
+
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
@@ -95,62 +102,266 @@ def resolve_interface():
 # ─────────────────────────────────────────────────────────────────────────────
 # LAN Scanner – ports & banner grab
 # ─────────────────────────────────────────────────────────────────────────────
-async def lan_scan(targets: str | list[str], fast: bool = True):
-    """Scan IP/CIDR ranges for known miner ports."""
-    ports = "4028,3333,4444,5555,4233,8233"  # common ASIC/GPU miner ports
-    results = []
-    if nmap:
-        nm = nmap.PortScannerAsync()
-        log.info("Starting Nmap async scan on %s", targets)
-        await asyncio.to_thread(
-            nm.scan,
-            hosts=targets,
-            ports=ports,
-            arguments="-sT -Pn --open --host-timeout 30m" + (" -T5" if fast else ""),
-        )
-        for host in nm.all_hosts():
-            for proto in nm[host].all_protocols():
-                for port in nm[host][proto].keys():
-                    service = nm[host][proto][port].get("name", "?")
-                    results.append(
-                        {"ip": host, "proto": proto, "port": port, "service": service}
-                    )
-        log.info("LAN scan found %d open miner‑style ports", len(results))
-    else:
-        log.warning("python‑nmap not installed; skipping LAN scan.")
-    return results
+MINER_SCAN_PORTS = "4028,3333,4444,5555,4233,8233"  # common ASIC/GPU miner ports
+
+
+def split_targets(targets, chunk_size=256):
+    """Split IP/CIDR targets into nmap argument chunks of about chunk_size hosts.
+
+    Large IPv4 networks are cut into equal subnets, yielded lazily; IPv6
+    networks, hostnames and nmap range syntax (e.g. 10.0.0.1-50) are passed
+    through as their own chunk.
+    """
+    if isinstance(targets, str):
+        targets = targets.replace(",", " ").split()
+    chunk, size = [], 0
+    for target in targets:
+        try:
+            network = ipaddress.ip_network(target, strict=False)
+        except ValueError:
+            yield [target]
+            continue
+        if network.version != 4:
+            # An IPv6 /64 would split into 2^56 chunks; let nmap take it whole
+            yield [str(network)]
+            continue
+        if network.num_addresses > chunk_size:
+            prefix = network.max_prefixlen - (chunk_size.bit_length() - 1)
+            for subnet in network.subnets(new_prefix=max(prefix, network.prefixlen)):
+                yield [str(subnet)]
+            continue
+        chunk.append(str(network))
+        size += network.num_addresses
+        if size >= chunk_size:
+            yield chunk
+            chunk, size = [], 0
+    if chunk:
+        yield chunk
+
+
+def parse_nmap_host(host):
+    """Open-port findings from one <host> element of nmap XML output."""
+    ip = next((a.get("addr") for a in host.iter("address")
+               if a.get("addrtype") in ("ipv4", "ipv6")), None)
+    findings = []
+    for port in host.iter("port"):
+        state = port.find("state")
+        if ip is None or state is None or state.get("state") != "open":
+            continue
+        service = port.find("service")
+        findings.append({
+            "ip": ip, "proto": port.get("protocol"), "port": int(port.get("portid")),
+            "service": service.get("name", "?") if service is not None else "?",
+        })
+    return findings
+
+
+async def _nmap_chunk(nmap_path, chunk, arguments, out):
+    """Run one nmap process and push per-host findings to out as its XML streams in."""
+    process = await asyncio.create_subprocess_exec(
+        nmap_path, *arguments, "-oX", "-", *chunk,
+        stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL,
+    )
+    parser = ET.XMLPullParser(events=("start", "end"))
+    root = None
+    try:
+        while True:
+            data = await process.stdout.read(65536)
+            if not data:
+                break
+            parser.feed(data)
+            for event, element in parser.read_events():
+                if event == "start":
+                    if root is None:
+                        root = element
+                    continue
+                if element.tag == "host":
+                    for finding in parse_nmap_host(element):
+                        await out.put(finding)
+                    # Drop the finished host so memory stays flat on large chunks
+                    root.remove(element)
+        await process.wait()
+    except ET.ParseError as e:
+        log.warning("Unreadable nmap output for %s: %s", " ".join(chunk), e)
+    finally:
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+
+
+async def lan_scan(targets: str | list[str], fast: bool = True, chunk_size: int = 256,
+                   parallel: int = 8):
+    """Scan IP/CIDR ranges for known miner ports, yielding open ports as hosts finish.
+
+    Targets are split into chunks scanned by parallel nmap processes whose XML
+    output is parsed incrementally, so downstream stages start immediately.
+    """
+    nmap_path = shutil.which("nmap")
+    if nmap_path is None:
+        log.warning("nmap not installed; skipping LAN scan.")
+        return
+    arguments = ["-sT", "-Pn", "--open", "-p", MINER_SCAN_PORTS, "--host-timeout", "5m"]
+    if fast:
+        arguments.append("-T5")
+    # Chunks are pulled lazily by the workers, so a /8 never sits in memory as a list
+    chunks = split_targets(targets, chunk_size)
+    dispatched = 0
+    log.info("Starting Nmap scan on %s (%d parallel)", targets, parallel)
+
+    out = asyncio.Queue(maxsize=1024)
+
+    async def worker():
+        nonlocal dispatched
+        for chunk in chunks:
+            dispatched += 1
+            await _nmap_chunk(nmap_path, chunk, arguments, out)
+
+    async def run_all():
+        # No sentinel on cancellation: nobody is reading and the queue may be full
+        try:
+            await asyncio.gather(*(worker() for _ in range(parallel)))
+        except Exception:
+            await out.put(None)
+            raise
+        await out.put(None)
+
+    runner = asyncio.create_task(run_all())
+    found = 0
+    try:
+        while True:
+            finding = await out.get()
+            if finding is None:
+                break
+            found += 1
+            yield finding
+        await runner
+    finally:
+        # Consumer stopped early: cancelling the runner kills the nmap processes
+        runner.cancel()
+        await asyncio.gather(runner, return_exceptions=True)
+    log.info("LAN scan found %d open miner‑style ports in %d chunks", found, dispatched)
 
 
 # ─────────────────────────────────────────────────────────────────────────────
 # TLS / Stratum fingerprint (JA3, banner)
 # ─────────────────────────────────────────────────────────────────────────────
-async def live_capture(interface: str, duration: int = 60):
-    """Capture packets live and evaluate TLS fingerprints and Stratum banners."""
-    if not pyshark:
-        log.warning("pyshark not available; cannot perform live capture.")
-        return []
+async def live_capture(interface: str, duration: int = 60, on_alert=None):
+    """Capture packets live and flag Stratum sessions / TLS handshakes as they happen.
+
+    Frames come from an AF_PACKET socket with a kernel BPF filter on the
+    signature pack's Stratum ports (scapy/libpcap with the same filter when
+    AF_PACKET is unavailable). Only the first bytes of each flow are
+    reassembled, so memory stays bounded regardless of traffic volume.
+    """
+    signatures = get_signature_store().pack
+    ports = sorted(
+        signatures.ports_by_category.get("stratum", frozenset())
+        | signatures.ports_by_category.get("stratum_tls", frozenset())
+    )
 
-    log.info("Starting live capture on %s for %ds", interface, duration)
-    cap = pyshark.LiveCapture(
-        interface=interface,
-        bpf_filter="tcp port 3333 or tcp port 5555 or tcp port 4444",
+    def report(alert):
+        log_alert(alert)
+        if on_alert:
+            on_alert(alert)
+
+    matcher = Ja3Matcher()
+    log.info("Starting live capture on %s for %ds (%d ports)", interface, duration, len(ports))
+    try:
+        alerts, stats = await asyncio.to_thread(
+            stream_capture.capture, interface, ports, duration, report, tls_handler=matcher
+        )
+    except (RuntimeError, PermissionError) as e:
+        log.warning("Live capture unavailable: %s", e)
+        return []
+    log.info(
+        "Live capture produced %d suspect flows (%d packets, %d kernel drops, capacity %d pps)",
+        len(alerts), stats["packets"], stats.get("kernel_drops", 0), stats["capacity_pps"],
     )
-    cap.sniff(timeout=duration)
-    alerts = []
-    for pkt in cap:
-        try:
-            if hasattr(pkt, "tls"):
-                ja3 = pkt.tls.handshake_extensions_type
-                # TODO: compare ja3 with known miner hashes
-                alerts.append({"type": "TLS", "src": pkt.ip.src, "ja3": str(ja3)})
-            elif b"mining.subscribe" in bytes(pkt.tcp.payload):
-                alerts.append({"type": "Stratum", "src": pkt.ip.src, "info": "subscribe"})
-        except Exception:
-            continue
-    log.info("Live capture produced %d suspect flows", len(alerts))
+    log_ja3_stats(matcher.stats(top=5))
     return alerts
 
 
+def log_alert(alert):
+    """One log line per streaming alert, naming the JA3 match when there is one."""
+    detail = alert.get("info") or alert.get("handshake")
+    digest = alert.get("ja3") or alert.get("ja3s")
+    if digest:
+        detail = f"{detail} {digest} {alert.get('ja3_match') or 'unknown'}"
+    log.warning("%s flow %s:%d -> %s:%d (%s)", alert["type"], alert["src"], alert["sport"],
+                alert["dst"], alert["dport"], detail)
+
+
+def log_ja3_stats(stats):
+    log.info("TLS handshakes: %d fingerprinted, %d matched, %d distinct unknown",
+             stats["handshakes"], sum(stats["matched"].values()), stats["unknown_distinct"])
+    for kind, digest, count in stats["unknown"]:
+        log.info("  unknown %s %s seen %d times", kind, digest, count)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Offline PCAP / PCAPNG flow analysis
+# ─────────────────────────────────────────────────────────────────────────────
+def offline_analyse(pcap_file, workers=None, flow_model=None):
+    """Analyse a capture file, sharded by flow hash across a process pool.
+
+    Every worker memory-maps the file and analyses only the flows it owns,
+    so the merged findings match a single-process run.
+    """
+    log.info("Analysing capture %s", pcap_file)
+    try:
+        result = capture_pool.analyse_capture(pcap_file, workers=workers)
+    except (OSError, pcap_reader.PcapError) as e:
+        log.warning("Cannot read capture: %s", e)
+        return []
+    if result["truncated"]:
+        log.warning("%s is truncated; analysed the complete records only", pcap_file)
+    stats = result["stats"]
+    for alert in result["alerts"]:
+        log_alert(alert)
+    log_ja3_stats(dict(stats["ja3"], unknown=stats["ja3"]["unknown"][:5]))
+    log.info("Offline analysis produced %d suspect flows (%d packets, %d workers, %.1f MB/s)",
+             stats["alerts"], stats["packets"], stats["workers"], stats["throughput_mb_s"])
+    flow_findings = classify_flows(result["flows"], flow_model)
+    log.info("Flow classifier flagged %d of %d flows", len(flow_findings), stats["flow_records"])
+    return result["alerts"] + flow_findings
+
+
+def classify_flows(flows, model_path=None, min_packets=10):
+    """Score flows with the trained flow-feature model.
+
+    Without numpy or a trained model (see flow_classifier.py train) this falls
+    back to flagging long-lived flows towards known miner ports.
+    """
+    signatures = get_signature_store().pack
+    miner_ports, web_ports = flow_classifier.port_sets(signatures)
+    classifier = flow_classifier.load_classifier(model_path)
+    if classifier is not None:
+        suspects, scores = classifier.classify(flows, miner_ports, web_ports)
+        selected = zip(suspects.tolist(), scores.tolist())
+    else:
+        log.info("No flow model available; using the miner-port heuristic")
+        miner_ports = set(miner_ports)
+        selected = (
+            (i, None) for i, (dport, fwd, rev) in enumerate(
+                zip(flows["dport"], flows["packets_fwd"], flows["packets_rev"]))
+            if dport in miner_ports and fwd + rev >= min_packets
+        )
+
+    findings = []
+    for i, score in selected:
+        finding = {
+            "type": "MinerFlow",
+            "src": stream_capture.int_to_ip(flows["src"][i]), "sport": flows["sport"][i],
+            "dst": stream_capture.int_to_ip(flows["dst"][i]), "dport": flows["dport"][i],
+            "packets": flows["packets_fwd"][i] + flows["packets_rev"][i],
+            "duration": round(flows["last_seen"][i] - flows["first_seen"][i], 3),
+        }
+        if score is not None:
+            finding["score"] = round(score, 3)
+        findings.append(finding)
+    return findings
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # BLE Scanner
 # ─────────────────────────────────────────────────────────────────────────────
@@ -160,9 +371,12 @@ async def ble_scan(timeout=30):
         return []
     log.info("Scanning BLE for %d seconds", timeout)
     devices = await BleakScanner.discover(timeout=timeout)
-    miners = [d for d in devices if "antminer" in (d.name or "").lower()]
+    miners = [
+        {"type": "BleMiner", "address": d.address, "name": d.name}
+        for d in devices if "antminer" in (d.name or "").lower()
+    ]
     for m in miners:
-        log.info("Found BLE miner candidate: %s (%s)", m.address, m.name)
+        log.info("Found BLE miner candidate: %s (%s)", m["address"], m["name"])
     return miners
 
 
@@ -222,47 +436,168 @@ async def rf_scan(center_freq=2.4e9, samp_rate=2e6, duration=30):
 # ─────────────────────────────────────────────────────────────────────────────
 # SNMP Miner OID crawl
 # ─────────────────────────────────────────────────────────────────────────────
-from pysnmp.hlapi import *
-
 async def snmp_crawl(hosts, community="public"):
-    alerts = []
-    for host in hosts:
-        try:
-            iterator = getCmd(
-                SnmpEngine(),
-                CommunityData(community, mpModel=1),
-                UdpTransportTarget((host, 161), timeout=1, retries=1),
-                ContextData(),
-                ObjectType(ObjectIdentity("1.3.6.1.4.1.30297.101.1.0")),  # Bitmain sample OID
-            )
-
-            errorIndication, errorStatus, errorIndex, varBinds = next(iterator)
-            if errorIndication:
-                continue
-            if errorStatus:
-                continue
-
-            for varBind in varBinds:
-                alerts.append({"host": host, "hashrate": str(varBind[1])})
-        except Exception as e:
-            continue
+    """Query hosts for miner telemetry with SNMP v2c GETBULK.
 
-    log.info("SNMP crawl done; %d miners found", len(alerts))
+    One shared engine polls all hosts concurrently; the OID set (hash rate,
+    sensor table for temperatures, fans and power) comes from the signature
+    pack. Unresponsive hosts back off and answers are cached between calls.
+    """
+    crawler = snmp_poller.get_snmp_crawler(community)
+    alerts = []
+    for telemetry in await crawler.crawl(hosts):
+        if crawler.is_miner(telemetry):
+            alerts.append(dict(telemetry.to_dict(), type="SnmpMiner",
+                               host=telemetry.ip, hashrate=telemetry.hash_rate))
+    stats = crawler.stats()
+    log.info("SNMP crawl done; %d miners found (%d queried, %d timeouts, %d cached, %d backing off)",
+             len(alerts), stats["queries"], stats["timeouts"], stats["cache_hits"],
+             stats["backoff_skips"])
     return alerts
 
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Clock‑skew fingerprint via p0f‑like passive capture
 # ─────────────────────────────────────────────────────────────────────────────
-def clock_skew_analyse(pcap_file):
+def clock_skew_analyse(pcap_file, tolerance_ppm=2.0):
+    """Group source IPs whose TCP timestamp clocks drift at the same rate.
+
+    Each host's skew is fitted from a bounded reservoir of TSval samples; IPs
+    sharing a skew are most likely one physical rig behind several addresses.
+    """
     log.info("Analysing clock‑skew for %s", pcap_file)
-    # TODO: implement or call external tool
-    return []
+    try:
+        collector = clock_skew.collect_from_pcap(pcap_file)
+        fits = clock_skew.fit_skews(collector)
+    except (OSError, pcap_reader.PcapError) as e:
+        log.warning("Cannot read capture: %s", e)
+        return []
+    except RuntimeError as e:
+        log.warning("Clock‑skew analysis unavailable: %s", e)
+        return []
+    log.info("Fitted clock skew for %d of %d hosts (%d samples, %.1f MB)",
+             len(fits), len(collector.hosts), collector.samples,
+             collector.memory_bytes() / 1e6)
+
+    findings = []
+    for cluster in clock_skew.cluster_skews(fits, tolerance_ppm=tolerance_ppm):
+        ips = [stream_capture.int_to_ip(src) for src in cluster["members"]]
+        log.warning("Clock‑skew %.2f ppm @ %d Hz shared by %s",
+                    cluster["skew_ppm"], cluster["hz"], ", ".join(ips))
+        findings.append({
+            "type": "ClockSkewCluster", "ips": ips,
+            "skew_ppm": cluster["skew_ppm"], "hz": cluster["hz"],
+        })
+    return findings
 
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Argparse & Orchestration
 # ─────────────────────────────────────────────────────────────────────────────
+class FindingStream:
+    """Write findings to stdout as NDJSON the moment a module reports them.
+
+    emit() is thread-safe so detectors running in executors can stream too.
+    """
+
+    def __init__(self, out=None):
+        self.out = out or sys.stdout
+        self.count = 0
+        self.by_module = {}
+        self._lock = threading.Lock()
+
+    def emit(self, module, finding):
+        record = {"module": module, "ts": round(time.time(), 3)}
+        record.update(finding)
+        line = json.dumps(record, default=str, ensure_ascii=False)
+        with self._lock:
+            self.out.write(line + "\n")
+            self.out.flush()
+            self.count += 1
+            self.by_module[module] = self.by_module.get(module, 0) + 1
+
+
+async def run_detectors(args, stream):
+    """Run the enabled modules concurrently; returns per-module timings.
+
+    Blocking modules run in executor threads. SNMP is fed LAN hits through a
+    queue as nmap reports them instead of waiting for the whole scan.
+    """
+    timings = {}
+    snmp_queue = asyncio.Queue() if args.snmp else None
+
+    async def timed(name, coro):
+        started = time.perf_counter()
+        error = None
+        try:
+            await coro
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            log.warning("%s failed: %s", name, error)
+        timings[name] = {
+            "seconds": round(time.perf_counter() - started, 3),
+            "findings": stream.by_module.get(name, 0),
+            "error": error,
+        }
+
+    async def collect(name, coro):
+        for finding in await coro:
+            stream.emit(name, finding)
+
+    async def lan():
+        seen = set()
+        try:
+            async for finding in lan_scan(args.targets, fast=args.fast):
+                stream.emit("lan", finding)
+                if snmp_queue is not None and finding["ip"] not in seen:
+                    seen.add(finding["ip"])
+                    snmp_queue.put_nowait(finding["ip"])
+        finally:
+            if snmp_queue is not None:
+                snmp_queue.put_nowait(None)
+
+    async def snmp():
+        done = False
+        while not done:
+            # Take everything queued so far so one crawl covers a burst of hits
+            batch = [await snmp_queue.get()]
+            while not snmp_queue.empty():
+                batch.append(snmp_queue.get_nowait())
+            done = None in batch
+            hosts = [host for host in batch if host is not None]
+            if hosts:
+                for finding in await snmp_crawl(hosts):
+                    stream.emit("snmp", finding)
+
+    def live_alert(alert):
+        stream.emit("live_capture", alert)
+
+    modules = {"lan": lan()}
+    if args.snmp:
+        modules["snmp"] = snmp()
+    if args.interface:
+        modules["live_capture"] = live_capture(args.interface, on_alert=live_alert)
+    if args.pcap:
+        modules["pcap"] = collect("pcap", asyncio.to_thread(
+            offline_analyse, args.pcap, args.workers, args.flow_model))
+        if args.clock_skew:
+            modules["clock_skew"] = collect("clock_skew", asyncio.to_thread(
+                clock_skew_analyse, args.pcap))
+    if args.ble:
+        modules["ble"] = collect("ble", ble_scan())
+    if args.wifi:
+        modules["wifi"] = collect("wifi", asyncio.to_thread(
+            wifi_probe_scan, interface=args.interface or "wlan0"))
+    if args.acoustic:
+        modules["acoustic"] = collect("acoustic", asyncio.to_thread(acoustic_scan))
+    if args.rf:
+        modules["rf"] = collect("rf", rf_scan())
+
+    log.info("Running %d modules concurrently: %s", len(modules), ", ".join(modules))
+    await asyncio.gather(*(timed(name, coro) for name, coro in modules.items()))
+    return timings
+
+
 async def main():
     p = argparse.ArgumentParser(
         description="MinerHunter 🚀 – Multi‑modal crypto‑miner detection Swiss‑army knife"
@@ -273,6 +608,11 @@ async def main():
         default="192.168.0.0/24",
     )
     p.add_argument("--interface", help="Interface for live capture or Wi‑Fi scans")
+    p.add_argument("--pcap", help="Analyse a PCAP/PCAPNG capture file offline")
+    p.add_argument("--workers", type=int, help="Worker processes for --pcap (default: all cores)")
+    p.add_argument("--flow-model", help="Trained flow classifier model (default: flow_model.json)")
+    p.add_argument("--clock-skew", action="store_true",
+                   help="Cluster hosts in --pcap by TCP timestamp clock skew")
     p.add_argument("--fast", action="store_true", help="Fast Nmap timings")
     p.add_argument("--ble", action="store_true", help="Enable BLE scanner")
     p.add_argument("--wifi", action="store_true", help="Enable Wi‑Fi probe scanner")
@@ -281,35 +621,26 @@ async def main():
     p.add_argument("--snmp", action="store_true", help="Enable SNMP OID crawl")
     args = p.parse_args()
 
-    findings = []
-
-    findings += await lan_scan(args.targets, fast=args.fast)
-
-    if args.interface:
-        findings += await live_capture(args.interface)
-
-    if args.ble:
-        findings += await ble_scan()
-
-    if args.wifi:
-        findings += wifi_probe_scan(interface=args.interface or "wlan0")
-
-    if args.acoustic:
-        findings += acoustic_scan()
-
-    if args.rf:
-        findings += await rf_scan()
-
-    if args.snmp:
-        targets = [f["ip"] for f in findings if "ip" in f]
-        findings += await snmp_crawl(targets)
-
-    if findings:
-        print("\n🚩  POTENTIAL MINERS DETECTED  🚩")
-        for f in findings:
-            print(f)
+    # Findings go to stdout as NDJSON, one object per line; logs stay on stderr
+    stream = FindingStream()
+    started = time.perf_counter()
+    timings = await run_detectors(args, stream)
+    wall = time.perf_counter() - started
+
+    summary = {
+        "findings": stream.count,
+        "wall_seconds": round(wall, 3),
+        "module_seconds": round(sum(t["seconds"] for t in timings.values()), 3),
+        "modules": timings,
+    }
+    print(json.dumps({"summary": summary}, ensure_ascii=False), flush=True)
+    if stream.count:
+        log.warning("🚩  %d potential miner findings", stream.count)
     else:
-        print("✅  No miners detected (yet) – keep watching!")
+        log.info("✅  No miners detected (yet) – keep watching!")
+    for name, timing in sorted(timings.items(), key=lambda item: -item[1]["seconds"]):
+        log.info("  %-12s %7.2fs %4d findings%s", name, timing["seconds"], timing["findings"],
+                 f"  ({timing['error']})" if timing["error"] else "")
     return 0
 
 
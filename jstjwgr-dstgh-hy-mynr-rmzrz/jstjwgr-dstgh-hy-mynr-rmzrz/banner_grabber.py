@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+دریافت بنر سرویس‌ها به‌صورت ناهمگام
+همه پورت‌های باز هم‌زمان بررسی می‌شوند و برای هر پورت بر اساس دسته‌بندی آن در
+بسته امضا پروب مناسب ارسال می‌شود: HTTP HEAD، فرمان version در API ماینر CGMiner
+و mining.subscribe در Stratum. نتایج با TTL در حافظه نگه داشته می‌شوند.
+"""
+
+import asyncio
+import bisect
+import json
+import logging
+import ssl
+import threading
+import time
+from collections import OrderedDict
+
+from signature_pack import get_signature_store
+
+logger = logging.getLogger(__name__)
+
+STRATUM_SUBSCRIBE = json.dumps(
+    {'id': 1, 'method': 'mining.subscribe', 'params': ['MinerDetector/1.0']}
+).encode() + b'\n'
+CGMINER_VERSION = json.dumps({'command': 'version'}).encode()
+
+# دسته پورت در بسته امضا -> نوع پروب
+PROBE_BY_CATEGORY = {
+    'web': 'http',
+    'miner_api': 'cgminer',
+    'stratum': 'stratum',
+    'stratum_tls': 'stratum_tls',
+}
+
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+class LatencyHistogram:
+    """هیستوگرام تأخیر با سطل‌های لگاریتمی ثابت (میلی‌ثانیه)"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.total = 0
+        self.sum_ms = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, latency_ms):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, latency_ms)] += 1
+            self.total += 1
+            self.sum_ms += latency_ms
+
+    def snapshot(self):
+        with self._lock:
+            labels = [f'<={b}ms' for b in self.buckets] + [f'>{self.buckets[-1]}ms']
+            return {
+                'count': self.total,
+                'mean_ms': round(self.sum_ms / self.total, 3) if self.total else 0.0,
+                'buckets': dict(zip(labels, self.counts)),
+            }
+
+
+class BannerCache:
+    """کش بنر به ازای (ip, port) با TTL و سقف اندازه (LRU)"""
+
+    def __init__(self, ttl=300, negative_ttl=60, max_entries=100000):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, ip, port):
+        """(True, بنر) در صورت وجود مقدار معتبر؛ بنر خالی یعنی نتیجه منفی کش‌شده"""
+        key = (ip, port)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, banner = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, banner
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, ip, port, banner):
+        ttl = self.ttl if banner else self.negative_ttl
+        with self._lock:
+            self._entries[(ip, port)] = (time.monotonic() + ttl, banner)
+            self._entries.move_to_end((ip, port))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class BannerGrabber:
+    """پروب هم‌زمان پورت‌ها با پروتکل مناسب، کش نتایج و آمار تأخیر"""
+
+    def __init__(self, signatures=None, timeout=2.0, concurrency=256, max_bytes=1024,
+                 cache_ttl=300):
+        self.signatures = signatures or get_signature_store()
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self.max_bytes = max_bytes
+        self.cache = BannerCache(ttl=cache_ttl)
+        self.histograms = {}
+        self._ssl_context = ssl.create_default_context()
+        self._ssl_context.check_hostname = False
+        self._ssl_context.verify_mode = ssl.CERT_NONE
+
+    def probe_for_port(self, port, signatures=None):
+        """نوع پروب بر اساس دسته پورت در بسته امضا"""
+        signatures = signatures or self.signatures.pack
+        return PROBE_BY_CATEGORY.get(signatures.port_categories.get(port), 'passive')
+
+    def _histogram(self, probe):
+        histogram = self.histograms.get(probe)
+        if histogram is None:
+            histogram = self.histograms.setdefault(probe, LatencyHistogram())
+        return histogram
+
+    async def _read(self, reader, terminator=None):
+        data = b''
+        while len(data) < self.max_bytes:
+            chunk = await reader.read(self.max_bytes - len(data))
+            if not chunk:
+                break
+            data += chunk
+            if terminator and terminator in chunk:
+                break
+        return data
+
+    async def probe(self, ip, port, probe):
+        """ارسال یک پروب و برگرداندن بنر (رشته خالی در صورت عدم پاسخ)"""
+        use_tls = probe == 'stratum_tls'
+        writer = None
+        try:
+            reader, writer = await asyncio.open_connection(
+                ip, port, ssl=self._ssl_context if use_tls else None,
+                server_hostname='' if use_tls else None
+            )
+            if probe == 'http':
+                writer.write(b'HEAD / HTTP/1.0\r\nHost: ' + ip.encode() + b'\r\n\r\n')
+                terminator = b'\r\n\r\n'
+            elif probe == 'cgminer':
+                writer.write(CGMINER_VERSION)
+                terminator = b'\x00'
+            elif probe in ('stratum', 'stratum_tls'):
+                writer.write(STRATUM_SUBSCRIBE)
+                terminator = b'\n'
+            else:
+                terminator = b'\n'
+            await writer.drain()
+            data = await self._read(reader, terminator)
+            return data.rstrip(b'\x00').decode('utf-8', errors='ignore').strip()
+        finally:
+            if writer is not None:
+                writer.close()
+
+    async def _grab_one(self, ip, port, probe, semaphore):
+        hit, banner = self.cache.get(ip, port)
+        if hit:
+            return port, banner
+
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                banner = await asyncio.wait_for(self.probe(ip, port, probe), self.timeout)
+            except (OSError, asyncio.TimeoutError, ssl.SSLError):
+                banner = ''
+            self._histogram(probe).observe((time.perf_counter() - started) * 1000)
+
+        self.cache.put(ip, port, banner)
+        return port, banner
+
+    async def grab_many(self, targets):
+        """بنر همه پورت‌ها به شکل {ip: {port: banner}}؛ targets به شکل {ip: ports}"""
+        signatures = self.signatures.pack
+        semaphore = asyncio.Semaphore(self.concurrency)
+        jobs = []
+        for ip, ports in targets.items():
+            for port in ports:
+                jobs.append((ip, self._grab_one(ip, port, self.probe_for_port(port, signatures), semaphore)))
+
+        results = {ip: {} for ip in targets}
+        outcomes = await asyncio.gather(*(job for _, job in jobs))
+        for (ip, _), (port, banner) in zip(jobs, outcomes):
+            if banner:
+                results[ip][port] = banner
+        return results
+
+    async def grab(self, ip, ports):
+        return (await self.grab_many({ip: ports}))[ip]
+
+    def grab_sync(self, ip, ports):
+        """نسخه هم‌گام برای detectorهای غیرناهمگام"""
+        if not ports:
+            return {}
+        return asyncio.run(self.grab(ip, ports))
+
+    def stats(self):
+        """هیستوگرام تأخیر هر نوع پروب و آمار کش"""
+        return {
+            'latency': {probe: h.snapshot() for probe, h in self.histograms.items()},
+            'cache': {
+                'entries': len(self.cache),
+                'hits': self.cache.hits,
+                'misses': self.cache.misses,
+            },
+        }
+
+
+_grabber = None
+_grabber_lock = threading.Lock()
+
+
+def get_banner_grabber():
+    """نمونه مشترک BannerGrabber تا کش بین اسکن‌ها حفظ شود"""
+    global _grabber
+    if _grabber is None:
+        with _grabber_lock:
+            if _grabber is None:
+                _grabber = BannerGrabber()
+    return _grabber
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+آبشار (cascade) بررسی‌های امتیازدهی یک میزبان
+هر بررسی امتیاز دستگاه را مستقیماً تغییر می‌دهد و آبشار هزینه (زمان) و امتیاز هر اجرا
+را اندازه می‌گیرد. در هر گام از میان بررسی‌هایی که آستانه (gate) آن‌ها برآورده شده،
+بررسی‌ای با بیشترین امتیاز مورد انتظار به ازای هر ثانیه اجرا می‌شود؛ پیش از داشتن آمار
+کافی از مقادیر اولیه (cost_hint و value_hint) استفاده می‌شود. وقتی امتیاز به سطح
+بحرانی برسد یا بررسی دیگری واجد شرایط نباشد، بقیه بررسی‌ها اجرا نمی‌شوند.
+"""
+
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class CascadeCheck:
+    """یک بررسی؛ func(device_info) امتیاز و روش‌های تشخیص را در device_info ثبت می‌کند"""
+
+    __slots__ = ('name', 'func', 'gate', 'cost_hint', 'value_hint')
+
+    def __init__(self, name, func, gate=0, cost_hint=0.1, value_hint=1.0):
+        self.name = name
+        self.func = func
+        self.gate = gate                # حداقل امتیاز لازم برای اجرای این بررسی
+        self.cost_hint = cost_hint      # زمان تخمینی اولیه (ثانیه)
+        self.value_hint = value_hint    # امتیاز مورد انتظار اولیه در هر اجرا
+
+
+class CheckStats:
+    __slots__ = ('runs', 'hits', 'points', 'seconds', 'errors', 'gated', 'early_exit')
+
+    def __init__(self):
+        self.runs = 0
+        self.hits = 0
+        self.points = 0
+        self.seconds = 0.0
+        self.errors = 0
+        self.gated = 0
+        self.early_exit = 0
+
+
+class DetectorCascade:
+    """اجرای بررسی‌ها به ترتیب ارزش به هزینه با توقف زودهنگام"""
+
+    def __init__(self, checks, critical=70, prior_weight=5):
+        self.checks = list(checks)
+        self.critical = critical
+        # وزن مقادیر اولیه در برابر آمار اندازه‌گیری‌شده (بر حسب تعداد اجرا)
+        self.prior_weight = prior_weight
+        self._stats = {check.name: CheckStats() for check in self.checks}
+        self._lock = threading.Lock()
+        self.hosts = 0
+        self.early_exits = 0
+
+    def _rate(self, check):
+        """امتیاز مورد انتظار به ازای هر ثانیه"""
+        stats = self._stats[check.name]
+        k = self.prior_weight
+        expected_points = (stats.points + check.value_hint * k) / (stats.runs + k)
+        expected_cost = (stats.seconds + check.cost_hint * k) / (stats.runs + k)
+        return expected_points / max(expected_cost, 1e-4)
+
+    def order(self):
+        """ترتیب فعلی بررسی‌ها (بدون در نظر گرفتن gate)"""
+        with self._lock:
+            return [c.name for c in sorted(self.checks, key=self._rate, reverse=True)]
+
+    def run(self, device_info):
+        """اجرای آبشار روی device_info؛ خروجی {'ran', 'skipped', 'exit'}"""
+        remaining = list(self.checks)
+        ran = []
+        exit_reason = None
+        while remaining:
+            score = device_info['suspicion_score']
+            if score >= self.critical:
+                exit_reason = 'critical'
+                break
+            eligible = [c for c in remaining if score >= c.gate]
+            if not eligible:
+                exit_reason = 'gated'
+                break
+            with self._lock:
+                check = max(eligible, key=self._rate)
+            remaining.remove(check)
+
+            started = time.perf_counter()
+            error = False
+            try:
+                check.func(device_info)
+            except Exception as e:
+                logger.warning("cascade check %s failed for %s: %s", check.name, device_info.get('ip'), e)
+                error = True
+            elapsed = time.perf_counter() - started
+            points = device_info['suspicion_score'] - score
+            ran.append(check.name)
+
+            with self._lock:
+                stats = self._stats[check.name]
+                stats.runs += 1
+                stats.seconds += elapsed
+                stats.points += points
+                stats.hits += points > 0
+                stats.errors += error
+
+        with self._lock:
+            self.hosts += 1
+            self.early_exits += exit_reason == 'critical'
+            for check in remaining:
+                stats = self._stats[check.name]
+                if exit_reason == 'critical':
+                    stats.early_exit += 1
+                else:
+                    stats.gated += 1
+        return {'ran': ran, 'skipped': [c.name for c in remaining], 'exit': exit_reason}
+
+    def stats(self):
+        """هزینه میانگین، نرخ برخورد و امتیاز میانگین هر بررسی برای تنظیم ترتیب"""
+        with self._lock:
+            checks = {}
+            for check in self.checks:
+                stats = self._stats[check.name]
+                checks[check.name] = {
+                    'runs': stats.runs,
+                    'hit_rate': round(stats.hits / stats.runs, 3) if stats.runs else None,
+                    'mean_points': round(stats.points / stats.runs, 2) if stats.runs else None,
+                    'mean_ms': round(stats.seconds / stats.runs * 1000, 3) if stats.runs else None,
+                    'points_per_second': round(self._rate(check), 2),
+                    'errors': stats.errors,
+                    'skipped_gate': stats.gated,
+                    'skipped_critical': stats.early_exit,
+                    'gate': check.gate,
+                }
+            order = [c.name for c in sorted(self.checks, key=self._rate, reverse=True)]
+            return {
+                'hosts': self.hosts,
+                'early_exits': self.early_exits,
+                'critical': self.critical,
+                'order': order,
+                'checks': checks,
+            }
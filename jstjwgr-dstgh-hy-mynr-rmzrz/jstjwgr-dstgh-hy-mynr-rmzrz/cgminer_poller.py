@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+پرسش‌گر ناهمگام API ماینرهای CGMiner/BFGMiner/SGMiner
+فرمان‌های summary، stats و devs در یک درخواست ترکیبی (summary+stats+devs) به همه
+endpointهای 4028/4029/4030 به‌صورت هم‌زمان ارسال می‌شوند و نرخ هش، دما، توان و مدل
+دستگاه استخراج می‌شود. سری زمانی هر endpoint در آرایه‌های فشرده نگه داشته می‌شود.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+from array import array
+
+logger = logging.getLogger(__name__)
+
+API_PORTS = (4028, 4029, 4030)
+JOINED_COMMAND = 'summary+stats+devs'
+
+# ضریب واحدهای نرخ هش در پاسخ‌های API (کلید -> هش بر ثانیه)
+HASH_RATE_KEYS = (
+    ('GHS 5s', 1e9), ('GHS av', 1e9), ('MHS 5s', 1e6), ('MHS av', 1e6),
+    ('KHS 5s', 1e3), ('KHS av', 1e3), ('THS 5s', 1e12), ('THS av', 1e12),
+)
+HASH_RATE_UNITS = ((1e18, 'EH/s'), (1e15, 'PH/s'), (1e12, 'TH/s'), (1e9, 'GH/s'),
+                   (1e6, 'MH/s'), (1e3, 'KH/s'))
+
+
+class MinerTelemetry:
+    """نتیجه یک پرسش از API ماینر"""
+
+    __slots__ = ('ip', 'port', 'timestamp', 'hash_rate', 'temperatures', 'power', 'model',
+                 'error')
+
+    def __init__(self, ip, port, timestamp, hash_rate=None, temperatures=(), power=None,
+                 model=None, error=None):
+        self.ip = ip
+        self.port = port
+        self.timestamp = timestamp
+        self.hash_rate = hash_rate
+        self.temperatures = tuple(temperatures)
+        self.power = power
+        self.model = model
+        self.error = error
+
+    @property
+    def max_temperature(self):
+        return max(self.temperatures) if self.temperatures else None
+
+    @property
+    def hash_rate_display(self):
+        return format_hash_rate(self.hash_rate)
+
+    def to_dict(self):
+        return {
+            'ip': self.ip,
+            'port': self.port,
+            'timestamp': self.timestamp,
+            'hash_rate': self.hash_rate,
+            'hash_rate_display': self.hash_rate_display,
+            'max_temperature': self.max_temperature,
+            'power': self.power,
+            'model': self.model,
+            'error': self.error,
+        }
+
+
+class TelemetrySeries:
+    """سری زمانی هر endpoint به شکل ستون‌های array('d') با ظرفیت حلقوی ثابت"""
+
+    def __init__(self, capacity=1440):
+        self.capacity = capacity
+        self._series = {}
+
+    def append(self, telemetry):
+        key = (telemetry.ip, telemetry.port)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [array('d'), array('d'), array('d'), array('d'), 0]
+        timestamps, hash_rates, temps, powers, _ = series
+        row = (telemetry.timestamp,
+               telemetry.hash_rate if telemetry.hash_rate is not None else float('nan'),
+               telemetry.max_temperature if telemetry.temperatures else float('nan'),
+               telemetry.power if telemetry.power is not None else float('nan'))
+        if len(timestamps) < self.capacity:
+            for column, value in zip(series[:4], row):
+                column.append(value)
+        else:
+            index = series[4]
+            for column, value in zip(series[:4], row):
+                column[index] = value
+            series[4] = (index + 1) % self.capacity
+
+    def get(self, ip, port):
+        """ردیف‌های (زمان، نرخ هش، بیشینه دما، توان) به ترتیب زمانی"""
+        series = self._series.get((ip, port))
+        if series is None:
+            return []
+        start = series[4]
+        rows = list(zip(*series[:4]))
+        return rows[start:] + rows[:start]
+
+    def __len__(self):
+        return len(self._series)
+
+
+class CGMinerPoller:
+    """پرسش هم‌زمان از هزاران endpoint با استفاده مجدد از اتصال‌های باز"""
+
+    def __init__(self, concurrency=512, timeout=3.0, max_response=1 << 20, series=None):
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.max_response = max_response
+        self.series = series if series is not None else TelemetrySeries()
+        self._connections = {}
+        # endpointهایی که فرمان ترکیبی را پشتیبانی نمی‌کنند
+        self._no_joined = set()
+
+    async def _connection(self, ip, port):
+        """(reader, writer, reused) از اتصال‌های باز یا اتصال جدید"""
+        connection = self._connections.pop((ip, port), None)
+        if connection is not None:
+            reader, writer = connection
+            if not reader.at_eof() and not writer.is_closing():
+                return reader, writer, True
+            writer.close()
+        reader, writer = await asyncio.open_connection(ip, port)
+        return reader, writer, False
+
+    async def command(self, ip, port, command):
+        """ارسال یک فرمان و برگرداندن پاسخ JSON"""
+        reader, writer, reused = await self._connection(ip, port)
+        try:
+            data = await self._exchange(reader, writer, command)
+            if not data and reused:
+                # اتصال نگه‌داشته‌شده در این فاصله از سمت ماینر بسته شده است
+                writer.close()
+                reader, writer = await asyncio.open_connection(ip, port)
+                data = await self._exchange(reader, writer, command)
+        except BaseException:
+            writer.close()
+            raise
+
+        if reader.at_eof():
+            writer.close()
+        else:
+            # اغلب نسخه‌های cgminer پس از هر پاسخ اتصال را می‌بندند؛ بقیه استفاده مجدد می‌شوند
+            self._connections[(ip, port)] = (reader, writer)
+        return parse_response(bytes(data))
+
+    async def _exchange(self, reader, writer, command):
+        writer.write(json.dumps({'command': command}).encode())
+        await writer.drain()
+        data = bytearray()
+        while len(data) < self.max_response:
+            chunk = await reader.read(65536)
+            if not chunk:
+                break
+            data += chunk
+            if chunk.endswith(b'\x00'):
+                break
+        return data
+
+    async def poll(self, ip, port):
+        """پرسش summary/stats/devs از یک endpoint"""
+        now = time.time()
+        try:
+            if (ip, port) not in self._no_joined:
+                response = await asyncio.wait_for(self.command(ip, port, JOINED_COMMAND), self.timeout)
+                if 'summary' in response:
+                    responses = {name: _first(response.get(name)) for name in ('summary', 'stats', 'devs')}
+                else:
+                    self._no_joined.add((ip, port))
+            if (ip, port) in self._no_joined:
+                responses = {}
+                for name in ('summary', 'stats', 'devs'):
+                    responses[name] = await asyncio.wait_for(self.command(ip, port, name), self.timeout)
+        except (OSError, asyncio.TimeoutError, ValueError) as e:
+            self.close_endpoint(ip, port)
+            return MinerTelemetry(ip, port, now, error=str(e) or type(e).__name__)
+
+        telemetry = parse_telemetry(ip, port, now, responses)
+        self.series.append(telemetry)
+        return telemetry
+
+    async def poll_many(self, endpoints):
+        """پرسش هم‌زمان از فهرست (ip, port)"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def bounded(ip, port):
+            async with semaphore:
+                return await self.poll(ip, port)
+
+        return await asyncio.gather(*(bounded(ip, port) for ip, port in endpoints))
+
+    def close_endpoint(self, ip, port):
+        connection = self._connections.pop((ip, port), None)
+        if connection is not None:
+            connection[1].close()
+
+    def close(self):
+        for _, writer in self._connections.values():
+            writer.close()
+        self._connections.clear()
+
+
+def parse_response(data):
+    """تجزیه پاسخ API (JSON با نویسه پایانی NUL)"""
+    text = data.rstrip(b'\x00').decode('utf-8', errors='ignore').strip()
+    if not text:
+        raise ValueError('empty API response')
+    # برخی نسخه‌های قدیمی bfgminer بین اشیای ترکیبی کاما اضافه نمی‌گذارند
+    return json.loads(text.replace('}{', '},{'))
+
+
+def parse_telemetry(ip, port, timestamp, responses):
+    """استخراج نرخ هش، دما، توان و مدل از پاسخ‌های summary/stats/devs"""
+    summary = _section(responses.get('summary'), 'SUMMARY')
+    stats = _section(responses.get('stats'), 'STATS')
+    devs = _section(responses.get('devs'), 'DEVS')
+
+    hash_rate = None
+    for entry in summary[:1]:
+        hash_rate = _hash_rate(entry)
+    if hash_rate is None and devs:
+        rates = [r for r in (_hash_rate(d) for d in devs) if r is not None]
+        hash_rate = sum(rates) if rates else None
+
+    temperatures = []
+    power = None
+    model = None
+    for entry in stats + devs:
+        for key, value in entry.items():
+            lowered = key.lower()
+            if lowered.startswith('temp') and not lowered.startswith('temp_num'):
+                temperatures.extend(_numbers(value))
+            elif lowered in ('power', 'chain_power', 'power_consumption') and power is None:
+                numbers = _numbers(value)
+                power = sum(numbers) if numbers else None
+        if model is None:
+            model = entry.get('Type') or entry.get('Model')
+
+    # دمای صفر یعنی سنسور غیرفعال
+    temperatures = [t for t in temperatures if 0 < t < 200]
+    return MinerTelemetry(ip, port, timestamp, hash_rate, temperatures, power, model)
+
+
+def format_hash_rate(hash_rate):
+    """نمایش خوانای نرخ هش برای ستون hash_rate"""
+    if hash_rate is None:
+        return None
+    for factor, unit in HASH_RATE_UNITS:
+        if hash_rate >= factor:
+            return f'{hash_rate / factor:.2f} {unit}'
+    return f'{hash_rate:.0f} H/s'
+
+
+def _first(value):
+    # در پاسخ ترکیبی هر بخش داخل یک لیست تک‌عضوی است
+    if isinstance(value, list) and value:
+        return value[0]
+    return value or {}
+
+
+def _section(response, name):
+    if not isinstance(response, dict):
+        return []
+    section = response.get(name) or []
+    return [entry for entry in section if isinstance(entry, dict)]
+
+
+def _hash_rate(entry):
+    for key, factor in HASH_RATE_KEYS:
+        if key in entry:
+            numbers = _numbers(entry[key])
+            if numbers:
+                return numbers[0] * factor
+    return None
+
+
+def _numbers(value):
+    if isinstance(value, (int, float)):
+        return [float(value)]
+    if isinstance(value, str):
+        # مقادیری مانند "65-67-70" در فریمور برخی ماینرها
+        numbers = []
+        for part in value.replace(',', '-').split('-'):
+            try:
+                numbers.append(float(part))
+            except ValueError:
+                continue
+        return numbers
+    return []
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# شبیه‌ساز API برای آزمایش و سنجش کارایی
+# ─────────────────────────────────────────────────────────────────────────────
+class EmulatedCGMinerAPI:
+    """سرور محلی شبیه cgminer که summary/stats/devs/version و فرمان ترکیبی را پاسخ می‌دهد"""
+
+    def __init__(self, model='Antminer S19', ghs=95000.0, temperatures=(64, 66, 65), power=3250,
+                 keep_open=False):
+        self.model = model
+        self.ghs = ghs
+        self.temperatures = temperatures
+        self.power = power
+        self.keep_open = keep_open
+        self.requests = 0
+
+    def respond(self, command):
+        status = [{'STATUS': 'S', 'When': int(time.time()), 'Code': 11, 'Msg': 'Summary'}]
+        sections = {
+            'version': {'STATUS': status, 'VERSION': [{'CGMiner': '4.11.1', 'API': '3.7', 'Type': self.model}]},
+            'summary': {'STATUS': status, 'SUMMARY': [{'Elapsed': 3600, 'GHS 5s': self.ghs, 'GHS av': self.ghs}]},
+            'stats': {'STATUS': status, 'STATS': [
+                {'CGMiner': '4.11.1', 'Type': self.model},
+                dict({f'temp{i + 1}': t for i, t in enumerate(self.temperatures)}, chain_power=self.power),
+            ]},
+            'devs': {'STATUS': status, 'DEVS': [
+                {'ASC': i, 'Temperature': t, 'MHS av': self.ghs * 1000 / len(self.temperatures)}
+                for i, t in enumerate(self.temperatures)
+            ]},
+        }
+        names = command.split('+')
+        if len(names) == 1:
+            return sections.get(command, {'STATUS': [{'STATUS': 'E', 'Msg': 'Invalid command'}]})
+        return {name: [sections[name]] for name in names if name in sections}
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                data = await reader.read(4096)
+                if not data:
+                    break
+                self.requests += 1
+                command = json.loads(data.decode()).get('command', '')
+                writer.write(json.dumps(self.respond(command)).encode() + b'\x00')
+                await writer.drain()
+                if not self.keep_open:
+                    break
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host='127.0.0.1', port=4028):
+        return await asyncio.start_server(self.handle, host, port)
+
+
+async def _benchmark(count, rounds, base_port):
+    emulator = EmulatedCGMinerAPI()
+    servers = [await emulator.serve(port=base_port + i) for i in range(count)]
+    poller = CGMinerPoller()
+    endpoints = [('127.0.0.1', base_port + i) for i in range(count)]
+    try:
+        for _ in range(rounds):
+            started = time.perf_counter()
+            results = await poller.poll_many(endpoints)
+            elapsed = time.perf_counter() - started
+            ok = sum(1 for r in results if r.error is None)
+            print(f'{ok}/{count} miners in {elapsed:.2f}s '
+                  f'({count / elapsed * 60:.0f} miners/min), sample: {results[0].to_dict()}')
+    finally:
+        poller.close()
+        for server in servers:
+            server.close()
+
+
+def main():
+    p = argparse.ArgumentParser(description='CGMiner API poller')
+    p.add_argument('endpoints', nargs='*', help='ip[:port] targets (default port 4028)')
+    p.add_argument('--emulate', type=int, metavar='N', help='benchmark against N local emulated miners')
+    p.add_argument('--rounds', type=int, default=3)
+    p.add_argument('--base-port', type=int, default=40000)
+    args = p.parse_args()
+
+    if args.emulate:
+        asyncio.run(_benchmark(args.emulate, args.rounds, args.base_port))
+        return
+
+    endpoints = []
+    for target in args.endpoints:
+        host, _, port = target.partition(':')
+        endpoints.append((host, int(port or API_PORTS[0])))
+    for telemetry in asyncio.run(CGMinerPoller().poll_many(endpoints)):
+        print(json.dumps(telemetry.to_dict(), ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
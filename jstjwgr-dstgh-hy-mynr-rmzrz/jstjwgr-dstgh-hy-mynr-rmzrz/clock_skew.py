@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+اثر انگشت انحراف ساعت (clock skew) از گزینه TCP timestamp
+برای هر آدرس مبدأ نمونه‌های (زمان ضبط، TSval) جمع می‌شود و شیب TSval نسبت به زمان
+با رگرسیون مقاوم (Huber/IRLS) به‌صورت برداری و دسته‌ای با NumPy برازش می‌شود. انحراف
+فرکانس ساعت از مقدار اسمی (بر حسب ppm) برای هر دستگاه فیزیکی تقریباً ثابت است؛
+بنابراین چند IP با انحراف یکسان احتمالاً یک دستگاه پشت NAT یا با چند آدرس‌اند.
+
+کرنل‌های جدید لینوکس برای هر اتصال یک offset تصادفی به TSval اضافه می‌کنند؛ به همین
+دلیل هر نمونه نسبت به اولین بسته همان جریان سنجیده می‌شود و فقط شیب مشترک است.
+حافظه با نمونه‌برداری reservoir برای هر میزبان و سقف تعداد جریان و میزبان محدود است.
+"""
+
+import random
+import struct
+from array import array
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# فرکانس‌های رایج ساعت TCP timestamp (هرتز)
+NOMINAL_HZ = (100, 250, 300, 1000)
+
+TCPOPT_EOL = 0
+TCPOPT_NOP = 1
+TCPOPT_TIMESTAMP = 8
+
+_TSVAL = struct.Struct('!I')
+
+
+def tcp_timestamp(buf, options_start, options_end):
+    """مقدار TSval از گزینه‌های TCP یا None"""
+    offset = options_start
+    # چیدمان رایج: NOP NOP TS
+    if options_end - offset >= 12 and buf[offset + 2] == TCPOPT_TIMESTAMP and buf[offset] == TCPOPT_NOP:
+        return _TSVAL.unpack_from(buf, offset + 4)[0]
+    while offset < options_end:
+        kind = buf[offset]
+        if kind == TCPOPT_EOL:
+            return None
+        if kind == TCPOPT_NOP:
+            offset += 1
+            continue
+        if offset + 1 >= options_end:
+            return None
+        length = buf[offset + 1]
+        if length < 2:
+            return None
+        if kind == TCPOPT_TIMESTAMP and length == 10 and offset + 10 <= options_end:
+            return _TSVAL.unpack_from(buf, offset + 2)[0]
+        offset += length
+    return None
+
+
+class HostSamples:
+    """reservoir نمونه‌های (dt, dticks) یک میزبان نسبت به مرجع هر جریان"""
+
+    __slots__ = ('dt', 'dticks', 'seen', 'flows')
+
+    def __init__(self):
+        self.dt = array('d')
+        self.dticks = array('d')
+        self.seen = 0
+        self.flows = {}  # کلید جریان -> (زمان مرجع، TSval مرجع)
+
+
+class SkewCollector:
+    """جمع‌آوری نمونه‌های TCP timestamp با حافظه محدود"""
+
+    def __init__(self, reservoir=256, max_flows_per_host=64, max_hosts=100000,
+                 min_gap=1.0, seed=0):
+        self.reservoir = reservoir
+        self.max_flows_per_host = max_flows_per_host
+        self.max_hosts = max_hosts
+        # نمونه‌های نزدیک‌تر از min_gap ثانیه به مرجع اطلاعاتی درباره شیب ندارند
+        self.min_gap = min_gap
+        self.hosts = {}
+        self.samples = 0
+        self.dropped_hosts = 0
+        self._random = random.Random(seed)
+
+    def add(self, timestamp, src, flow, tsval):
+        """ثبت یک بسته از src؛ flow هر کلید یکتای جریان (مثلاً (dst, sport, dport))"""
+        host = self.hosts.get(src)
+        if host is None:
+            if len(self.hosts) >= self.max_hosts:
+                self.dropped_hosts += 1
+                return
+            host = self.hosts[src] = HostSamples()
+
+        reference = host.flows.get(flow)
+        if reference is None:
+            if len(host.flows) >= self.max_flows_per_host:
+                # قدیمی‌ترین جریان کنار گذاشته می‌شود؛ نمونه‌های قبلی آن در reservoir می‌مانند
+                del host.flows[next(iter(host.flows))]
+            host.flows[flow] = (timestamp, tsval)
+            return
+
+        dt = timestamp - reference[0]
+        if dt < self.min_gap:
+            return
+        dticks = (tsval - reference[1]) & 0xFFFFFFFF
+        if dticks >= 0x80000000:
+            return  # بسته قدیمی‌تر از مرجع (ترتیب به‌هم‌ریخته)
+
+        # Algorithm R
+        host.seen += 1
+        self.samples += 1
+        if len(host.dt) < self.reservoir:
+            host.dt.append(dt)
+            host.dticks.append(dticks)
+        else:
+            j = self._random.randrange(host.seen)
+            if j < self.reservoir:
+                host.dt[j] = dt
+                host.dticks[j] = dticks
+
+    def memory_bytes(self):
+        return sum(
+            (len(h.dt) + len(h.dticks)) * 8 + len(h.flows) * 120 for h in self.hosts.values()
+        )
+
+
+def collect_from_pcap(path, collector=None):
+    """پر کردن SkewCollector از فایل ضبط (فقط بسته‌های TCP دارای timestamp)"""
+    from pcap_reader import PcapReader, PROTO_TCP
+
+    collector = collector or SkewCollector()
+    add = collector.add
+    with PcapReader(path) as reader:
+        view = reader.view
+        for (timestamp, src, dst, _, sport, dport, _, _,
+             l4, payload, _) in reader.packets((PROTO_TCP,)):
+            if payload - l4 <= 20:
+                continue
+            tsval = tcp_timestamp(view, l4 + 20, payload)
+            if tsval is not None:
+                add(timestamp, src, (dst, sport, dport), tsval)
+    return collector
+
+
+def fit_skews(collector, min_samples=20, min_span=30.0, batch=1024, iterations=8):
+    """برازش شیب برای همه میزبان‌ها به‌صورت دسته‌ای
+
+    خروجی: {src: {'hz', 'skew_ppm', 'stderr_ppm', 'samples', 'span'}}
+    """
+    if np is None:
+        raise RuntimeError('numpy is required for clock-skew fitting')
+    eligible = [
+        (src, host) for src, host in collector.hosts.items()
+        if len(host.dt) >= min_samples and max(host.dt) >= min_span
+    ]
+    results = {}
+    width = collector.reservoir
+    for start in range(0, len(eligible), batch):
+        chunk = eligible[start:start + batch]
+        x = np.zeros((len(chunk), width))
+        y = np.zeros((len(chunk), width))
+        mask = np.zeros((len(chunk), width), dtype=bool)
+        for row, (_, host) in enumerate(chunk):
+            n = len(host.dt)
+            x[row, :n] = np.frombuffer(host.dt, dtype=np.float64)
+            y[row, :n] = np.frombuffer(host.dticks, dtype=np.float64)
+            mask[row, :n] = True
+
+        # IRLS با وزن Huber برای مدل بدون عرض از مبدأ y = slope * x
+        weights = mask.astype(np.float64)
+        for _ in range(iterations):
+            slope = (weights * x * y).sum(axis=1) / np.maximum((weights * x * x).sum(axis=1), 1e-12)
+            residual = y - slope[:, None] * x
+            abs_residual = np.where(mask, np.abs(residual), np.nan)
+            scale = 1.4826 * np.nanmedian(abs_residual, axis=1)
+            scale = np.maximum(scale, 0.5)  # کمتر از نصف تیک قابل تفکیک نیست
+            threshold = 1.345 * scale[:, None]
+            weights = np.where(mask, np.minimum(1.0, threshold / np.maximum(np.abs(residual), 1e-12)), 0.0)
+
+        residual = y - slope[:, None] * x
+        count = mask.sum(axis=1)
+        variance = (weights * residual ** 2).sum(axis=1) / np.maximum(count - 1, 1)
+        slope_stderr = np.sqrt(variance / np.maximum((weights * x * x).sum(axis=1), 1e-12))
+
+        nominal = np.asarray(NOMINAL_HZ, dtype=np.float64)
+        hz = nominal[np.argmin(np.abs(np.log(np.maximum(slope, 1e-9)[:, None] / nominal)), axis=1)]
+        skew_ppm = (slope / hz - 1.0) * 1e6
+        stderr_ppm = slope_stderr / hz * 1e6
+        for row, (src, host) in enumerate(chunk):
+            results[src] = {
+                'hz': int(hz[row]),
+                'skew_ppm': float(skew_ppm[row]),
+                'stderr_ppm': float(stderr_ppm[row]),
+                'samples': int(count[row]),
+                'span': float(x[row, :count[row]].max()),
+            }
+    return results
+
+
+def cluster_skews(fits, tolerance_ppm=2.0, max_skew_ppm=1000.0):
+    """گروه‌بندی میزبان‌هایی با فرکانس اسمی یکسان و انحراف نزدیک (پیوند تکی یک‌بعدی)
+
+    دو میزبان هم‌گروه‌اند اگر اختلاف انحرافشان از tolerance و سه برابر خطای ترکیبی
+    بیشتر نباشد. فقط گروه‌های با بیش از یک عضو برگردانده می‌شوند.
+    """
+    ordered = sorted(
+        (fit['hz'], fit['skew_ppm'], src) for src, fit in fits.items()
+        if abs(fit['skew_ppm']) <= max_skew_ppm
+    )
+    clusters = []
+    current = []
+    for hz, skew, src in ordered:
+        if current:
+            last_hz, last_skew, last_src = current[-1]
+            limit = max(tolerance_ppm, 3 * (fits[src]['stderr_ppm'] + fits[last_src]['stderr_ppm']))
+            if hz != last_hz or skew - last_skew > limit:
+                if len(current) > 1:
+                    clusters.append(current)
+                current = []
+        current.append((hz, skew, src))
+    if len(current) > 1:
+        clusters.append(current)
+
+    return [
+        {
+            'hz': members[0][0],
+            'skew_ppm': round(sum(m[1] for m in members) / len(members), 3),
+            'members': [m[2] for m in members],
+        }
+        for members in clusters
+    ]
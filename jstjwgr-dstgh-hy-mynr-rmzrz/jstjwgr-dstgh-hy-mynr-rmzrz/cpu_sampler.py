@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+نمونه‌بردار مصرف CPU فرآیندها
+در هر تیک یک‌بار /proc/[pid]/stat همه فرآیندها خوانده می‌شود و درصد مصرف از
+اختلاف زمان CPU با تیک قبلی محاسبه می‌شود؛ بدون مکث جداگانه برای هر فرآیند.
+تاریخچه هر PID برای تشخیص مصرف پایدار (مثلاً بالای ۸۰٪ به مدت ۵ دقیقه) نگه داشته می‌شود.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+from process_watcher import PAGE_SIZE, PROC_ROOT, _read_stat
+
+logger = logging.getLogger(__name__)
+
+CLK_TCK = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+
+
+class CpuSampler:
+    """نگهداری baseline زمان CPU هر PID بین تیک‌ها و محاسبه درصد مصرف"""
+
+    def __init__(self, history_seconds=900, min_interval=0.5):
+        self.history_seconds = history_seconds
+        self.min_interval = min_interval
+        self.use_procfs = os.path.exists(os.path.join(PROC_ROOT, 'self', 'stat'))
+        self._baseline = {}
+        self._history = {}
+        self.current = {}
+        self.rss_bytes = {}
+        self.last_tick = None
+        self.ticks = 0
+        self._lock = threading.Lock()
+        # تیک‌های همزمان پشت سر هم اجرا می‌شوند تا نمونه قدیمی‌تر بعد از نمونه جدیدتر اعمال نشود
+        self._tick_lock = threading.Lock()
+        self._thread = None
+
+    def _read_cpu_times(self):
+        """یک پاس روی همه فرآیندها: {pid: (شناسه شروع، ثانیه CPU، rss)}"""
+        samples = {}
+        if self.use_procfs:
+            for entry in os.listdir(PROC_ROOT):
+                if not entry.isdigit():
+                    continue
+                stat = _read_stat(entry)
+                if stat is None:
+                    continue
+                fields = stat[1]
+                # utime=14، stime=15، starttime=22، rss=24 (فیلدها از state=3 شروع می‌شوند)
+                cpu_seconds = (int(fields[11]) + int(fields[12])) / CLK_TCK
+                samples[int(entry)] = (int(fields[19]), cpu_seconds, int(fields[21]) * PAGE_SIZE)
+        elif psutil:
+            for proc in psutil.process_iter(['create_time', 'cpu_times', 'memory_info']):
+                info = proc.info
+                if info['cpu_times'] is None:
+                    continue
+                cpu = info['cpu_times']
+                rss = info['memory_info'].rss if info['memory_info'] else 0
+                samples[proc.pid] = (info['create_time'], cpu.user + cpu.system, rss)
+        return samples
+
+    def tick(self):
+        """یک نمونه‌برداری برای همه فرآیندها"""
+        with self._tick_lock:
+            now = time.monotonic()
+            samples = self._read_cpu_times()
+            return self._apply(now, samples)
+
+    def _apply(self, now, samples):
+        with self._lock:
+            elapsed = now - self.last_tick if self.last_tick is not None else None
+            current = {}
+            for pid, (start, cpu_seconds, rss) in samples.items():
+                previous = self._baseline.get(pid)
+                # PID تکراری با زمان شروع متفاوت یعنی فرآیند جدید
+                if elapsed and previous is not None and previous[0] == start:
+                    percent = max(0.0, (cpu_seconds - previous[1]) / elapsed * 100)
+                    current[pid] = percent
+                    history = self._history.get(pid)
+                    if history is None:
+                        history = self._history[pid] = deque()
+                    # هر نمونه بازه (تیک قبلی، اکنون] را پوشش می‌دهد
+                    history.append((self.last_tick, now, percent))
+                    while history and now - history[0][1] > self.history_seconds:
+                        history.popleft()
+                else:
+                    self._history.pop(pid, None)
+
+            self._baseline = {pid: (start, cpu_seconds) for pid, (start, cpu_seconds, _) in samples.items()}
+            for pid in list(self._history):
+                if pid not in samples:
+                    del self._history[pid]
+            self.current = current
+            self.rss_bytes = {pid: rss for pid, (_, _, rss) in samples.items()}
+            self.last_tick = now
+            self.ticks += 1
+        return current
+
+    def sample_if_stale(self, max_age=5.0):
+        """تیک جدید اگر آخرین نمونه قدیمی است؛ در اولین فراخوانی فقط یک‌بار صبر می‌کند"""
+        if self.last_tick is None:
+            self.tick()
+            time.sleep(self.min_interval)
+            return self.tick()
+        if time.monotonic() - self.last_tick >= max_age:
+            return self.tick()
+        return self.current
+
+    def percent(self, pid):
+        """آخرین درصد مصرف CPU (بر مبنای یک هسته، مانند psutil)"""
+        return self.current.get(pid, 0.0)
+
+    def sustained(self, pid, threshold, seconds):
+        """آیا مصرف PID در کل 'seconds' ثانیه اخیر بالای threshold بوده است"""
+        with self._lock:
+            history = self._history.get(pid)
+            if not history:
+                return False
+            window_start = history[-1][1] - seconds
+            for interval_start, _, percent in reversed(history):
+                if percent < threshold:
+                    return False
+                if interval_start <= window_start:
+                    return True
+            return False
+
+    def sustained_pids(self, threshold, seconds):
+        """همه PIDهایی که مصرف پایدار بالای threshold دارند"""
+        return [pid for pid in list(self._history) if self.sustained(pid, threshold, seconds)]
+
+    def start(self, interval=5.0):
+        """نمونه‌برداری دوره‌ای در پس‌زمینه برای ساختن پنجره‌های زمانی"""
+        if self._thread is not None:
+            return
+
+        def run():
+            while True:
+                try:
+                    self.tick()
+                except Exception as e:
+                    logger.error(f"خطا در نمونه‌برداری CPU: {e}")
+                time.sleep(interval)
+
+        self._thread = threading.Thread(target=run, name='cpu-sampler', daemon=True)
+        self._thread.start()
+
+
+_sampler = None
+_sampler_lock = threading.Lock()
+
+
+def get_cpu_sampler():
+    """نمونه مشترک CpuSampler برای همه detectorها"""
+    global _sampler
+    if _sampler is None:
+        with _sampler_lock:
+            if _sampler is None:
+                _sampler = CpuSampler()
+                _sampler.start()
+    return _sampler
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+طبقه‌بند برداری جریان‌ها برای ترافیک رمزشده استخراج
+ویژگی‌ها (توزیع اندازه بسته، منظم بودن زمان ارسال share، نسبت بایت ارسالی به
+دریافتی و ...) به‌صورت دسته‌ای با NumPy مستقیماً روی ستون‌های جدول جریان محاسبه
+می‌شوند و یک مدل خطی (رگرسیون لجستیک) همه جریان‌ها را یک‌جا امتیاز می‌دهد؛
+بنابراین Stratum روی TLS (پورت 443 یا 9999/14444) بدون دیدن payload هم قابل تشخیص است.
+
+آموزش:  python flow_classifier.py train --miner m.pcap --benign b.pcap -o flow_model.json
+بنچمارک: python flow_classifier.py bench --flows 1000000
+"""
+
+import argparse
+import json
+import logging
+import os
+import time
+from array import array
+from pathlib import Path
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from flow_table import EXPORT_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_PATH = Path(__file__).resolve().parent / 'flow_model.json'
+MODEL_FORMAT = 1
+
+FEATURES = (
+    'log_packets', 'log_bytes', 'up_down_ratio',
+    'size_bin0', 'size_bin1', 'size_bin2', 'size_bin3',
+    'log_iat_mean', 'iat_cv', 'log_duration', 'log_mean_payload',
+    'miner_port', 'web_port',
+)
+
+
+class FlowModelError(ValueError):
+    """فایل مدل نامعتبر یا ناسازگار"""
+
+
+def _column(flows, name):
+    column = flows[name]
+    if isinstance(column, array):
+        # بدون کپی: NumPy مستقیماً روی بافر array کار می‌کند
+        return np.frombuffer(column, dtype=column.typecode)
+    return np.asarray(column)
+
+
+def flow_features(flows, miner_ports=(), web_ports=()):
+    """ماتریس ویژگی (تعداد جریان × len(FEATURES)) از ستون‌های جدول جریان"""
+    if np is None:
+        raise RuntimeError('numpy is required for the flow classifier')
+    packets_fwd = _column(flows, 'packets_fwd').astype(np.float64)
+    packets_rev = _column(flows, 'packets_rev').astype(np.float64)
+    bytes_fwd = _column(flows, 'bytes_fwd').astype(np.float64)
+    bytes_rev = _column(flows, 'bytes_rev').astype(np.float64)
+    packets = packets_fwd + packets_rev
+    total_bytes = bytes_fwd + bytes_rev
+    safe_packets = np.maximum(packets, 1.0)
+
+    iat_mean = _column(flows, 'iat_mean')
+    iat_count = np.maximum(packets - 1.0, 1.0)
+    iat_std = np.sqrt(np.maximum(_column(flows, 'iat_m2'), 0.0) / np.maximum(iat_count - 1.0, 1.0))
+    # ضریب تغییرات پایین یعنی ارسال منظم (مثل share یا keepalive در Stratum)
+    iat_cv = np.clip(iat_std / np.maximum(iat_mean, 1e-6), 0.0, 10.0)
+    duration = _column(flows, 'last_seen') - _column(flows, 'first_seen')
+    dport = _column(flows, 'dport')
+
+    features = np.empty((len(packets), len(FEATURES)), dtype=np.float64)
+    features[:, 0] = np.log1p(packets)
+    features[:, 1] = np.log1p(total_bytes)
+    features[:, 2] = np.log((bytes_fwd + 1.0) / (bytes_rev + 1.0))
+    for i in range(4):
+        features[:, 3 + i] = _column(flows, f'size_bin{i}') / safe_packets
+    features[:, 7] = np.log1p(np.maximum(iat_mean, 0.0))
+    features[:, 8] = iat_cv
+    features[:, 9] = np.log1p(np.maximum(duration, 0.0))
+    features[:, 10] = np.log1p(total_bytes / safe_packets)
+    features[:, 11] = np.isin(dport, np.fromiter(miner_ports, dtype=np.int64, count=len(miner_ports)))
+    features[:, 12] = np.isin(dport, np.fromiter(web_ports, dtype=np.int64, count=len(web_ports)))
+    return features
+
+
+def port_sets(signatures):
+    """پورت‌های ماینر و وب از بسته امضا"""
+    miner_ports = set()
+    for category in ('stratum', 'stratum_tls', 'miner_api'):
+        miner_ports |= signatures.ports_by_category.get(category, frozenset())
+    web_ports = set(signatures.ports_by_category.get('web', frozenset())) | {443}
+    return sorted(miner_ports), sorted(web_ports)
+
+
+class FlowClassifier:
+    """رگرسیون لجستیک روی ویژگی‌های استانداردشده"""
+
+    def __init__(self, mean, scale, weights, bias, threshold=0.5, min_packets=3, metadata=None):
+        if np is None:
+            raise RuntimeError('numpy is required for the flow classifier')
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.bias = float(bias)
+        self.threshold = threshold
+        self.min_packets = min_packets
+        self.metadata = metadata or {}
+        if not (len(self.mean) == len(self.scale) == len(self.weights) == len(FEATURES)):
+            raise FlowModelError('model does not match the feature set')
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('format') != MODEL_FORMAT or tuple(data.get('features', ())) != FEATURES:
+            raise FlowModelError(f'{path}: unsupported model format or feature set')
+        return cls(data['mean'], data['scale'], data['weights'], data['bias'],
+                   data.get('threshold', 0.5), data.get('min_packets', 3), data.get('metadata'))
+
+    def save(self, path):
+        data = {
+            'format': MODEL_FORMAT,
+            'features': list(FEATURES),
+            'mean': self.mean.tolist(),
+            'scale': self.scale.tolist(),
+            'weights': self.weights.tolist(),
+            'bias': self.bias,
+            'threshold': self.threshold,
+            'min_packets': self.min_packets,
+            'metadata': self.metadata,
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+
+    def score_features(self, features):
+        z = ((features - self.mean) / self.scale) @ self.weights + self.bias
+        return 1.0 / (1.0 + np.exp(-np.clip(z, -50, 50)))
+
+    def score(self, flows, miner_ports=(), web_ports=()):
+        """احتمال استخراج برای همه جریان‌ها؛ جریان‌های کوتاه‌تر از min_packets صفر"""
+        features = flow_features(flows, miner_ports, web_ports)
+        scores = self.score_features(features)
+        packets = _column(flows, 'packets_fwd').astype(np.int64) + _column(flows, 'packets_rev')
+        scores[packets < self.min_packets] = 0.0
+        return scores
+
+    def classify(self, flows, miner_ports=(), web_ports=()):
+        """(اندیس جریان‌های مشکوک، امتیاز آن‌ها)"""
+        scores = self.score(flows, miner_ports, web_ports)
+        suspects = np.flatnonzero(scores >= self.threshold)
+        return suspects, scores[suspects]
+
+    @classmethod
+    def train(cls, features, labels, epochs=500, learning_rate=0.5, l2=1e-3, **kwargs):
+        """آموزش با گرادیان کاهشی دسته‌ای و وزن‌دهی متوازن کلاس‌ها"""
+        labels = np.asarray(labels, dtype=np.float64)
+        mean = features.mean(axis=0)
+        scale = features.std(axis=0)
+        scale[scale == 0] = 1.0
+        x = (features - mean) / scale
+        positives = labels.sum()
+        negatives = len(labels) - positives
+        if not positives or not negatives:
+            raise FlowModelError('training needs both miner and benign flows')
+        sample_weight = np.where(labels == 1, len(labels) / (2 * positives), len(labels) / (2 * negatives))
+
+        weights = np.zeros(x.shape[1])
+        bias = 0.0
+        for _ in range(epochs):
+            p = 1.0 / (1.0 + np.exp(-np.clip(x @ weights + bias, -50, 50)))
+            error = (p - labels) * sample_weight
+            weights -= learning_rate * (x.T @ error / len(labels) + l2 * weights)
+            bias -= learning_rate * error.mean()
+        return cls(mean, scale, weights, bias, **kwargs)
+
+
+def load_classifier(path=None):
+    """بارگذاری مدل از path یا MINER_FLOW_MODEL؛ None اگر مدل یا numpy در دسترس نیست"""
+    path = Path(path or os.environ.get('MINER_FLOW_MODEL') or DEFAULT_MODEL_PATH)
+    if np is None or not path.exists():
+        return None
+    try:
+        return FlowClassifier.load(path)
+    except (OSError, ValueError, KeyError) as e:
+        logger.error(f"خطا در بارگذاری مدل جریان {path}: {e}")
+        return None
+
+
+# ─── خط فرمان: آموزش و بنچمارک ───
+
+def _labeled_flows(paths, label, workers, min_packets):
+    import capture_pool
+
+    feature_sets, label_sets = [], []
+    for path in paths:
+        flows = capture_pool.analyse_capture(path, workers=workers)['flows']
+        packets = np.frombuffer(flows['packets_fwd'], dtype='I').astype(np.int64) + \
+            np.frombuffer(flows['packets_rev'], dtype='I')
+        keep = packets >= min_packets
+        features = flow_features(flows, *_ports())[keep]
+        feature_sets.append(features)
+        label_sets.append(np.full(len(features), label))
+        print(f'{path}: {len(features)} flows (label {label})')
+    return feature_sets, label_sets
+
+
+def _ports():
+    from signature_pack import get_signature_store
+
+    return port_sets(get_signature_store().pack)
+
+
+def _train(args):
+    miner_x, miner_y = _labeled_flows(args.miner, 1, args.workers, args.min_packets)
+    benign_x, benign_y = _labeled_flows(args.benign, 0, args.workers, args.min_packets)
+    features = np.concatenate(miner_x + benign_x)
+    labels = np.concatenate(miner_y + benign_y)
+    model = FlowClassifier.train(
+        features, labels, epochs=args.epochs, threshold=args.threshold,
+        min_packets=args.min_packets,
+        metadata={'miner_captures': args.miner, 'benign_captures': args.benign,
+                  'flows': int(len(labels)), 'trained_at': time.strftime('%Y-%m-%dT%H:%M:%S')},
+    )
+    predicted = model.score_features(features) >= model.threshold
+    tp = int((predicted & (labels == 1)).sum())
+    fp = int((predicted & (labels == 0)).sum())
+    fn = int((~predicted & (labels == 1)).sum())
+    model.metadata.update({'train_precision': tp / max(tp + fp, 1), 'train_recall': tp / max(tp + fn, 1)})
+    model.save(args.output)
+    print(json.dumps({'output': str(args.output), **model.metadata}, ensure_ascii=False, indent=2))
+
+
+def synthetic_flows(count, seed=0):
+    """ستون‌های تصادفی به شکل خروجی FlowTable برای بنچمارک"""
+    rng = np.random.default_rng(seed)
+    flows = {}
+    for name, code in EXPORT_COLUMNS:
+        if code == 'd':
+            values = rng.random(count) * 100
+        else:
+            values = rng.integers(0, 1 << min(8 * array(code).itemsize - 1, 16), count)
+        flows[name] = array(code, values.astype(np.dtype(code)).tobytes())
+    flows['last_seen'] = array('d', (np.frombuffer(flows['first_seen']) + rng.random(count) * 600).tobytes())
+    return flows
+
+
+def _bench(args):
+    flows = synthetic_flows(args.flows)
+    model = FlowClassifier(np.zeros(len(FEATURES)), np.ones(len(FEATURES)),
+                           np.random.default_rng(1).normal(size=len(FEATURES)), 0.0)
+    miner_ports, web_ports = _ports()
+    model.score(flows, miner_ports, web_ports)  # گرم کردن
+    started = time.perf_counter()
+    for _ in range(args.rounds):
+        model.score(flows, miner_ports, web_ports)
+    elapsed = (time.perf_counter() - started) / args.rounds
+    print(f'{args.flows} flows scored in {elapsed * 1000:.1f} ms '
+          f'({args.flows / elapsed:,.0f} flows/sec)')
+
+
+def main():
+    p = argparse.ArgumentParser(description='Flow-feature miner traffic classifier')
+    sub = p.add_subparsers(dest='command', required=True)
+    train = sub.add_parser('train', help='train a model from labeled captures')
+    train.add_argument('--miner', nargs='+', required=True, help='captures containing only mining traffic')
+    train.add_argument('--benign', nargs='+', required=True, help='captures without mining traffic')
+    train.add_argument('-o', '--output', default=str(DEFAULT_MODEL_PATH))
+    train.add_argument('--epochs', type=int, default=500)
+    train.add_argument('--threshold', type=float, default=0.5)
+    train.add_argument('--min-packets', type=int, default=3)
+    train.add_argument('--workers', type=int)
+    bench = sub.add_parser('bench', help='measure scoring throughput')
+    bench.add_argument('--flows', type=int, default=1000000)
+    bench.add_argument('--rounds', type=int, default=5)
+    args = p.parse_args()
+
+    if np is None:
+        p.error('numpy is required')
+    if args.command == 'train':
+        _train(args)
+    else:
+        _bench(args)
+
+
+if __name__ == '__main__':
+    main()
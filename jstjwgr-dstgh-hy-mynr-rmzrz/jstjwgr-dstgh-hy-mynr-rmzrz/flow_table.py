@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+جدول جریان ستونی برای میلیون‌ها جریان هم‌زمان
+هر فیلد یک ستون array با نوع ثابت است و جریان‌ها با آدرس‌دهی باز (probe خطی)
+روی هش متقارن 5-tuple در این ستون‌ها قرار می‌گیرند؛ حدود ۱۰۰ بایت به ازای هر جریان
+به جای صدها بایت برای dict تو در تو. جهت جریان (شروع‌کننده/پاسخ‌دهنده)، شمارنده‌ها،
+زمان اولین و آخرین بسته، آمار فاصله بین بسته‌ها (Welford) و توزیع اندازه payload
+نگه داشته می‌شود و جریان‌های بی‌فعالیت منقضی و برای طبقه‌بند صادر می‌شوند.
+"""
+
+from array import array
+from bisect import bisect_right
+
+# (نام، نوع array)؛ ستون state صفر یعنی خانه خالی
+KEY_COLUMNS = (
+    ('src', 'I'), ('dst', 'I'), ('sport', 'H'), ('dport', 'H'), ('proto', 'B'),
+)
+SIZE_BIN_EDGES = (1, 128, 1024)  # 0 | 1-127 | 128-1023 | >=1024 بایت payload
+VALUE_COLUMNS = (
+    ('state', 'B'),
+    ('packets_fwd', 'I'), ('packets_rev', 'I'),
+    ('bytes_fwd', 'Q'), ('bytes_rev', 'Q'),
+    ('first_seen', 'd'), ('last_seen', 'd'),
+    ('iat_mean', 'd'), ('iat_m2', 'd'),
+) + tuple((f'size_bin{i}', 'I') for i in range(len(SIZE_BIN_EDGES) + 1))
+COLUMNS = KEY_COLUMNS + VALUE_COLUMNS
+EXPORT_COLUMNS = tuple(c for c in COLUMNS if c[0] != 'state')
+
+
+def _empty_columns(columns, size=0):
+    return {name: array(code, bytes(size * array(code).itemsize)) for name, code in columns}
+
+
+def bytes_per_slot():
+    return sum(array(code).itemsize for _, code in COLUMNS)
+
+
+class FlowTable:
+    """جدول جریان با ستون‌های array و آدرس‌دهی باز
+
+    کلید به جهت اولین بسته ذخیره می‌شود (src = شروع‌کننده)؛ بسته‌های جهت مخالف در
+    ستون‌های *_rev شمرده می‌شوند. جریان‌های منقضی‌شده در self.exported جمع می‌شوند.
+    """
+
+    def __init__(self, capacity=1 << 16, max_capacity=1 << 25, idle_timeout=120.0,
+                 max_load=0.7):
+        size = 1
+        while size < capacity:
+            size <<= 1
+        self.max_capacity = max_capacity
+        self.idle_timeout = idle_timeout
+        self.max_load = max_load
+        self._allocate(size)
+        self.exported = _empty_columns(EXPORT_COLUMNS)
+        self.expired = 0
+        self.dropped = 0
+        self._sweep_cursor = 0
+
+    def _allocate(self, size):
+        self.capacity = size
+        self.mask = size - 1
+        self.count = 0
+        self.columns = _empty_columns(COLUMNS, size)
+        for name, column in self.columns.items():
+            setattr(self, '_' + name, column)
+
+    @staticmethod
+    def _home(src, dst, sport, dport, proto):
+        h = (((src ^ dst) * 0x9E3779B1) ^ ((sport ^ dport) * 0x85EBCA6B) ^ proto) & 0xFFFFFFFF
+        return h ^ (h >> 16)
+
+    def memory_bytes(self):
+        return sum(len(c) * c.itemsize for c in self.columns.values())
+
+    def __len__(self):
+        return self.count
+
+    # ─── جستجو و درج ───
+
+    def find(self, src, dst, sport, dport, proto):
+        """(slot, forward) یا (-1, None) اگر جریان وجود ندارد"""
+        state, s_src, s_dst = self._state, self._src, self._dst
+        s_sport, s_dport, s_proto = self._sport, self._dport, self._proto
+        mask = self.mask
+        i = self._home(src, dst, sport, dport, proto) & mask
+        while state[i]:
+            if s_proto[i] == proto:
+                if s_src[i] == src and s_dst[i] == dst and s_sport[i] == sport and s_dport[i] == dport:
+                    return i, True
+                if s_src[i] == dst and s_dst[i] == src and s_sport[i] == dport and s_dport[i] == sport:
+                    return i, False
+            i = (i + 1) & mask
+        return -1, None
+
+    def _insert(self, src, dst, sport, dport, proto):
+        if self.count + 1 > self.capacity * self.max_load:
+            if self.capacity * 2 > self.max_capacity:
+                return -1
+            self._resize(self.capacity * 2)
+        state, mask = self._state, self.mask
+        i = self._home(src, dst, sport, dport, proto) & mask
+        while state[i]:
+            i = (i + 1) & mask
+        state[i] = 1
+        self._src[i], self._dst[i] = src, dst
+        self._sport[i], self._dport[i], self._proto[i] = sport, dport, proto
+        self.count += 1
+        return i
+
+    def _resize(self, size):
+        old = self.columns
+        occupied = [i for i, used in enumerate(old['state']) if used]
+        self._allocate(size)
+        for i in occupied:
+            j = self._insert(old['src'][i], old['dst'][i], old['sport'][i],
+                             old['dport'][i], old['proto'][i])
+            for name, column in self.columns.items():
+                column[j] = old[name][i]
+
+    def update(self, timestamp, src, dst, sport, dport, proto, payload_length):
+        """ثبت یک بسته؛ شماره خانه جریان یا -1 اگر جدول پر است"""
+        i, forward = self.find(src, dst, sport, dport, proto)
+        if i >= 0 and timestamp - self._last_seen[i] > self.idle_timeout:
+            self._export(i)
+            self._delete(i)
+            i = -1
+        if i < 0:
+            i = self._insert(src, dst, sport, dport, proto)
+            if i < 0:
+                self.dropped += 1
+                return -1
+            forward = True
+            self._first_seen[i] = self._last_seen[i] = timestamp
+        else:
+            # فاصله بین بسته‌ها با الگوریتم Welford (بدون نگه‌داری نمونه‌ها)
+            n = self._packets_fwd[i] + self._packets_rev[i]
+            iat = timestamp - self._last_seen[i]
+            mean = self._iat_mean[i]
+            delta = iat - mean
+            mean += delta / n
+            self._iat_mean[i] = mean
+            self._iat_m2[i] += delta * (iat - mean)
+            self._last_seen[i] = timestamp
+
+        if forward:
+            self._packets_fwd[i] += 1
+            self._bytes_fwd[i] += payload_length
+        else:
+            self._packets_rev[i] += 1
+            self._bytes_rev[i] += payload_length
+        column = getattr(self, f'_size_bin{bisect_right(SIZE_BIN_EDGES, payload_length)}')
+        column[i] += 1
+        return i
+
+    # ─── حذف و انقضا ───
+
+    def _delete(self, i):
+        """حذف با جابه‌جایی رو به عقب (بدون tombstone)"""
+        state, mask, columns = self._state, self.mask, self.columns.values()
+        state[i] = 0
+        self.count -= 1
+        j = i
+        while True:
+            j = (j + 1) & mask
+            if not state[j]:
+                break
+            home = self._home(self._src[j], self._dst[j], self._sport[j],
+                              self._dport[j], self._proto[j]) & mask
+            # آیا j می‌تواند به i منتقل شود (home خارج از بازه چرخشی (i, j])
+            if (i < j and (home <= i or home > j)) or (i > j and home <= i and home > j):
+                for column in columns:
+                    column[i] = column[j]
+                state[j] = 0
+                i = j
+        for name, column in self.columns.items():
+            if name != 'state':
+                column[i] = 0
+
+    def _export(self, i):
+        exported = self.exported
+        for name, _ in EXPORT_COLUMNS:
+            exported[name].append(self.columns[name][i])
+        self.expired += 1
+
+    def expire(self, now, budget=65536):
+        """پیمایش تدریجی budget خانه و صدور جریان‌های بی‌فعالیت"""
+        state, last_seen, mask = self._state, self._last_seen, self.mask
+        deadline = now - self.idle_timeout
+        i = self._sweep_cursor & mask
+        scanned, limit = 0, min(budget, self.capacity)
+        while scanned < limit:
+            if state[i] and last_seen[i] < deadline:
+                self._export(i)
+                self._delete(i)
+                # پس از جابه‌جایی، خانه i ممکن است جریان دیگری داشته باشد
+                continue
+            i = (i + 1) & mask
+            scanned += 1
+        self._sweep_cursor = i
+
+    # ─── خروجی ستونی برای طبقه‌بند ───
+
+    def snapshot(self):
+        """ستون‌های جریان‌های فعال (کپی فشرده بدون خانه‌های خالی)"""
+        occupied = [i for i, used in enumerate(self._state) if used]
+        return {
+            name: array(code, [self.columns[name][i] for i in occupied])
+            for name, code in EXPORT_COLUMNS
+        }
+
+    def drain(self):
+        """جریان‌های منقضی‌شده از آخرین فراخوانی"""
+        exported, self.exported = self.exported, _empty_columns(EXPORT_COLUMNS)
+        return exported
+
+    def all_flows(self):
+        """جریان‌های منقضی‌شده به‌علاوه جریان‌های فعال"""
+        flows = self.drain()
+        for name, column in self.snapshot().items():
+            flows[name].extend(column)
+        return flows
+
+    def stats(self):
+        return {
+            'flows': self.count,
+            'capacity': self.capacity,
+            'memory_bytes': self.memory_bytes(),
+            'bytes_per_slot': bytes_per_slot(),
+            'expired': self.expired,
+            'dropped': self.dropped,
+        }
+
+
+def concat_flows(parts):
+    """ادغام ستون‌های جریان چند بخش"""
+    merged = _empty_columns(EXPORT_COLUMNS)
+    for part in parts:
+        for name, column in part.items():
+            merged[name].extend(column)
+    return merged
+
+
+def flow_rows(flows):
+    """پیمایش سطری ستون‌ها به شکل dict (برای گزارش)"""
+    names = [name for name, _ in EXPORT_COLUMNS]
+    for values in zip(*(flows[name] for name in names)):
+        yield dict(zip(names, values))
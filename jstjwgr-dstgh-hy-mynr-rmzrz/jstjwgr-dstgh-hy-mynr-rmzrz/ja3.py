@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+محاسبه اثر انگشت JA3/JA3S از بایت‌های خام ClientHello و ServerHello
+هش‌ها با نمایه‌ای از کلاینت‌های شناخته‌شده ماینر (XMRig، T-Rex و ...) در بخش ja3
+بسته امضا مقایسه می‌شوند؛ جستجو یک دسترسی dict است و اثر انگشت‌های ناشناخته برای
+تکمیل بسته امضا شمرده می‌شوند.
+"""
+
+import hashlib
+import struct
+import threading
+
+from signature_pack import get_signature_store
+
+HANDSHAKE = 0x16
+CLIENT_HELLO = 1
+SERVER_HELLO = 2
+EXT_SUPPORTED_GROUPS = 10
+EXT_EC_POINT_FORMATS = 11
+
+_U16 = struct.Struct('!H')
+
+
+class TlsParseError(ValueError):
+    """پیام handshake ناقص یا نامعتبر"""
+
+
+def is_grease(value):
+    """مقادیر GREASE (RFC 8701) در JA3 نادیده گرفته می‌شوند"""
+    return (value & 0x0F0F) == 0x0A0A and (value >> 8) == (value & 0xFF)
+
+
+def handshake_message(data):
+    """(نوع، بدنه) اولین پیام handshake، با اتصال قطعه‌های چند رکورد TLS"""
+    fragments = bytearray()
+    offset = 0
+    needed = None
+    while offset + 5 <= len(data):
+        if data[offset] != HANDSHAKE:
+            break
+        length = _U16.unpack_from(data, offset + 3)[0]
+        fragments += data[offset + 5:offset + 5 + length]
+        offset += 5 + length
+        if needed is None and len(fragments) >= 4:
+            needed = 4 + int.from_bytes(fragments[1:4], 'big')
+        if needed is not None and len(fragments) >= needed:
+            return fragments[0], bytes(fragments[4:needed])
+    raise TlsParseError('incomplete handshake message')
+
+
+def _u16_list(data, offset, length):
+    return [v for (v,) in struct.iter_unpack('!H', data[offset:offset + length])]
+
+
+def _extensions(body, offset):
+    """[(type, data)] از بخش extensions"""
+    extensions = []
+    if offset + 2 > len(body):
+        return extensions
+    end = offset + 2 + _U16.unpack_from(body, offset)[0]
+    offset += 2
+    while offset + 4 <= end:
+        ext_type, ext_length = struct.unpack_from('!HH', body, offset)
+        extensions.append((ext_type, body[offset + 4:offset + 4 + ext_length]))
+        offset += 4 + ext_length
+    return extensions
+
+
+def _join(values):
+    return '-'.join(str(v) for v in values if not is_grease(v))
+
+
+def ja3_client_string(body):
+    """رشته JA3: version,ciphers,extensions,groups,point_formats"""
+    try:
+        version = _U16.unpack_from(body, 0)[0]
+        offset = 34
+        offset += 1 + body[offset]                              # session id
+        cipher_length = _U16.unpack_from(body, offset)[0]
+        ciphers = _u16_list(body, offset + 2, cipher_length)
+        offset += 2 + cipher_length
+        offset += 1 + body[offset]                              # compression
+    except (IndexError, struct.error):
+        raise TlsParseError('truncated ClientHello')
+
+    groups, point_formats, types = [], [], []
+    for ext_type, ext_data in _extensions(body, offset):
+        types.append(ext_type)
+        if ext_type == EXT_SUPPORTED_GROUPS and len(ext_data) >= 2:
+            groups = _u16_list(ext_data, 2, _U16.unpack_from(ext_data, 0)[0])
+        elif ext_type == EXT_EC_POINT_FORMATS and ext_data:
+            point_formats = list(ext_data[1:1 + ext_data[0]])
+    return ','.join((str(version), _join(ciphers), _join(types), _join(groups), _join(point_formats)))
+
+
+def ja3s_server_string(body):
+    """رشته JA3S: version,cipher,extensions"""
+    try:
+        version = _U16.unpack_from(body, 0)[0]
+        offset = 34
+        offset += 1 + body[offset]
+        cipher = _U16.unpack_from(body, offset)[0]
+        offset += 3                                             # cipher + compression
+    except (IndexError, struct.error):
+        raise TlsParseError('truncated ServerHello')
+    types = [ext_type for ext_type, _ in _extensions(body, offset)]
+    return ','.join((str(version), str(cipher), _join(types)))
+
+
+def fingerprint(data):
+    """(kind, رشته, هش MD5) برای رکورد(های) TLS؛ kind برابر 'ja3' یا 'ja3s'"""
+    message_type, body = handshake_message(data)
+    if message_type == CLIENT_HELLO:
+        kind, text = 'ja3', ja3_client_string(body)
+    elif message_type == SERVER_HELLO:
+        kind, text = 'ja3s', ja3s_server_string(body)
+    else:
+        raise TlsParseError(f'unexpected handshake type {message_type}')
+    return kind, text, hashlib.md5(text.encode()).hexdigest()
+
+
+class Ja3Matcher:
+    """تطبیق اثر انگشت با بسته امضا و شمارش موارد شناخته‌شده و ناشناخته
+
+    نمونه قابل فراخوانی است و مستقیماً به عنوان tls_handler به StreamAnalyzer داده می‌شود.
+    """
+
+    def __init__(self, signatures=None, max_unknown=10000):
+        self.signatures = signatures or get_signature_store()
+        self.max_unknown = max_unknown
+        self.handshakes = 0
+        self.errors = 0
+        self.matched = {}
+        self.unknown = {}
+        self.unknown_overflow = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, data, is_client=True):
+        try:
+            kind, text, digest = fingerprint(data)
+        except TlsParseError:
+            with self._lock:
+                self.errors += 1
+            return None
+
+        pack = self.signatures.pack
+        index = pack.ja3_client if kind == 'ja3' else pack.ja3_server
+        label = index.get(digest)
+        with self._lock:
+            self.handshakes += 1
+            if label is not None:
+                self.matched[label] = self.matched.get(label, 0) + 1
+            elif (kind, digest) in self.unknown or len(self.unknown) < self.max_unknown:
+                self.unknown[(kind, digest)] = self.unknown.get((kind, digest), 0) + 1
+            else:
+                self.unknown_overflow += 1
+        return {kind: digest, f'{kind}_string': text, 'ja3_match': label}
+
+    def merge(self, stats):
+        """افزودن شمارنده‌های یک Ja3Matcher دیگر (خروجی stats) برای ادغام بخش‌ها"""
+        with self._lock:
+            self.handshakes += stats['handshakes']
+            self.errors += stats['errors']
+            self.unknown_overflow += stats['unknown_overflow']
+            for label, count in stats['matched'].items():
+                self.matched[label] = self.matched.get(label, 0) + count
+            for kind, digest, count in stats['unknown']:
+                self.unknown[(kind, digest)] = self.unknown.get((kind, digest), 0) + count
+
+    def stats(self, top=None):
+        """شمارنده‌ها؛ اثر انگشت‌های ناشناخته به ترتیب فراوانی"""
+        with self._lock:
+            unknown = sorted(self.unknown.items(), key=lambda item: (-item[1], item[0]))
+            if top is not None:
+                unknown = unknown[:top]
+            return {
+                'handshakes': self.handshakes,
+                'errors': self.errors,
+                'matched': dict(self.matched),
+                'unknown': [(kind, digest, count) for (kind, digest), count in unknown],
+                'unknown_distinct': len(self.unknown),
+                'unknown_overflow': self.unknown_overflow,
+            }
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+کش جدول همسایه (ARP) برای یافتن آدرس MAC
+جدول در هر تیک یک‌بار خوانده می‌شود (/proc/net/arp در لینوکس و یک اجرای arp -a در
+سایر سیستم‌ها) و بر اساس IP نمایه می‌شود؛ جستجوی MAC یک دسترسی dict است. جدول به
+صورت تنبل تازه می‌شود: وقتی از max_age قدیمی‌تر باشد، یا وقتی IP پیدا نشود و از آخرین
+خواندن حداقل miss_refresh ثانیه گذشته باشد (پس از ping میزبان‌های جدید اضافه می‌شوند).
+"""
+
+import logging
+import os
+import re
+import subprocess
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+PROC_ARP = '/proc/net/arp'
+ATF_COM = 0x2   # ورودی کامل (MAC معتبر)
+
+_ARP_LINE = re.compile(
+    r'(\d{1,3}(?:\.\d{1,3}){3})\)?\s+(?:at\s+)?([0-9A-Fa-f]{1,2}(?:[:-][0-9A-Fa-f]{1,2}){5})\b'
+)
+
+
+def normalize_mac(mac):
+    """قالب یکسان aa:bb:cc:dd:ee:ff (arp در macOS صفرهای ابتدایی را حذف می‌کند)"""
+    return ':'.join(part.zfill(2) for part in re.split('[:-]', mac)).lower()
+
+
+def read_proc_arp(path=PROC_ARP):
+    """{ip: mac} از /proc/net/arp؛ ورودی‌های ناقص کنار گذاشته می‌شوند"""
+    table = {}
+    with open(path, 'r') as f:
+        next(f, None)
+        for line in f:
+            fields = line.split()
+            if len(fields) < 4:
+                continue
+            ip, _, flags, mac = fields[:4]
+            if int(flags, 16) & ATF_COM and mac != '00:00:00:00:00:00':
+                table[ip] = mac.lower()
+    return table
+
+
+def parse_arp_output(text):
+    """{ip: mac} از خروجی arp -a در ویندوز، لینوکس یا macOS"""
+    table = {}
+    for ip, mac in _ARP_LINE.findall(text):
+        mac = normalize_mac(mac)
+        if mac not in ('00:00:00:00:00:00', 'ff:ff:ff:ff:ff:ff'):
+            table[ip] = mac
+    return table
+
+
+class NeighborCache:
+    """جدول IP -> MAC مشترک بین همه detectorها"""
+
+    def __init__(self, max_age=30.0, miss_refresh=1.0, proc_path=PROC_ARP):
+        self.max_age = max_age
+        self.miss_refresh = miss_refresh
+        self.proc_path = proc_path
+        self._table = {}
+        self._loaded_at = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self.refreshes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _read(self):
+        if os.path.exists(self.proc_path):
+            return read_proc_arp(self.proc_path)
+        result = subprocess.run(['arp', '-a'], capture_output=True, text=True, timeout=10)
+        return parse_arp_output(result.stdout)
+
+    def refresh(self):
+        """خواندن دوباره جدول (یک خواندن فایل یا یک فرایند)"""
+        try:
+            table = self._read()
+        except (OSError, subprocess.SubprocessError) as e:
+            logger.warning("خواندن جدول ARP ناموفق بود: %s", e)
+            table = None
+        with self._lock:
+            if table is not None:
+                self._table = table
+            self._loaded_at = time.monotonic()
+            self.refreshes += 1
+
+    def _age(self):
+        return float('inf') if self._loaded_at is None else time.monotonic() - self._loaded_at
+
+    def lookup(self, ip):
+        """MAC آدرس ip یا None"""
+        with self._lock:
+            stale = self._age() > self.max_age
+        if stale:
+            self._refresh_once(self.max_age)
+        mac = self._table.get(ip)
+        if mac is None:
+            # میزبانی که تازه ping شده ممکن است پس از آخرین خواندن به جدول اضافه شده باشد
+            self._refresh_once(self.miss_refresh)
+            mac = self._table.get(ip)
+        with self._lock:
+            if mac is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return mac
+
+    def _refresh_once(self, min_age):
+        # چند نخ هم‌زمان فقط یک‌بار جدول را می‌خوانند؛ بقیه منتظر نتیجه همان خواندن می‌مانند
+        with self._refresh_lock:
+            if self._age() <= min_age:
+                return
+            self.refresh()
+
+    def lookup_many(self, ips):
+        """{ip: mac} برای فهرست IPها"""
+        return {ip: self.lookup(ip) for ip in ips}
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._table),
+                'age_seconds': None if self._loaded_at is None else round(self._age(), 3),
+                'refreshes': self.refreshes,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_neighbor_cache():
+    """نمونه مشترک NeighborCache برای همه detectorها"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = NeighborCache()
+    return _cache
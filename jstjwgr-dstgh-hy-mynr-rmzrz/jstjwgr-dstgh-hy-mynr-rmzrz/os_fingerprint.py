@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+اثر انگشت غیرفعال سیستم‌عامل از داده‌های مرحله کشف
+پاسخ ping مرحله کشف TTL و زمان رفت‌وبرگشت را دارد و اولین اتصال موفق پویش پورت
+پنجره، MSS، ضریب مقیاس پنجره و گزینه‌های SYN-ACK را (از TCP_INFO در لینوکس). این
+داده‌ها در رکورد میزبان (HostProbe) نگه داشته می‌شوند و دسته‌بند بدون ارسال هیچ بسته
+اضافه‌ای روی آن‌ها اجرا می‌شود.
+"""
+
+import platform
+import re
+import socket
+import struct
+import subprocess
+
+# مقادیر اولیه رایج TTL؛ TTL دریافتی به نزدیک‌ترین مقدار بزرگ‌تر یا مساوی گرد می‌شود
+INITIAL_TTLS = (32, 64, 128, 255)
+
+# بیت‌های tcpi_options در linux/tcp.h
+TCPI_OPT_TIMESTAMPS = 1
+TCPI_OPT_SACK = 2
+TCPI_OPT_WSCALE = 4
+TCPI_OPT_ECN = 8
+
+_TCP_INFO = getattr(socket, 'TCP_INFO', None)
+_TCPI_SND_MSS = 16
+_TCPI_SND_WND = 228   # از کرنل 5.19 به بعد
+
+_PING_TTL = re.compile(r'ttl[=:]\s*(\d+)', re.IGNORECASE)
+_PING_TIME = re.compile(r'time\s*[=<]\s*([\d.]+)\s*ms', re.IGNORECASE)
+_WINDOWS = platform.system() == 'Windows'
+
+
+class HostProbe:
+    """داده‌های مرحله کشف یک میزبان"""
+
+    __slots__ = ('ip', 'alive', 'ttl', 'rtt_ms', 'window', 'mss', 'wscale', 'options')
+
+    def __init__(self, ip, alive=False, ttl=None, rtt_ms=None):
+        self.ip = ip
+        self.alive = alive
+        self.ttl = ttl
+        self.rtt_ms = rtt_ms
+        self.window = None
+        self.mss = None
+        self.wscale = None
+        self.options = None
+
+    def record_handshake(self, sock, port=None):
+        """ثبت مشخصات SYN-ACK از اولین اتصال موفق (برای on_connect در scan_ports)"""
+        if self.options is None:
+            info = handshake_info(sock)
+            if info is not None:
+                self.window, self.mss, self.wscale, self.options = info
+
+    def to_dict(self):
+        return {
+            'ttl': self.ttl,
+            'rtt_ms': self.rtt_ms,
+            'window': self.window,
+            'mss': self.mss,
+            'wscale': self.wscale,
+            'options': sorted(self.options) if self.options is not None else None,
+        }
+
+
+def parse_ping_output(text):
+    """(TTL، زمان بر حسب میلی‌ثانیه) از خروجی ping ویندوز، لینوکس یا macOS"""
+    ttl = _PING_TTL.search(text)
+    rtt = _PING_TIME.search(text)
+    return (int(ttl.group(1)) if ttl else None,
+            float(rtt.group(1)) if rtt else None)
+
+
+def ping(ip, timeout=1.0):
+    """یک ping با پرچم‌های مناسب سیستم‌عامل؛ HostProbe با TTL پاسخ"""
+    if _WINDOWS:
+        command = ['ping', '-n', '1', '-w', str(int(timeout * 1000)), ip]
+    else:
+        command = ['ping', '-c', '1', '-W', str(max(1, round(timeout))), ip]
+    try:
+        result = subprocess.run(command, capture_output=True, text=True, timeout=timeout + 2)
+    except (OSError, subprocess.SubprocessError):
+        return HostProbe(ip)
+    ttl, rtt_ms = parse_ping_output(result.stdout)
+    # پاسخ «Destination host unreachable» از روتر در ویندوز کد خروج صفر دارد اما TTL ندارد
+    return HostProbe(ip, result.returncode == 0 and ttl is not None, ttl, rtt_ms)
+
+
+def handshake_info(sock):
+    """(پنجره، MSS، ضریب مقیاس، گزینه‌ها) سمت مقابل از TCP_INFO یا None"""
+    if _TCP_INFO is None:
+        return None
+    try:
+        info = sock.getsockopt(socket.IPPROTO_TCP, _TCP_INFO, 256)
+    except OSError:
+        return None
+    if len(info) < _TCPI_SND_MSS + 4:
+        return None
+    flags = info[5]
+    options = set()
+    if flags & TCPI_OPT_TIMESTAMPS:
+        options.add('timestamps')
+    if flags & TCPI_OPT_SACK:
+        options.add('sack')
+    if flags & TCPI_OPT_ECN:
+        options.add('ecn')
+    wscale = info[6] & 0x0F if flags & TCPI_OPT_WSCALE else None
+    mss = struct.unpack_from('=I', info, _TCPI_SND_MSS)[0]
+    window = struct.unpack_from('=I', info, _TCPI_SND_WND)[0] if len(info) >= _TCPI_SND_WND + 4 else None
+    return window, mss, wscale, options
+
+
+def initial_ttl(ttl):
+    """(TTL اولیه تخمینی، تعداد hop)"""
+    for initial in INITIAL_TTLS:
+        if ttl <= initial:
+            return initial, initial - ttl
+    return 255, 0
+
+
+def classify(probe):
+    """دسته‌بندی سیستم‌عامل از TTL و مشخصات SYN-ACK بدون ارسال بسته
+
+    خروجی: {'os', 'initial_ttl', 'hops', 'confidence', 'evidence'}
+    """
+    result = {'os': 'Unknown', 'initial_ttl': None, 'hops': None, 'confidence': 0.0, 'evidence': []}
+    if probe is None or probe.ttl is None:
+        return result
+    initial, hops = initial_ttl(probe.ttl)
+    result.update(initial_ttl=initial, hops=hops, confidence=0.5)
+    result['evidence'].append(f'ttl {probe.ttl} (initial {initial})')
+
+    if initial == 255:
+        result['os'] = 'Network Device'
+    elif initial == 128:
+        result['os'] = 'Windows'
+    elif initial == 64:
+        result['os'] = 'Linux/Unix'
+    else:
+        result['os'] = 'Embedded'
+
+    options = probe.options
+    if options is None:
+        return result
+    timestamps = 'timestamps' in options
+    result['evidence'].append(
+        f"window {probe.window} wscale {probe.wscale} mss {probe.mss} options {','.join(sorted(options)) or '-'}")
+    if initial == 128:
+        # ویندوز به‌طور پیش‌فرض timestamp را در SYN-ACK نمی‌فرستد و wscale آن 8 است
+        if not timestamps and probe.wscale == 8:
+            result['confidence'] = 0.8
+    elif initial == 64:
+        if probe.window == 65535 and probe.wscale == 6 and timestamps:
+            result['os'] = 'BSD/macOS'
+            result['confidence'] = 0.7
+        elif timestamps and probe.wscale is not None and probe.wscale >= 7:
+            result['confidence'] = 0.8
+        elif timestamps:
+            # کرنل‌های قدیمی یا کم‌حافظه (بردهای کنترل ASIC) ضریب مقیاس کوچک‌تری دارند
+            result['os'] = 'Linux (embedded)'
+            result['confidence'] = 0.6
+    return result
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+نمایه پیشوند OUI برای یافتن سازنده از روی آدرس MAC
+فهرست رسمی IEEE (oui.txt یا oui.csv و در صورت وجود mam.csv و oui36.csv) فقط در اولین
+جستجو خوانده می‌شود. هر پیشوند 24، 28 یا 36 بیتی به صورت عدد در یک dict نگه داشته
+می‌شود و نام سازنده‌ها یک‌بار ذخیره می‌شوند؛ جستجو یک دسترسی dict به ازای هر طول
+پیشوند است. برای جستجوی دسته‌ای، آرایه‌های مرتب NumPy و searchsorted استفاده می‌شود.
+
+مسیر فایل‌ها با متغیر محیطی MINER_OUI_FILE (چند مسیر با جداکننده os.pathsep) قابل تغییر
+است؛ در نبود فایل نمایه خالی می‌ماند و فقط یک هشدار ثبت می‌شود.
+"""
+
+import csv
+import logging
+import os
+import re
+import threading
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+if np is not None:
+    # جدول نویسه -> مقدار هگز (255 برای نویسه نامعتبر) و جایگاه رقم‌ها در aa:bb:cc:dd:ee:ff
+    _NIBBLE = np.full(256, 255, dtype=np.uint8)
+    for _value, _chars in enumerate(zip('0123456789abcdef', '0123456789ABCDEF')):
+        _NIBBLE[[ord(c) for c in _chars]] = _value
+    _HEX_COLUMNS = np.array([0, 1, 3, 4, 6, 7, 9, 10, 12, 13, 15, 16])
+    _NIBBLE_SHIFTS = np.arange(44, -1, -4, dtype=np.int64)
+
+logger = logging.getLogger(__name__)
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUI_PATHS = [
+    os.path.join(_HERE, 'oui.csv'),
+    os.path.join(_HERE, 'oui.txt'),
+    os.path.join(_HERE, 'mam.csv'),
+    os.path.join(_HERE, 'oui36.csv'),
+    '/usr/share/ieee-data/oui.csv',
+    '/usr/share/ieee-data/mam.csv',
+    '/usr/share/ieee-data/oui36.csv',
+]
+
+# طول پیشوند (بیت) بر اساس تعداد رقم هگز در ستون Assignment فایل CSV
+_PREFIX_BITS = {6: 24, 7: 28, 9: 36}
+_TXT_LINE = re.compile(r'^\s*([0-9A-Fa-f]{2})-([0-9A-Fa-f]{2})-([0-9A-Fa-f]{2})\s+\(hex\)\s+(.+?)\s*$')
+_LOCALLY_ADMINISTERED = 0x02 << 40
+_NON_HEX = re.compile('[^0-9A-Fa-f]')
+
+
+def mac_to_int(mac):
+    """آدرس MAC (با : یا - یا بدون جداکننده) به عدد 48 بیتی یا None"""
+    if not mac:
+        return None
+    digits = _NON_HEX.sub('', mac)
+    return int(digits, 16) if len(digits) == 12 else None
+
+
+def default_paths():
+    """مسیرهای فایل IEEE؛ MINER_OUI_FILE بر مسیرهای پیش‌فرض مقدم است"""
+    configured = os.environ.get('MINER_OUI_FILE')
+    if configured:
+        return [p for p in configured.split(os.pathsep) if p]
+    return DEFAULT_OUI_PATHS
+
+
+def iter_ieee_file(path):
+    """(بیت‌های پیشوند، مقدار پیشوند، نام سازنده) از فایل CSV یا TXT رسمی IEEE"""
+    with open(path, 'r', encoding='utf-8', errors='replace', newline='') as f:
+        if path.lower().endswith('.csv'):
+            reader = csv.reader(f)
+            next(reader, None)  # Registry,Assignment,Organization Name,Organization Address
+            for row in reader:
+                if len(row) < 3:
+                    continue
+                assignment = row[1].strip()
+                bits = _PREFIX_BITS.get(len(assignment))
+                if bits is None:
+                    continue
+                try:
+                    yield bits, int(assignment, 16), row[2].strip()
+                except ValueError:
+                    continue
+        else:
+            for line in f:
+                match = _TXT_LINE.match(line)
+                if match:
+                    yield 24, int(''.join(match.group(1, 2, 3)), 16), match.group(4)
+
+
+def _macs_to_array(macs):
+    """آرایه int64 از MACها (-1 برای نامعتبر)؛ قالب 17 نویسه‌ای یکجا تبدیل می‌شود"""
+    fixed = [i for i, mac in enumerate(macs) if isinstance(mac, str) and len(mac) == 17]
+    values = np.full(len(macs), -1, dtype=np.int64)
+    if fixed:
+        raw = np.frombuffer(''.join(macs[i] for i in fixed).encode('latin-1', 'replace'),
+                            dtype=np.uint8).reshape(-1, 17)
+        nibbles = _NIBBLE[raw[:, _HEX_COLUMNS]].astype(np.int64)
+        parsed = (nibbles << _NIBBLE_SHIFTS).sum(axis=1)
+        parsed[(nibbles > 15).any(axis=1)] = -1
+        values[fixed] = parsed
+    for i, mac in enumerate(macs):
+        if mac and (not isinstance(mac, str) or len(mac) != 17):
+            values[i] = mac_to_int(mac) or -1
+    return values
+
+
+class OuiIndex:
+    """نمایه پیشوند -> سازنده با بارگذاری تنبل"""
+
+    def __init__(self, paths=None):
+        self.paths = list(paths) if paths is not None else default_paths()
+        self._prefixes = {}   # بیت‌ها -> {پیشوند: شماره سازنده}
+        self._vendors = []
+        self._arrays = None
+        self._loaded = False
+        self._lock = threading.Lock()
+        self.sources = []
+        self.load_time_ms = 0.0
+        self.lookups = 0
+        self.hits = 0
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self._load()
+                    self._loaded = True
+
+    def _load(self):
+        started = time.perf_counter()
+        vendor_ids = {}
+        for path in self.paths:
+            if not os.path.exists(path):
+                continue
+            try:
+                for bits, prefix, vendor in iter_ieee_file(path):
+                    vendor_id = vendor_ids.get(vendor)
+                    if vendor_id is None:
+                        vendor_id = vendor_ids[vendor] = len(self._vendors)
+                        self._vendors.append(vendor)
+                    self._prefixes.setdefault(bits, {})[prefix] = vendor_id
+                self.sources.append(path)
+            except OSError as e:
+                logger.warning("خواندن فایل OUI %s ناموفق بود: %s", path, e)
+        self.load_time_ms = (time.perf_counter() - started) * 1000
+        if not self.sources:
+            logger.warning("فایل OUI در %s یافت نشد؛ شناسایی سازنده غیرفعال است",
+                           os.pathsep.join(self.paths))
+        else:
+            logger.info("نمایه OUI با %d پیشوند در %.1fms بارگذاری شد", len(self), self.load_time_ms)
+
+    def __len__(self):
+        return sum(len(table) for table in self._prefixes.values())
+
+    def lookup(self, mac):
+        """نام سازنده MAC یا None؛ طولانی‌ترین پیشوند (MA-S، MA-M، MA-L) اولویت دارد"""
+        self._ensure_loaded()
+        self.lookups += 1
+        value = mac_to_int(mac)
+        if value is None or value & _LOCALLY_ADMINISTERED:
+            return None
+        for bits in (36, 28, 24):
+            table = self._prefixes.get(bits)
+            if table:
+                vendor_id = table.get(value >> (48 - bits))
+                if vendor_id is not None:
+                    self.hits += 1
+                    return self._vendors[vendor_id]
+        return None
+
+    def _sorted_arrays(self):
+        if self._arrays is None:
+            arrays = []
+            for bits in sorted(self._prefixes, reverse=True):
+                table = self._prefixes[bits]
+                keys = np.fromiter(table.keys(), dtype=np.int64, count=len(table))
+                ids = np.fromiter(table.values(), dtype=np.int64, count=len(table))
+                order = np.argsort(keys)
+                arrays.append((bits, keys[order], ids[order]))
+            self._arrays = arrays
+        return self._arrays
+
+    def lookup_many(self, macs):
+        """فهرست نام سازنده (یا None) هم‌ترتیب با macs"""
+        self._ensure_loaded()
+        macs = list(macs)
+        if np is None or not self._prefixes:
+            return [self.lookup(mac) for mac in macs]
+
+        values = _macs_to_array(macs)
+        valid = (values >= 0) & ((values & _LOCALLY_ADMINISTERED) == 0)
+        result = np.full(len(macs), -1, dtype=np.int64)
+        for bits, keys, ids in self._sorted_arrays():
+            pending = valid & (result < 0)
+            if not pending.any():
+                break
+            prefixes = values >> (48 - bits)
+            position = np.minimum(np.searchsorted(keys, prefixes), len(keys) - 1)
+            found = pending & (keys[position] == prefixes)
+            result[found] = ids[position[found]]
+
+        self.lookups += len(macs)
+        self.hits += int((result >= 0).sum())
+        return [self._vendors[i] if i >= 0 else None for i in result.tolist()]
+
+    def stats(self):
+        return {
+            'loaded': self._loaded,
+            'sources': self.sources,
+            'prefixes': len(self),
+            'vendors': len(self._vendors),
+            'load_time_ms': round(self.load_time_ms, 3),
+            'lookups': self.lookups,
+            'hits': self.hits,
+        }
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_oui_index():
+    """نمونه مشترک OuiIndex برای همه detectorها"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = OuiIndex()
+    return _index
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+خواننده PCAP/PCAPNG بدون کپی
+فایل با mmap نگاشت می‌شود و رکوردها با struct.unpack_from روی memoryview پیمایش
+می‌شوند؛ برای هر بسته فقط یک tuple فشرده ساخته می‌شود و payload کپی نمی‌شود.
+"""
+
+import mmap
+import struct
+
+# انواع لایه پیوند پشتیبانی‌شده
+LINKTYPE_NULL = 0
+LINKTYPE_ETHERNET = 1
+LINKTYPE_RAW = 101
+LINKTYPE_LINUX_SLL = 113
+LINKTYPE_IPV4 = 228
+LINKTYPE_LINUX_SLL2 = 276
+
+PCAP_MAGIC_US = 0xA1B2C3D4
+PCAP_MAGIC_NS = 0xA1B23C4D
+PCAPNG_SHB = 0x0A0D0D0A
+PCAPNG_BYTE_ORDER = 0x1A2B3C4D
+PCAPNG_IDB = 1
+PCAPNG_SPB = 3
+PCAPNG_EPB = 6
+
+ETH_P_IP = 0x0800
+ETH_P_8021Q = 0x8100
+ETH_P_8021AD = 0x88A8
+
+PROTO_TCP = 6
+PROTO_UDP = 17
+
+# فیلدهای tuple خروجی packets()
+PACKET_FIELDS = (
+    'timestamp', 'src', 'dst', 'proto', 'sport', 'dport',
+    'tcp_flags', 'seq', 'l4_offset', 'payload_offset', 'payload_end',
+)
+
+_IPV4 = struct.Struct('!BxHxxHxBxxII')
+_PORTS = struct.Struct('!HH')
+_TCP = struct.Struct('!HHIxxxxBB')
+_U16 = struct.Struct('!H')
+
+
+def flow_hash(src, dst, sport, dport):
+    """هش متقارن 5-tuple؛ هر دو جهت یک جریان مقدار یکسان دارند"""
+    return (((src ^ dst) * 0x9E3779B1) ^ ((sport ^ dport) * 0x85EBCA6B)) & 0xFFFFFFFF
+
+
+class PcapError(ValueError):
+    """فایل ضبط نامعتبر یا پشتیبانی‌نشده"""
+
+
+class PcapReader:
+    """پیمایش رکوردهای PCAP یا PCAPNG روی فایل نگاشت‌شده در حافظه
+
+    records() موقعیت خام رکوردها را برمی‌گرداند و packets() سرآیندهای IPv4/TCP/UDP
+    را تجزیه می‌کند. آفست‌ها نسبت به self.view هستند.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._file = open(self.path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise PcapError(f'{self.path}: empty capture file')
+        self.view = memoryview(self._map)
+        self.size = len(self._map)
+        if self.size < 24:
+            self.close()
+            raise PcapError(f'{self.path}: truncated header')
+
+        magic_le = struct.unpack_from('<I', self.view, 0)[0]
+        magic_be = struct.unpack_from('>I', self.view, 0)[0]
+        self.is_pcapng = magic_le == PCAPNG_SHB
+        if self.is_pcapng:
+            bom = struct.unpack_from('<I', self.view, 8)[0]
+            self.endian = '<' if bom == PCAPNG_BYTE_ORDER else '>'
+            self.linktype = None
+        else:
+            if magic_le in (PCAP_MAGIC_US, PCAP_MAGIC_NS):
+                self.endian, magic = '<', magic_le
+            elif magic_be in (PCAP_MAGIC_US, PCAP_MAGIC_NS):
+                self.endian, magic = '>', magic_be
+            else:
+                self.close()
+                raise PcapError(f'{self.path}: unknown capture format (magic {magic_le:#x})')
+            self.ts_scale = 1e-9 if magic == PCAP_MAGIC_NS else 1e-6
+            self.linktype = struct.unpack_from(self.endian + 'I', self.view, 20)[0]
+        self.truncated = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        view = getattr(self, 'view', None)
+        if view is not None:
+            view.release()
+            self.view = None
+        if getattr(self, '_map', None) is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    # ─── رکوردهای خام ───
+
+    def records(self):
+        """(timestamp, linktype, offset, caplen, origlen) برای هر رکورد"""
+        if self.is_pcapng:
+            yield from self._pcapng_records()
+            return
+
+        view, size, linktype, scale = self.view, self.size, self.linktype, self.ts_scale
+        header = struct.Struct(self.endian + 'IIII')
+        unpack_from = header.unpack_from
+        offset = 24
+        while offset + 16 <= size:
+            ts_sec, ts_frac, caplen, origlen = unpack_from(view, offset)
+            offset += 16
+            if offset + caplen > size:
+                self.truncated = True
+                break
+            yield ts_sec + ts_frac * scale, linktype, offset, caplen, origlen
+            offset += caplen
+
+    def _pcapng_records(self):
+        view, size, endian = self.view, self.size, self.endian
+        block_header = struct.Struct(endian + 'II')
+        epb = struct.Struct(endian + 'IIIII')
+        u32 = struct.Struct(endian + 'I')
+        option = struct.Struct(endian + 'HH')
+        interfaces = []  # (linktype, ثانیه به ازای هر واحد زمان)
+        offset = 0
+        while offset + 12 <= size:
+            block_type, block_length = block_header.unpack_from(view, offset)
+            if block_length < 12 or offset + block_length > size:
+                self.truncated = True
+                break
+            body = offset + 8
+
+            if block_type == PCAPNG_EPB:
+                interface_id, ts_high, ts_low, caplen, origlen = epb.unpack_from(view, body)
+                if interface_id >= len(interfaces):
+                    # رابط تعریف‌نشده (یا EPB پیش از IDB) یعنی فایل خراب است
+                    self.truncated = True
+                    break
+                linktype, resolution = interfaces[interface_id]
+                yield (((ts_high << 32) | ts_low) * resolution, linktype,
+                       body + 20, caplen, origlen)
+            elif block_type == PCAPNG_SPB:
+                origlen = u32.unpack_from(view, body)[0]
+                caplen = min(origlen, block_length - 16)
+                linktype = interfaces[0][0] if interfaces else LINKTYPE_ETHERNET
+                yield 0.0, linktype, body + 4, caplen, origlen
+            elif block_type == PCAPNG_IDB:
+                linktype = struct.unpack_from(endian + 'H', view, body)[0]
+                resolution = 1e-6
+                # گزینه‌ها پس از linktype، رزرو و snaplen (۸ بایت) شروع می‌شوند
+                opt = body + 8
+                end = offset + block_length - 4
+                while opt + 4 <= end:
+                    code, length = option.unpack_from(view, opt)
+                    if code == 0:
+                        break
+                    if code == 9 and length >= 1:  # if_tsresol
+                        value = view[opt + 4]
+                        resolution = 2.0 ** -(value & 0x7F) if value & 0x80 else 10.0 ** -value
+                    opt += 4 + ((length + 3) & ~3)
+                interfaces.append((linktype, resolution))
+            elif block_type == PCAPNG_SHB:
+                # بخش جدید: فهرست رابط‌ها از نو ساخته می‌شود
+                interfaces = []
+            offset += block_length
+
+    # ─── سرآیندهای بسته ───
+
+    def packets(self, protocols=(PROTO_TCP, PROTO_UDP), shard=None):
+        """tuple فشرده برای هر بسته IPv4 غیرقطعه‌ای (ترتیب فیلدها در PACKET_FIELDS)
+
+        برای UDP مقدار tcp_flags و seq صفر است. آدرس‌ها عدد صحیح ۳۲ بیتی‌اند.
+        با shard=(index, count) فقط بسته‌هایی برگردانده می‌شوند که flow_hash آن‌ها
+        به این بخش تعلق دارد (هر دو جهت جریان در یک بخش می‌مانند).
+        """
+        shard_index, shard_count = shard or (0, 1)
+        view = self.view
+        ipv4_unpack = _IPV4.unpack_from
+        tcp_unpack = _TCP.unpack_from
+        ports_unpack = _PORTS.unpack_from
+        u16_unpack = _U16.unpack_from
+        for timestamp, linktype, offset, caplen, _ in self.records():
+            end = offset + caplen
+            if linktype == LINKTYPE_ETHERNET:
+                if caplen < 34:
+                    continue
+                ethertype = u16_unpack(view, offset + 12)[0]
+                ip = offset + 14
+                while ethertype in (ETH_P_8021Q, ETH_P_8021AD) and ip + 4 <= end:
+                    ethertype = u16_unpack(view, ip + 2)[0]
+                    ip += 4
+                if ethertype != ETH_P_IP:
+                    continue
+            elif linktype in (LINKTYPE_RAW, LINKTYPE_IPV4):
+                ip = offset
+            elif linktype == LINKTYPE_LINUX_SLL:
+                if u16_unpack(view, offset + 14)[0] != ETH_P_IP:
+                    continue
+                ip = offset + 16
+            elif linktype == LINKTYPE_LINUX_SLL2:
+                if u16_unpack(view, offset)[0] != ETH_P_IP:
+                    continue
+                ip = offset + 20
+            elif linktype == LINKTYPE_NULL:
+                if view[offset] not in (2, 0) or view[offset + 3] not in (2, 0):
+                    continue
+                ip = offset + 4
+            else:
+                continue
+
+            if ip + 20 > end:
+                continue
+            version_ihl, total_length, frag, proto, src, dst = ipv4_unpack(view, ip)
+            if version_ihl >> 4 != 4 or frag & 0x1FFF or proto not in protocols:
+                continue
+            l4 = ip + (version_ihl & 0x0F) * 4
+            ip_end = min(end, ip + total_length) if total_length else end
+
+            if proto == PROTO_TCP:
+                if l4 + 20 > ip_end:
+                    continue
+                sport, dport, seq, data_offset, flags = tcp_unpack(view, l4)
+                payload = l4 + (data_offset >> 4) * 4
+            elif proto == PROTO_UDP:
+                if l4 + 8 > ip_end:
+                    continue
+                sport, dport = ports_unpack(view, l4)
+                seq = flags = 0
+                payload = l4 + 8
+            else:
+                sport = dport = seq = flags = 0
+                payload = l4
+            if shard_count > 1 and (
+                (((src ^ dst) * 0x9E3779B1) ^ ((sport ^ dport) * 0x85EBCA6B)) & 0xFFFFFFFF
+            ) % shard_count != shard_index:
+                continue
+            yield (timestamp, src, dst, proto, sport, dport, flags, seq,
+                   l4, payload, max(payload, ip_end))
+
+
+def replay(path, analyzer, shard=None):
+    """ارسال قطعه‌های TCP یک فایل ضبط (یا یک بخش آن) به StreamAnalyzer"""
+    with PcapReader(path) as reader:
+        view = reader.view
+        for (timestamp, src, dst, proto, sport, dport, flags, seq,
+             _, payload, payload_end) in reader.packets((PROTO_TCP,), shard):
+            analyzer.feed_tcp(timestamp, src, sport, dst, dport, seq, flags,
+                              view[payload:payload_end])
+        truncated = reader.truncated
+    return truncated
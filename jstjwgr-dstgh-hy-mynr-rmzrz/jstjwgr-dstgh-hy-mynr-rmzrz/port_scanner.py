@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+پویش پورت TCP با اتصال غیرمسدود و selectors
+به جای یک نخ برای هر پورت، همه اتصال‌های یک میزبان در یک نخ با selectors پیگیری
+می‌شوند. تعداد سوکت‌های باز هم‌زمان با یک بودجه سراسری (semaphore) بین همه میزبان‌هایی
+که موازی پویش می‌شوند تقسیم می‌شود تا از سقف descriptorها و صف SYN عبور نکنیم.
+"""
+
+import errno
+import selectors
+import socket
+import threading
+import time
+from collections import deque
+
+# کدهای «در حال اتصال» در لینوکس و ویندوز (WSAEWOULDBLOCK = 10035)
+_IN_PROGRESS = {errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EALREADY, 10035}
+
+
+class SocketBudget:
+    """سقف سراسری سوکت‌های باز هم‌زمان"""
+
+    def __init__(self, limit=256):
+        self.limit = limit
+        self._semaphore = threading.BoundedSemaphore(limit)
+        self._lock = threading.Lock()
+        self.in_use = 0
+        self.peak = 0
+        self.connects = 0
+
+    def acquire(self, blocking=True):
+        if not self._semaphore.acquire(blocking):
+            return False
+        with self._lock:
+            self.in_use += 1
+            self.connects += 1
+            self.peak = max(self.peak, self.in_use)
+        return True
+
+    def release(self):
+        with self._lock:
+            self.in_use -= 1
+        self._semaphore.release()
+
+    def stats(self):
+        with self._lock:
+            return {'limit': self.limit, 'in_use': self.in_use, 'peak': self.peak,
+                    'connects': self.connects}
+
+
+def scan_ports(ip, ports, timeout=1.0, budget=None, on_connect=None):
+    """پورت‌های باز ip (مرتب)؛ هر اتصال حداکثر timeout ثانیه فرصت دارد
+
+    تا جایی که بودجه اجازه دهد اتصال جدید باز می‌شود؛ فقط وقتی هیچ اتصالی در جریان
+    نیست برای گرفتن سهم از بودجه منتظر می‌ماند، پس میزبان‌ها یکدیگر را قفل نمی‌کنند.
+    on_connect(sock, port) پیش از بستن هر اتصال موفق فراخوانی می‌شود (مثلاً برای
+    خواندن مشخصات SYN-ACK).
+    """
+    budget = budget or get_socket_budget()
+    family = socket.AF_INET6 if ':' in ip else socket.AF_INET
+    queue = deque(ports)
+    found = []
+    selector = selectors.DefaultSelector()
+
+    def close(sock):
+        selector.unregister(sock)
+        sock.close()
+        budget.release()
+
+    try:
+        while queue or selector.get_map():
+            while queue and budget.acquire(blocking=not selector.get_map()):
+                port = queue.popleft()
+                try:
+                    sock = socket.socket(family, socket.SOCK_STREAM)
+                except OSError:
+                    # مثلاً EMFILE؛ سهم بودجه نباید از دست برود
+                    budget.release()
+                    raise
+                sock.setblocking(False)
+                try:
+                    result = sock.connect_ex((ip, port))
+                except OSError as e:
+                    result = e.errno
+                if result == 0:
+                    found.append(port)
+                    # سوکت ثبت نشده است، پس finally پایینی آن را نمی‌بندد
+                    try:
+                        if on_connect:
+                            on_connect(sock, port)
+                    finally:
+                        sock.close()
+                        budget.release()
+                elif result in _IN_PROGRESS:
+                    selector.register(sock, selectors.EVENT_WRITE, (port, time.monotonic() + timeout))
+                else:
+                    sock.close()
+                    budget.release()
+
+            pending = list(selector.get_map().values())
+            if not pending:
+                continue
+            now = time.monotonic()
+            nearest = min(key.data[1] for key in pending)
+            for key, _ in selector.select(max(0.0, nearest - now)):
+                sock = key.fileobj
+                if sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR) == 0:
+                    found.append(key.data[0])
+                    if on_connect:
+                        on_connect(sock, key.data[0])
+                close(sock)
+            now = time.monotonic()
+            for key in list(selector.get_map().values()):
+                if key.data[1] <= now:
+                    close(key.fileobj)
+    finally:
+        for key in list(selector.get_map().values()):
+            close(key.fileobj)
+        selector.close()
+    return sorted(found)
+
+
+_budget = None
+_budget_lock = threading.Lock()
+
+
+def get_socket_budget(limit=256):
+    """بودجه مشترک سوکت برای همه detectorها"""
+    global _budget
+    if _budget is None:
+        with _budget_lock:
+            if _budget is None:
+                _budget = SocketBudget(limit)
+    return _budget
@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ناظر رویدادمحور فرآیندها
+رویدادهای fork/exec/exit از proc connector لینوکس (netlink) خوانده می‌شوند و در
+نبود دسترسی، فهرست /proc (یا psutil.pids در سایر سیستم‌عامل‌ها) با حالت قبلی
+مقایسه می‌شود. جدول فرآیندها به‌صورت افزایشی نگهداری می‌شود و فقط PIDهای
+جدید یا تغییرکرده دوباره بررسی می‌شوند.
+"""
+
+import errno
+import logging
+import os
+import socket
+import struct
+import threading
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+# ثابت‌های netlink / proc connector از linux/connector.h و linux/cn_proc.h
+NETLINK_CONNECTOR = 11
+CN_IDX_PROC = 1
+CN_VAL_PROC = 1
+PROC_CN_MCAST_LISTEN = 1
+NLMSG_DONE = 3
+
+PROC_EVENT_FORK = 0x00000001
+PROC_EVENT_EXEC = 0x00000002
+PROC_EVENT_COMM = 0x00000200
+PROC_EVENT_EXIT = 0x80000000
+
+_NLMSGHDR = struct.Struct('=IHHII')
+_CN_MSG = struct.Struct('=IIIIHH')
+_PROC_EVENT = struct.Struct('=IIQ')
+_EVENT_PIDS = struct.Struct('=II')
+_FORK_PIDS = struct.Struct('=IIII')
+
+PROC_ROOT = '/proc'
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+class ProcessRecord:
+    """اطلاعات ثابت یک فرآیند در زمان بررسی"""
+
+    __slots__ = ('pid', 'ppid', 'name', 'cmdline', 'start_time', 'rss_bytes', 'generation')
+
+    def __init__(self, pid, ppid, name, cmdline, start_time, rss_bytes, generation=0):
+        self.pid = pid
+        self.ppid = ppid
+        self.name = name
+        self.cmdline = cmdline
+        self.start_time = start_time
+        self.rss_bytes = rss_bytes
+        self.generation = generation
+
+    @property
+    def memory_mb(self):
+        return self.rss_bytes / 1024 / 1024
+
+    def to_dict(self):
+        return {
+            'pid': self.pid,
+            'ppid': self.ppid,
+            'name': self.name,
+            'cmdline': self.cmdline,
+            'start_time': self.start_time,
+            'memory_mb': self.memory_mb,
+        }
+
+
+class ProcessWatcher:
+    """جدول افزایشی فرآیندها با خوراک رویداد از proc connector یا مقایسه /proc"""
+
+    def __init__(self, use_connector=True, max_log=100000):
+        self.table = {}
+        self.generation = 0
+        self.max_log = max_log
+        self.mode = 'psutil'
+        self._log = []
+        self._log_start = 0
+        self._lock = threading.Lock()
+        self._sock = None
+        self._thread = None
+        self._primed = False
+
+        if os.path.isdir(PROC_ROOT) and os.path.exists(os.path.join(PROC_ROOT, 'self', 'stat')):
+            self.mode = 'procfs'
+            if use_connector:
+                self._open_connector()
+
+    def _open_connector(self):
+        """اشتراک در رویدادهای proc connector (نیازمند CAP_NET_ADMIN)"""
+        try:
+            sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, NETLINK_CONNECTOR)
+            sock.bind((os.getpid(), CN_IDX_PROC))
+            op = struct.pack('=I', PROC_CN_MCAST_LISTEN)
+            cn_msg = _CN_MSG.pack(CN_IDX_PROC, CN_VAL_PROC, 0, 0, len(op), 0) + op
+            header = _NLMSGHDR.pack(_NLMSGHDR.size + len(cn_msg), NLMSG_DONE, 0, 0, os.getpid())
+            sock.send(header + cn_msg)
+        except (AttributeError, OSError) as e:
+            logger.info(f"proc connector در دسترس نیست، مقایسه /proc استفاده می‌شود: {e}")
+            return
+        self._sock = sock
+        self.mode = 'connector'
+
+    def start(self):
+        """رشته پس‌زمینه برای دریافت فوری رویدادها تا ماینرهای کوتاه‌عمر از دست نروند"""
+        if self._sock is None or self._thread is not None:
+            return
+        self._prime()
+
+        def listen():
+            buf = bytearray(65536)
+            while self._sock is not None:
+                try:
+                    size = self._sock.recv_into(buf)
+                    pids, exits = self._parse_events(memoryview(buf)[:size])
+                except OSError as e:
+                    if self._sock is None:
+                        break  # stop()
+                    if e.errno == errno.ENOBUFS:
+                        # سرریز صف netlink (مثلاً هنگام fork انبوه)؛ رویدادها از دست رفته‌اند
+                        logger.warning("سرریز صف proc connector، جدول از /proc بازسازی می‌شود")
+                        self._rescan()
+                        continue
+                    self._fall_back(e)
+                    break
+                except Exception as e:
+                    self._fall_back(e)
+                    break
+                with self._lock:
+                    for pid in exits:
+                        self._remove(pid)
+                    for pid in pids:
+                        self._inspect_into_table(pid)
+
+        self._thread = threading.Thread(target=listen, name='process-watcher', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        sock, self._sock = self._sock, None
+        if sock is not None:
+            sock.close()
+
+    def _fall_back(self, error):
+        """کنار گذاشتن proc connector؛ refresh از این پس /proc را مقایسه می‌کند"""
+        logger.error(f"خطا در proc connector، بازگشت به مقایسه /proc: {error}")
+        self.stop()
+        self.mode = 'procfs'
+        self._thread = None
+
+    def _parse_events(self, data):
+        """استخراج PIDهای تغییرکرده و خارج‌شده از پیام‌های netlink"""
+        changed, exits = set(), set()
+        offset = 0
+        while offset + _NLMSGHDR.size <= len(data):
+            msg_len = _NLMSGHDR.unpack_from(data, offset)[0]
+            if msg_len < _NLMSGHDR.size or offset + msg_len > len(data):
+                break
+            end = offset + msg_len
+            body = offset + _NLMSGHDR.size + _CN_MSG.size
+            event = body + _PROC_EVENT.size
+            if event > end:
+                # پیام کوتاه‌تر از سرآیند رویداد (مثلاً پاسخ اشتراک) است
+                offset += (msg_len + 3) & ~3
+                continue
+            what = _PROC_EVENT.unpack_from(data, body)[0]
+            size = _FORK_PIDS.size if what == PROC_EVENT_FORK else _EVENT_PIDS.size
+            if event + size > end:
+                offset += (msg_len + 3) & ~3
+                continue
+            if what == PROC_EVENT_FORK:
+                child_pid, child_tgid = _FORK_PIDS.unpack_from(data, event)[2:]
+                if child_pid == child_tgid:
+                    changed.add(child_tgid)
+            elif what in (PROC_EVENT_EXEC, PROC_EVENT_COMM):
+                changed.add(_EVENT_PIDS.unpack_from(data, event)[1])
+            elif what == PROC_EVENT_EXIT:
+                pid, tgid = _EVENT_PIDS.unpack_from(data, event)
+                if pid == tgid:
+                    exits.add(tgid)
+                    changed.discard(tgid)
+            offset += (msg_len + 3) & ~3
+        return changed, exits
+
+    def _drain_connector(self):
+        """خواندن غیرمسدودکننده رویدادهای صف‌شده"""
+        buf = bytearray(65536)
+        changed, exits = set(), set()
+        while True:
+            try:
+                size = self._sock.recv_into(buf, 0, socket.MSG_DONTWAIT)
+            except BlockingIOError:
+                break
+            except OSError as e:
+                if e.errno == errno.ENOBUFS:
+                    logger.warning("سرریز صف proc connector، جدول از /proc بازسازی می‌شود")
+                    self._rescan()
+                    continue
+                self._fall_back(e)
+                return None
+            pids, gone = self._parse_events(memoryview(buf)[:size])
+            changed -= gone
+            changed |= pids
+            exits |= gone
+        return changed, exits
+
+    def _list_pids(self):
+        if self.mode == 'psutil':
+            return set(psutil.pids()) if psutil else set()
+        return {int(entry) for entry in os.listdir(PROC_ROOT) if entry.isdigit()}
+
+    def _snapshot(self):
+        """{pid: (زمان شروع، نام)} همه فرآیندها؛ exec زیر همان PID نام را عوض می‌کند"""
+        if self.mode == 'psutil':
+            if not psutil:
+                return {}
+            return {proc.pid: (proc.info['create_time'], proc.info['name'])
+                    for proc in psutil.process_iter(['create_time', 'name'])}
+        snapshot = {}
+        for entry in os.listdir(PROC_ROOT):
+            if entry.isdigit():
+                stat = _read_stat(entry)
+                if stat is not None:
+                    snapshot[int(entry)] = (int(stat[1][19]), stat[0])
+        return snapshot
+
+    def _inspect(self, pid):
+        """خواندن اطلاعات یک PID؛ None اگر فرآیند دیگر وجود ندارد"""
+        if self.mode == 'psutil':
+            try:
+                proc = psutil.Process(pid)
+                with proc.oneshot():
+                    return ProcessRecord(
+                        pid, proc.ppid(), proc.name(), ' '.join(proc.cmdline()),
+                        proc.create_time(), proc.memory_info().rss
+                    )
+            except (psutil.Error, AttributeError):
+                return None
+
+        try:
+            stat = _read_stat(pid)
+            if stat is None:
+                return None
+            name, fields = stat
+            with open(f'{PROC_ROOT}/{pid}/cmdline', 'rb') as f:
+                cmdline = f.read().replace(b'\0', b' ').decode('utf-8', errors='ignore').strip()
+        except OSError:
+            return None
+        # fields از فیلد سوم stat شروع می‌شود: ppid=4، starttime=22، rss=24
+        return ProcessRecord(
+            pid, int(fields[1]), name, cmdline, int(fields[19]), int(fields[21]) * PAGE_SIZE
+        )
+
+    def _inspect_into_table(self, pid):
+        record = self._inspect(pid)
+        if record is None:
+            self._remove(pid)
+            return
+        old = self.table.get(pid)
+        if (old is not None and old.start_time == record.start_time and
+                old.name == record.name and old.cmdline == record.cmdline):
+            old.rss_bytes = record.rss_bytes
+            return
+        self.generation += 1
+        record.generation = self.generation
+        self.table[pid] = record
+        self._append_log(pid)
+
+    def _remove(self, pid):
+        if self.table.pop(pid, None) is not None:
+            self.generation += 1
+            self._append_log(pid)
+
+    def _append_log(self, pid):
+        self._log.append(pid)
+        if len(self._log) > self.max_log:
+            drop = len(self._log) - self.max_log // 2
+            del self._log[:drop]
+            self._log_start += drop
+
+    def _prime(self):
+        with self._lock:
+            if not self._primed:
+                for pid in self._list_pids():
+                    self._inspect_into_table(pid)
+                self._primed = True
+
+    def refresh(self):
+        """به‌روزرسانی جدول؛ فقط PIDهای جدید، خارج‌شده یا تغییرکرده بررسی می‌شوند"""
+        if not self._primed:
+            self._prime()
+            return
+
+        if self._thread is not None:
+            # رشته پس‌زمینه جدول را به‌روز نگه می‌دارد
+            return
+
+        if self._sock is not None:
+            events = self._drain_connector()
+            if events is not None:
+                changed, exits = events
+                with self._lock:
+                    for pid in exits:
+                        self._remove(pid)
+                    for pid in changed:
+                        self._inspect_into_table(pid)
+                return
+
+        self._rescan()
+
+    def _rescan(self):
+        """مقایسه کامل /proc با جدول"""
+        # بدون رویداد exec، تغییر زمان شروع یا نام (comm) نشانه فرآیند جدید زیر همان PID است
+        current = self._snapshot()
+        with self._lock:
+            for pid in set(self.table) - current.keys():
+                self._remove(pid)
+            for pid, identity in current.items():
+                old = self.table.get(pid)
+                if old is None or (old.start_time, old.name) != identity:
+                    self._inspect_into_table(pid)
+
+    def changes_since(self, cursor):
+        """تغییرات پس از cursor به شکل (cursor جدید، رکوردهای جدید/تغییرکرده، PIDهای حذف‌شده)
+
+        اگر cursor قدیمی‌تر از گزارش نگهداری‌شده باشد، کل جدول برگردانده می‌شود
+        و مصرف‌کننده باید حالت خود را از نو بسازد (removed برابر None).
+        """
+        self.refresh()
+        with self._lock:
+            end = self._log_start + len(self._log)
+            if cursor is None or cursor < self._log_start:
+                return end, list(self.table.values()), None
+
+            updated, removed = {}, set()
+            for pid in self._log[cursor - self._log_start:]:
+                record = self.table.get(pid)
+                if record is None:
+                    updated.pop(pid, None)
+                    removed.add(pid)
+                else:
+                    updated[pid] = record
+                    removed.discard(pid)
+            return end, list(updated.values()), removed
+
+    def get(self, pid):
+        return self.table.get(pid)
+
+    def __len__(self):
+        return len(self.table)
+
+
+def _read_stat(pid):
+    """خواندن /proc/[pid]/stat به شکل (نام، فیلدها از state به بعد)"""
+    try:
+        with open(f'{PROC_ROOT}/{pid}/stat', 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+    # نام فرآیند داخل پرانتز است و ممکن است خودش فاصله یا پرانتز داشته باشد
+    start = data.find(b'(')
+    end = data.rfind(b')')
+    if start < 0 or end < 0:
+        return None
+    return data[start + 1:end].decode('utf-8', errors='ignore'), data[end + 2:].split()
+
+
+_watcher = None
+_watcher_lock = threading.Lock()
+
+
+def get_process_watcher():
+    """نمونه مشترک ProcessWatcher برای همه detectorها"""
+    global _watcher
+    if _watcher is None:
+        with _watcher_lock:
+            if _watcher is None:
+                _watcher = ProcessWatcher()
+                _watcher.start()
+    return _watcher
@@ -0,0 +1,539 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+حل‌کننده ناهمگام DNS معکوس (PTR) برای نام میزبان‌ها
+به جای gethostbyaddr (فراخوانی مسدودکننده libc با timeout چندثانیه‌ای) پرس‌وجوهای PTR
+مستقیماً با UDP به resolver تنظیم‌شده فرستاده می‌شوند: چندصد پرس‌وجوی هم‌زمان روی یک
+سوکت، با timeout کوتاه و تلاش مجدد محدود. پاسخ مثبت به اندازه TTL رکورد و پاسخ منفی
+(NXDOMAIN یا بدون رکورد) به اندازه حداقل SOA طبق RFC 2308 کش می‌شود؛ timeout و
+SERVFAIL مدت کوتاه‌تری کش می‌شوند.
+
+resolver از متغیر محیطی MINER_DNS_SERVER (به شکل host یا host:port) یا اولین
+nameserver در /etc/resolv.conf خوانده می‌شود. اگر هیچ‌کدام نباشد (مثلاً ویندوز)،
+gethostbyaddr در یک استخر نخ با همان timeout کوتاه اجرا می‌شود.
+"""
+
+import argparse
+import asyncio
+import ipaddress
+import json
+import logging
+import os
+import random
+import socket
+import struct
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+DNS_PORT = 53
+TYPE_CNAME = 5
+TYPE_SOA = 6
+TYPE_PTR = 12
+CLASS_IN = 1
+FLAG_QR = 0x8000
+FLAG_RD = 0x0100
+RCODE_NOERROR = 0
+RCODE_SERVFAIL = 2
+RCODE_NXDOMAIN = 3
+
+_HEADER = struct.Struct('!HHHHHH')
+_RR = struct.Struct('!HHIH')
+_QUESTION = struct.Struct('!HH')
+
+
+class DnsError(ValueError):
+    """پاسخ DNS ناقص یا نامعتبر"""
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# کدگذاری و تجزیه پیام DNS
+# ─────────────────────────────────────────────────────────────────────────────
+def ptr_name(ip):
+    """نام in-addr.arpa یا ip6.arpa برای IP"""
+    return ipaddress.ip_address(ip).reverse_pointer
+
+
+def encode_name(name):
+    out = bytearray()
+    for label in name.rstrip('.').split('.'):
+        raw = label.encode('idna') if label else b''
+        if not 0 < len(raw) < 64:
+            raise DnsError(f'invalid label in {name}')
+        out.append(len(raw))
+        out += raw
+    out.append(0)
+    return bytes(out)
+
+
+def encode_query(query_id, name, qtype=TYPE_PTR):
+    """پرس‌وجوی استاندارد با RD (بازگشتی)"""
+    return (_HEADER.pack(query_id, FLAG_RD, 1, 0, 0, 0)
+            + encode_name(name) + _QUESTION.pack(qtype, CLASS_IN))
+
+
+def decode_name(data, offset):
+    """(نام، offset بعد از نام) با پشتیبانی از اشاره‌گر فشرده‌سازی"""
+    labels = []
+    end = None
+    jumps = 0
+    while True:
+        if offset >= len(data):
+            raise DnsError('name runs past end of message')
+        length = data[offset]
+        if length & 0xC0 == 0xC0:
+            if offset + 1 >= len(data):
+                raise DnsError('truncated compression pointer')
+            if end is None:
+                end = offset + 2
+            jumps += 1
+            if jumps > 32:
+                raise DnsError('compression loop')
+            offset = ((length & 0x3F) << 8) | data[offset + 1]
+            continue
+        if length & 0xC0:
+            raise DnsError('unsupported label type')
+        offset += 1
+        if length == 0:
+            break
+        labels.append(data[offset:offset + length].decode('ascii', errors='replace'))
+        offset += length
+    return '.'.join(labels), (end if end is not None else offset)
+
+
+def decode_response(data):
+    """(id، rcode، نام پرسش، رکوردهای پاسخ، رکوردهای authority)
+
+    هر رکورد به شکل (نام، نوع، TTL، داده) است؛ داده PTR و CNAME نام مقصد و داده SOA
+    تاپل (TTL رکورد، minimum) است.
+    """
+    if len(data) < _HEADER.size:
+        raise DnsError('short header')
+    query_id, flags, qdcount, ancount, nscount, _ = _HEADER.unpack_from(data)
+    if not flags & FLAG_QR:
+        raise DnsError('not a response')
+    offset = _HEADER.size
+    question = None
+    for _ in range(qdcount):
+        name, offset = decode_name(data, offset)
+        question = question if question is not None else name
+        offset += _QUESTION.size
+
+    sections = ([], [])
+    for section, count in zip(sections, (ancount, nscount)):
+        for _ in range(count):
+            name, offset = decode_name(data, offset)
+            if offset + _RR.size > len(data):
+                raise DnsError('truncated record')
+            rtype, _, ttl, rdlength = _RR.unpack_from(data, offset)
+            offset += _RR.size
+            rdata_end = offset + rdlength
+            if rdata_end > len(data):
+                raise DnsError('truncated rdata')
+            if rtype in (TYPE_PTR, TYPE_CNAME):
+                value = decode_name(data, offset)[0]
+            elif rtype == TYPE_SOA:
+                _, position = decode_name(data, offset)
+                _, position = decode_name(data, position)
+                value = (ttl, struct.unpack_from('!I', data, position + 16)[0])
+            else:
+                value = None
+            section.append((name, rtype, ttl, value))
+            offset = rdata_end
+    return query_id, flags & 0xF, question, sections[0], sections[1]
+
+
+def encode_response(query, answers=(), rcode=RCODE_NOERROR, soa=None):
+    """پاسخ به پرس‌وجوی query (برای سرور آزمایشی)؛ answers فهرست (نام مقصد، TTL)"""
+    query_id, _, _, _, _, _ = _HEADER.unpack_from(query)
+    _, question_end = decode_name(query, _HEADER.size)
+    question = query[_HEADER.size:question_end + _QUESTION.size]
+    body = bytearray()
+    for target, ttl in answers:
+        rdata = encode_name(target)
+        body += b'\xc0\x0c' + _RR.pack(TYPE_PTR, CLASS_IN, ttl, len(rdata)) + rdata
+    authority = 0
+    if soa is not None:
+        ttl, minimum = soa
+        rdata = (encode_name('ns.invalid') + encode_name('hostmaster.invalid')
+                 + struct.pack('!IIIII', 1, 3600, 600, 86400, minimum))
+        body += b'\xc0\x0c' + _RR.pack(TYPE_SOA, CLASS_IN, ttl, len(rdata)) + rdata
+        authority = 1
+    flags = FLAG_QR | FLAG_RD | 0x0080 | rcode
+    return _HEADER.pack(query_id, flags, 1, len(answers), authority, 0) + question + bytes(body)
+
+
+def parse_server(text):
+    """(host، port) از host یا host:port (IPv6 بدون پورت)"""
+    if text.count(':') == 1:
+        host, _, port = text.partition(':')
+        return host, int(port)
+    return text, DNS_PORT
+
+
+def system_nameserver(path='/etc/resolv.conf'):
+    """(host، port) از MINER_DNS_SERVER یا اولین nameserver در resolv.conf؛ در غیر این صورت None"""
+    configured = os.environ.get('MINER_DNS_SERVER')
+    if configured:
+        return parse_server(configured)
+    try:
+        with open(path, 'r') as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) >= 2 and fields[0] == 'nameserver':
+                    return fields[1].split('%')[0], DNS_PORT
+    except OSError:
+        pass
+    return None
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# کلاینت UDP، کش و حل‌کننده
+# ─────────────────────────────────────────────────────────────────────────────
+class DnsClient(asyncio.DatagramProtocol):
+    """یک سوکت UDP برای همه پرس‌وجوها؛ پاسخ با شناسه و نام پرسش تطبیق داده می‌شود"""
+
+    def __init__(self, server):
+        self.server = server
+        self.transport = None
+        self.loop = None
+        self._pending = {}
+        self._random = random.SystemRandom()
+        self.sent = 0
+        self.received = 0
+        self.malformed = 0
+
+    async def open(self):
+        self.loop = asyncio.get_running_loop()
+        family = socket.AF_INET6 if ':' in self.server[0] else socket.AF_INET
+        await self.loop.create_datagram_endpoint(lambda: self, family=family)
+        return self
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        self.received += 1
+        if addr[0] != self.server[0]:
+            return
+        try:
+            response = decode_response(data)
+        except (DnsError, struct.error):
+            self.malformed += 1
+            return
+        pending = self._pending.get(response[0])
+        # شناسه تصادفی به‌تنهایی کافی نیست؛ نام پرسش هم باید یکسان باشد
+        if pending is None or (response[2] or '').lower() != pending[0]:
+            return
+        if not pending[1].done():
+            pending[1].set_result(response)
+
+    def error_received(self, exc):
+        logger.debug("DNS socket error: %s", exc)
+
+    async def query(self, name, timeout, retries):
+        """ارسال پرس‌وجوی PTR با تلاش مجدد؛ خروجی decode_response"""
+        query_id = self._random.getrandbits(16)
+        while query_id in self._pending:
+            query_id = self._random.getrandbits(16)
+        future = self.loop.create_future()
+        self._pending[query_id] = (name.lower(), future)
+        message = encode_query(query_id, name)
+        try:
+            for _ in range(retries + 1):
+                self.transport.sendto(message, self.server)
+                self.sent += 1
+                try:
+                    return await asyncio.wait_for(asyncio.shield(future), timeout)
+                except asyncio.TimeoutError:
+                    continue
+            raise asyncio.TimeoutError
+        finally:
+            del self._pending[query_id]
+
+    def close(self):
+        if self.transport is not None:
+            self.transport.close()
+            self.transport = None
+
+
+class HostnameCache:
+    """کش IP -> نام میزبان با TTL جداگانه برای هر ورودی و سقف اندازه (LRU)"""
+
+    def __init__(self, max_entries=100000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+
+    def get(self, ip):
+        """(True، نام) در صورت وجود مقدار معتبر؛ نام None یعنی نتیجه منفی کش‌شده"""
+        with self._lock:
+            entry = self._entries.get(ip)
+            if entry is not None:
+                expires_at, hostname = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(ip)
+                    if hostname is None:
+                        self.negative_hits += 1
+                    else:
+                        self.hits += 1
+                    return True, hostname
+                del self._entries[ip]
+            self.misses += 1
+            return False, None
+
+    def put(self, ip, hostname, ttl):
+        with self._lock:
+            self._entries[ip] = (time.monotonic() + ttl, hostname)
+            self._entries.move_to_end(ip)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class ReverseResolver:
+    """حل هم‌زمان PTR برای فهرست IPها با کش مثبت/منفی"""
+
+    def __init__(self, server=None, timeout=0.5, retries=1, concurrency=256,
+                 min_ttl=30, max_ttl=86400, negative_ttl=300, max_negative_ttl=3600,
+                 failure_ttl=30, max_entries=100000):
+        self.server = server if server is not None else system_nameserver()
+        self.timeout = timeout
+        self.retries = retries
+        self.concurrency = concurrency
+        self.min_ttl = min_ttl
+        self.max_ttl = max_ttl
+        self.negative_ttl = negative_ttl
+        self.max_negative_ttl = max_negative_ttl
+        self.failure_ttl = failure_ttl
+        self.cache = HostnameCache(max_entries)
+        self._executor = None
+        self._lock = threading.Lock()
+        self.counters = dict.fromkeys(
+            ('queries', 'answers', 'nxdomain', 'nodata', 'servfail', 'timeouts', 'errors'), 0)
+
+    def _count(self, key):
+        with self._lock:
+            self.counters[key] += 1
+
+    def _negative_ttl(self, authority):
+        # RFC 2308: مدت کش منفی = min(TTL رکورد SOA، فیلد minimum آن)
+        for _, rtype, _, value in authority:
+            if rtype == TYPE_SOA and value:
+                return min(min(value), self.max_negative_ttl)
+        return self.negative_ttl
+
+    async def _resolve_one(self, client, ip, semaphore):
+        try:
+            name = ptr_name(ip)
+        except ValueError:
+            return ip, None
+        self._count('queries')
+        async with semaphore:
+            try:
+                if client is None:
+                    return ip, await self._system_lookup(ip)
+                _, rcode, _, answers, authority = await client.query(name, self.timeout, self.retries)
+            except asyncio.TimeoutError:
+                self._count('timeouts')
+                self.cache.put(ip, None, self.failure_ttl)
+                return ip, None
+            except OSError as e:
+                logger.debug("PTR query for %s failed: %s", ip, e)
+                self._count('errors')
+                self.cache.put(ip, None, self.failure_ttl)
+                return ip, None
+
+        ptrs = [(value, ttl) for _, rtype, ttl, value in answers if rtype == TYPE_PTR and value]
+        if ptrs:
+            hostname, ttl = ptrs[0]
+            hostname = hostname.rstrip('.').lower()
+            self._count('answers')
+            self.cache.put(ip, hostname, min(max(ttl, self.min_ttl), self.max_ttl))
+            return ip, hostname
+        if rcode in (RCODE_NOERROR, RCODE_NXDOMAIN):
+            self._count('nxdomain' if rcode == RCODE_NXDOMAIN else 'nodata')
+            self.cache.put(ip, None, self._negative_ttl(authority))
+        else:
+            self._count('servfail')
+            self.cache.put(ip, None, self.failure_ttl)
+        return ip, None
+
+    async def _system_lookup(self, ip):
+        # بدون resolver مشخص: gethostbyaddr در استخر نخ؛ نخ‌های کند منتظر نمی‌مانند
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix='ptr')
+        loop = asyncio.get_running_loop()
+        try:
+            hostname = (await asyncio.wait_for(
+                loop.run_in_executor(self._executor, socket.gethostbyaddr, ip),
+                self.timeout * (self.retries + 1)))[0].lower()
+        except (socket.herror, socket.gaierror):
+            self._count('nxdomain')
+            self.cache.put(ip, None, self.negative_ttl)
+            return None
+        self._count('answers')
+        self.cache.put(ip, hostname, self.min_ttl * 10)
+        return hostname
+
+    async def resolve_many(self, ips):
+        """{ip: نام یا None} برای همه IPها؛ فقط IPهای خارج از کش پرسیده می‌شوند"""
+        results = {}
+        missing = []
+        for ip in dict.fromkeys(ips):
+            hit, hostname = self.cache.get(ip)
+            if hit:
+                results[ip] = hostname
+            else:
+                missing.append(ip)
+        if missing:
+            results.update(await self._query_many(missing))
+        return results
+
+    async def _query_many(self, ips):
+        client = None
+        if self.server is not None:
+            client = await DnsClient(self.server).open()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        try:
+            return dict(await asyncio.gather(
+                *(self._resolve_one(client, ip, semaphore) for ip in ips)))
+        finally:
+            if client is not None:
+                client.close()
+
+    async def resolve(self, ip):
+        return (await self.resolve_many([ip]))[ip]
+
+    def resolve_many_sync(self, ips):
+        """نسخه هم‌گام برای detectorهای غیرناهمگام"""
+        ips = list(ips)
+        if not ips:
+            return {}
+        return asyncio.run(self.resolve_many(ips))
+
+    def resolve_sync(self, ip):
+        hit, hostname = self.cache.get(ip)
+        if hit:
+            return hostname
+        return asyncio.run(self._query_many([ip]))[ip]
+
+    def stats(self):
+        stats = dict(self.counters)
+        stats['server'] = f'{self.server[0]}:{self.server[1]}' if self.server else 'system'
+        stats['cache'] = {
+            'entries': len(self.cache),
+            'hits': self.cache.hits,
+            'negative_hits': self.cache.negative_hits,
+            'misses': self.cache.misses,
+        }
+        return stats
+
+
+_resolver = None
+_resolver_lock = threading.Lock()
+
+
+def get_reverse_resolver():
+    """نمونه مشترک ReverseResolver تا کش بین اسکن‌ها حفظ شود"""
+    global _resolver
+    if _resolver is None:
+        with _resolver_lock:
+            if _resolver is None:
+                _resolver = ReverseResolver()
+    return _resolver
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# سرور DNS آزمایشی برای تست و سنجش کارایی
+# ─────────────────────────────────────────────────────────────────────────────
+class StubDnsServer(asyncio.DatagramProtocol):
+    """پاسخ PTR از روی جدول {ip: نام}؛ سایر IPها NXDOMAIN با SOA و IPهای silent بی‌پاسخ"""
+
+    def __init__(self, records, ttl=300, negative_ttl=120, silent=(), delay=0.0):
+        self.records = {ptr_name(ip): name for ip, name in records.items()}
+        self.silent = {ptr_name(ip) for ip in silent}
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.delay = delay
+        self.transport = None
+        self.queries = 0
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        self.queries += 1
+        try:
+            name, _ = decode_name(data, _HEADER.size)
+        except DnsError:
+            return
+        name = name.lower()
+        if name in self.silent:
+            return
+        if name in self.records:
+            response = encode_response(data, [(self.records[name], self.ttl)])
+        else:
+            response = encode_response(data, rcode=RCODE_NXDOMAIN,
+                                       soa=(self.negative_ttl, self.negative_ttl))
+        if self.delay:
+            asyncio.get_running_loop().call_later(self.delay, self.transport.sendto, response, addr)
+        else:
+            self.transport.sendto(response, addr)
+
+
+async def _benchmark(count, named, silent, port, delay):
+    loop = asyncio.get_running_loop()
+    ips = [f'10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}' for i in range(1, count + 1)]
+    records = {ip: f'miner-{i}.farm.example' for i, ip in enumerate(ips[:int(count * named)])}
+    quiet = ips[len(ips) - int(count * silent):] if silent else []
+    transport, server = await loop.create_datagram_endpoint(
+        lambda: StubDnsServer(records, silent=quiet, delay=delay), local_addr=('127.0.0.1', port))
+    resolver = ReverseResolver(server=('127.0.0.1', port), timeout=0.2)
+    try:
+        for label in ('cold', 'cached'):
+            started = time.perf_counter()
+            results = await resolver.resolve_many(ips)
+            elapsed = time.perf_counter() - started
+            print(f'{label}: {len(ips)} IPs in {elapsed:.3f}s, '
+                  f'{sum(1 for h in results.values() if h)} names')
+        print(json.dumps(resolver.stats()))
+    finally:
+        transport.close()
+
+
+def main():
+    p = argparse.ArgumentParser(description='Asynchronous reverse-DNS (PTR) resolver')
+    p.add_argument('ips', nargs='*', help='addresses to resolve')
+    p.add_argument('--server', help='resolver as host or host:port (default: system resolver)')
+    p.add_argument('--timeout', type=float, default=0.5)
+    p.add_argument('--emulate', type=int, metavar='N', help='benchmark N addresses against a local stub server')
+    p.add_argument('--named', type=float, default=0.1, help='fraction of emulated addresses with a PTR record')
+    p.add_argument('--silent', type=float, default=0.05, help='fraction of emulated queries left unanswered')
+    p.add_argument('--delay', type=float, default=0.002, help='emulated server latency in seconds')
+    p.add_argument('--port', type=int, default=15353)
+    args = p.parse_args()
+
+    if args.emulate:
+        asyncio.run(_benchmark(args.emulate, args.named, args.silent, args.port, args.delay))
+        return
+
+    server = parse_server(args.server) if args.server else None
+    resolver = ReverseResolver(server=server, timeout=args.timeout)
+    for ip, hostname in resolver.resolve_many_sync(args.ips).items():
+        print(json.dumps({'ip': ip, 'hostname': hostname}))
+    print(json.dumps(resolver.stats()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+اجرای گراف وابستگی گام‌های اسکن
+هر گام (جمع‌آورنده) با نام، تابع، وابستگی‌ها، مهلت و مقدار پیش‌فرض تعریف می‌شود. گام‌هایی
+که وابستگی‌هایشان تمام شده هم‌زمان در ThreadPoolExecutor اجرا می‌شوند و خروجی
+وابستگی‌ها به صورت آرگومان نام‌دار به آن‌ها داده می‌شود؛ بنابراین ورودی مشترک فقط یک‌بار
+محاسبه می‌شود. گامی که از مهلتش بگذرد یا خطا دهد مقدار پیش‌فرض می‌گیرد و بقیه گراف
+ادامه می‌یابد.
+"""
+
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+logger = logging.getLogger(__name__)
+
+
+class ScanGraphError(ValueError):
+    """گراف نامعتبر: وابستگی ناموجود، نام تکراری یا حلقه"""
+
+
+class ScanStep:
+    """یک گام گراف؛ func با خروجی وابستگی‌ها به صورت آرگومان نام‌دار فراخوانی می‌شود"""
+
+    __slots__ = ('name', 'func', 'deps', 'timeout', 'default', 'label')
+
+    def __init__(self, name, func, deps=(), timeout=None, default=None, label=None):
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+        self.timeout = timeout
+        self.default = default
+        self.label = label or name
+
+
+def validate(steps):
+    """بررسی نام‌ها و وابستگی‌ها و نبود حلقه (الگوریتم Kahn)"""
+    names = {}
+    for step in steps:
+        if step.name in names:
+            raise ScanGraphError(f"duplicate step {step.name}")
+        names[step.name] = step
+    for step in steps:
+        for dep in step.deps:
+            if dep not in names:
+                raise ScanGraphError(f"{step.name} depends on unknown step {dep}")
+    remaining = {step.name: set(step.deps) for step in steps}
+    ready = [name for name, deps in remaining.items() if not deps]
+    visited = 0
+    while ready:
+        name = ready.pop()
+        visited += 1
+        for other, deps in remaining.items():
+            if name in deps:
+                deps.discard(name)
+                if not deps:
+                    ready.append(other)
+    if visited != len(steps):
+        raise ScanGraphError("dependency cycle between steps")
+    return names
+
+
+def run_graph(steps, max_workers=None, progress=None):
+    """اجرای هم‌زمان گراف؛ خروجی (مقادیر {نام: نتیجه}, زمان‌بندی {نام: جزئیات})
+
+    زمان‌بندی هر گام شامل start و seconds نسبت به شروع گراف، status
+    ('ok' / 'error' / 'timeout') و متن خطا است. نخ گامی که از مهلت گذشته
+    متوقف نمی‌شود (پایتون امکان آن را ندارد) اما منتظرش نمی‌مانیم.
+    """
+    by_name = validate(steps)
+    pending = {step.name: set(step.deps) for step in steps}
+    values = {}
+    timings = {}
+    running = {}
+    failed = set()
+    started = time.perf_counter()
+    executor = ThreadPoolExecutor(max_workers=max_workers or len(steps) or 1,
+                                  thread_name_prefix='scan-step')
+
+    def finish(name, value, status, error=None):
+        step = by_name[name]
+        values[name] = value if status == 'ok' else step.default
+        begin = timings.get(name, {}).get('start', time.perf_counter() - started)
+        timings[name] = {
+            'start': round(begin, 3),
+            'seconds': round(time.perf_counter() - started - begin, 3),
+            'status': status,
+            'error': error,
+        }
+        if status != 'ok':
+            failed.add(name)
+            logger.warning("scan step %s %s%s", name, status, f": {error}" if error else "")
+        for deps in pending.values():
+            deps.discard(name)
+
+    try:
+        while pending or running:
+            for name in [n for n, deps in pending.items() if not deps]:
+                step = by_name[name]
+                del pending[name]
+                timings[name] = {'start': round(time.perf_counter() - started, 3)}
+                if progress:
+                    progress(step.label)
+                kwargs = {dep: values[dep] for dep in step.deps}
+                future = executor.submit(step.func, **kwargs)
+                deadline = time.perf_counter() + step.timeout if step.timeout else None
+                running[future] = (name, deadline)
+
+            deadlines = [d for _, d in running.values() if d is not None]
+            wait_for = max(0.0, min(deadlines) - time.perf_counter()) if deadlines else None
+            done, _ = wait(list(running), timeout=wait_for, return_when=FIRST_COMPLETED)
+            for future in done:
+                name, _ = running.pop(future)
+                try:
+                    finish(name, future.result(), 'ok')
+                except Exception as e:
+                    finish(name, None, 'error', f"{type(e).__name__}: {e}")
+            now = time.perf_counter()
+            for future, (name, deadline) in list(running.items()):
+                if deadline is not None and now >= deadline:
+                    del running[future]
+                    finish(name, None, 'timeout')
+    finally:
+        # گام‌های منقضی‌شده در پس‌زمینه تمام می‌شوند؛ منتظرشان نمی‌مانیم
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    timings['_total'] = {
+        'wall_seconds': round(time.perf_counter() - started, 3),
+        'step_seconds': round(sum(t['seconds'] for t in timings.values()), 3),
+        'failed': sorted(failed),
+    }
+    return values, timings
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+اولویت‌بندی پورت‌ها و اهداف اسکن بر اساس سابقه تشخیص
+از ماینرهای شناسایی‌شده قبلی نرخ برخورد هر پورت و تعداد تشخیص در هر /24 به دست
+می‌آید. میزبان‌ها به ترتیب تراکم تشخیص زیرشبکه‌شان پویش می‌شوند تا اولین تشخیص زودتر
+رخ دهد؛ ترتیب فقط عوض می‌شود و مجموعه اهداف همان است و بقیه میزبان‌ها بدون ساختن
+فهرست کامل و به ترتیب آدرس پیمایش می‌شوند. پورت‌ها هم‌زمان پویش می‌شوند، پس ترتیب
+آن‌ها اثری ندارد؛ به جای آن پورت‌های پربرخورد یک لایه جدا می‌سازند که پیش از بقیه
+پویش می‌شود تا آبشار بتواند بدون پویش لایه دوم خارج شود.
+"""
+
+import ipaddress
+import json
+from collections import Counter
+
+
+class ScanPrioritizer:
+    """نرخ برخورد پورت‌ها و تراکم /24ها از روی سابقه"""
+
+    def __init__(self):
+        self.port_hits = Counter()
+        self.subnet_hits = Counter()   # شماره /24 (آدرس IPv4 >> 8) -> تعداد تشخیص
+        self.observations = 0
+
+    def fit(self, records):
+        """records: دنباله (ip, open_ports) که open_ports فهرست یا رشته JSON است"""
+        self.port_hits.clear()
+        self.subnet_hits.clear()
+        self.observations = 0
+        for ip, ports in records:
+            if isinstance(ports, str):
+                try:
+                    ports = json.loads(ports or '[]')
+                except ValueError:
+                    ports = []
+            self.observations += 1
+            self.port_hits.update(int(port) for port in ports or ())
+            try:
+                address = ipaddress.ip_address(ip)
+            except ValueError:
+                continue
+            if address.version == 4:
+                self.subnet_hits[int(address) >> 8] += 1
+        return self
+
+    def port_hit_rate(self, port):
+        return self.port_hits[port] / self.observations if self.observations else 0.0
+
+    def port_tiers(self, ports, min_hit_rate=0.05, limit=8):
+        """(پورت‌های پربرخورد، بقیه پورت‌ها)
+
+        لایه اول حداکثر limit پورت با نرخ برخورد حداقل min_hit_rate است به ترتیب نرخ؛
+        بدون سابقه لایه اول خالی است و همه پورت‌ها در لایه دوم می‌مانند.
+        """
+        hot = [port for port in sorted(ports, key=lambda port: -self.port_hits[port])[:limit]
+               if self.port_hit_rate(port) >= min_hit_rate]
+        chosen = set(hot)
+        return hot, [port for port in ports if port not in chosen]
+
+    def order_targets(self, network):
+        """میزبان‌های network: ابتدا /24های پرتراکم، سپس بقیه به ترتیب آدرس
+
+        همان مجموعه network.hosts() را برمی‌گرداند؛ شبکه‌های IPv6 بدون تغییر ترتیب.
+        """
+        if network.version != 4 or not self.subnet_hits:
+            yield from network.hosts()
+            return
+
+        low, high = int(network.network_address), int(network.broadcast_address)
+        if network.num_addresses > 2:
+            low, high = low + 1, high - 1
+        hot = [subnet for subnet, _ in self.subnet_hits.most_common()
+               if subnet << 8 <= high and (subnet << 8 | 0xFF) >= low]
+        for subnet in hot:
+            for value in range(max(subnet << 8, low), min(subnet << 8 | 0xFF, high) + 1):
+                yield ipaddress.IPv4Address(value)
+
+        hot = set(hot)
+        for address in network.hosts():
+            if int(address) >> 8 not in hot:
+                yield address
+
+    def stats(self, top=10):
+        return {
+            'observations': self.observations,
+            'ports': [{'port': port, 'hits': hits, 'hit_rate': round(hits / self.observations, 3)}
+                      for port, hits in self.port_hits.most_common(top)],
+            'subnets': [{'subnet': f'{ipaddress.IPv4Address(subnet << 8)}/24', 'detections': hits,
+                         'density': round(hits / 256, 4)}
+                        for subnet, hits in self.subnet_hits.most_common(top)],
+        }
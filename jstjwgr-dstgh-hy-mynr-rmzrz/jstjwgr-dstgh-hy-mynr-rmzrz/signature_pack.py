@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+بسته امضاهای ماینر (signature pack)
+پورت‌ها، نام فرآیندها، کلیدواژه‌ها و دامنه‌ها از یک فایل نسخه‌دار خوانده می‌شوند
+و به ساختارهای از پیش کامپایل‌شده تبدیل می‌شوند:
+بیت‌مپ پورت، frozenset، اتوماتای Aho-Corasick و عبارات باقاعده.
+"""
+
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+SIGNATURE_FORMAT = 1
+DEFAULT_PACK_PATH = os.environ.get(
+    'MINER_SIGNATURE_PACK',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'signatures.json')
+)
+
+
+class SignaturePackError(ValueError):
+    """خطای ساختار یا نسخه فایل امضا"""
+
+
+class KeywordAutomaton:
+    """اتوماتای Aho-Corasick برای جستجوی هم‌زمان چند کلیدواژه در یک متن"""
+
+    __slots__ = ('keywords', '_goto', '_fail', '_out')
+
+    def __init__(self, keywords):
+        self.keywords = tuple(sorted({k.lower() for k in keywords if k}))
+        goto = [{}]
+        out = [()]
+
+        for keyword in self.keywords:
+            state = 0
+            for char in keyword:
+                nxt = goto[state].get(char)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][char] = nxt
+                    goto.append({})
+                    out.append(())
+                state = nxt
+            out[state] = out[state] + (keyword,)
+
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and char not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(char, 0)
+                out[nxt] = out[nxt] + out[fail[nxt]]
+
+        self._goto = goto
+        self._fail = fail
+        self._out = out
+
+    def _walk(self, text):
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if out[state]:
+                yield out[state]
+
+    def search(self, text):
+        """همه کلیدواژه‌های موجود در متن"""
+        found = set()
+        if text:
+            for matches in self._walk(text.lower()):
+                found.update(matches)
+        return found
+
+    def contains(self, text):
+        """آیا حداقل یک کلیدواژه در متن وجود دارد"""
+        if not text:
+            return False
+        for _ in self._walk(text.lower()):
+            return True
+        return False
+
+    def __len__(self):
+        return len(self.keywords)
+
+
+def _fingerprint_index(entries, section):
+    """نگاشت هش MD5 (حروف کوچک) به برچسب؛ هش نامعتبر خطا است"""
+    index = {}
+    for digest, label in entries.items():
+        digest = digest.strip().lower()
+        if len(digest) != 32 or any(c not in '0123456789abcdef' for c in digest):
+            raise SignaturePackError(f"هش نامعتبر در {section}: {digest}")
+        index[digest] = label
+    return index
+
+
+def _oid_index(entries, section):
+    """نگاشت نام به OID به شکل تاپل اعداد؛ OID نامعتبر خطا است"""
+    index = {}
+    for name, oid in entries.items():
+        parts = str(oid).strip().strip('.').split('.')
+        if len(parts) < 2 or not all(part.isdigit() for part in parts):
+            raise SignaturePackError(f"OID نامعتبر در {section}: {oid}")
+        index[name] = tuple(int(part) for part in parts)
+    return index
+
+
+class SignaturePack:
+    """نسخه کامپایل‌شده و فقط‌خواندنی یک فایل امضا"""
+
+    def __init__(self, data, source=None):
+        if data.get('format') != SIGNATURE_FORMAT:
+            raise SignaturePackError(f"فرمت بسته امضا پشتیبانی نمی‌شود: {data.get('format')}")
+
+        self.source = source
+        self.version = str(data.get('version', 'unknown'))
+
+        # پورت‌ها: دیکشنری سرویس، دسته‌بندی و بیت‌مپ 8 کیلوبایتی برای تست O(1)
+        self.port_services = {}
+        self.port_categories = {}
+        self.port_bitmap = bytearray(65536 // 8)
+        for port, entry in data.get('ports', {}).items():
+            port = int(port)
+            if not 0 < port < 65536:
+                raise SignaturePackError(f"پورت نامعتبر در بسته امضا: {port}")
+            if isinstance(entry, str):
+                entry = {'service': entry}
+            self.port_services[port] = entry.get('service', 'Unknown Service')
+            self.port_categories[port] = entry.get('category', 'other')
+            self.port_bitmap[port >> 3] |= 1 << (port & 7)
+
+        self.ports_by_category = {}
+        for port, category in self.port_categories.items():
+            self.ports_by_category.setdefault(category, []).append(port)
+        self.ports_by_category = {c: frozenset(p) for c, p in self.ports_by_category.items()}
+
+        # زیرمجموعه پورت‌هایی که هر detector پویش و امتیازدهی می‌کند (port -> سرویس)
+        self.port_profiles = {}
+        for name, ports in data.get('port_profiles', {}).items():
+            profile = {}
+            for port in ports:
+                port = int(port)
+                if port not in self.port_services:
+                    raise SignaturePackError(f"پورت {port} در پروفایل {name} تعریف نشده است")
+                profile[port] = self.port_services[port]
+            self.port_profiles[name] = profile
+
+        self.process_names = frozenset(_normalize_process(p) for p in data.get('process_names', []))
+        self.pool_addresses = frozenset(data.get('pool_addresses', []))
+
+        self.process_name_automaton = KeywordAutomaton(self.process_names)
+        self.process_keywords = KeywordAutomaton(data.get('process_keywords', []))
+        self.cmdline_arguments = KeywordAutomaton(data.get('cmdline_arguments', []))
+        self.hostname_keywords = KeywordAutomaton(data.get('hostname_keywords', []))
+        # نام سازنده‌های ASIC برای تطبیق با نام ثبت‌شده OUI در IEEE
+        self.asic_vendor_keywords = KeywordAutomaton(data.get('asic_vendor_keywords', []))
+        self.banner_keywords = KeywordAutomaton(data.get('banner_keywords', []))
+        self.registry_name_keywords = KeywordAutomaton(data.get('registry_name_keywords', []))
+        self.registry_data_keywords = KeywordAutomaton(data.get('registry_data_keywords', []))
+        self.pool_domains = KeywordAutomaton(data.get('pool_domains', []))
+
+        self.patterns = {}
+        for name, pattern in data.get('patterns', {}).items():
+            try:
+                self.patterns[name] = re.compile(pattern)
+            except re.error as e:
+                raise SignaturePackError(f"الگوی نامعتبر {name}: {e}")
+
+        # اثر انگشت JA3 (کلاینت) و JA3S (سرور): هش MD5 -> نام ابزار، با جستجوی O(1)
+        ja3 = data.get('ja3', {})
+        self.ja3_client = _fingerprint_index(ja3.get('client', {}), 'ja3.client')
+        self.ja3_server = _fingerprint_index(ja3.get('server', {}), 'ja3.server')
+
+        # OIDهای SNMP: اسکالرها (بدون پسوند .0) و ستون‌های جدول سنسور برای GETBULK
+        snmp = data.get('snmp', {})
+        self.snmp_scalars = _oid_index(snmp.get('scalars', {}), 'snmp.scalars')
+        self.snmp_columns = _oid_index(snmp.get('columns', {}), 'snmp.columns')
+
+        self.load_time_ms = 0.0
+        self.memory_bytes = 0
+
+    @classmethod
+    def from_file(cls, path):
+        """خواندن و کامپایل فایل امضا به همراه اندازه‌گیری زمان و حافظه"""
+        started = time.perf_counter()
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        pack = cls(data, source=path)
+        pack.load_time_ms = (time.perf_counter() - started) * 1000
+        pack.memory_bytes = pack.footprint()
+        return pack
+
+    def is_miner_port(self, port):
+        """تست عضویت پورت با بیت‌مپ"""
+        return 0 < port < 65536 and bool(self.port_bitmap[port >> 3] & (1 << (port & 7)))
+
+    def profile_ports(self, name):
+        """پورت‌های یک پروفایل؛ در نبود پروفایل همه پورت‌های بسته"""
+        return self.port_profiles.get(name, self.port_services)
+
+    def is_known_process(self, name):
+        """تطبیق دقیق نام فرآیند (بدون پسوند .exe)"""
+        return _normalize_process(name) in self.process_names
+
+    def match_patterns(self, text):
+        """نام الگوهایی که در متن یافت شدند"""
+        return [name for name, regex in self.patterns.items() if regex.search(text or '')]
+
+    def footprint(self):
+        """حافظه تقریبی ساختارهای تطبیق به بایت"""
+        structures = [
+            self.port_services, self.port_categories, self.port_bitmap,
+            self.ports_by_category, self.port_profiles, self.process_names, self.pool_addresses,
+            self.patterns, self.ja3_client, self.ja3_server,
+            self.snmp_scalars, self.snmp_columns,
+        ]
+        for automaton in (self.process_name_automaton, self.process_keywords,
+                          self.cmdline_arguments, self.hostname_keywords,
+                          self.asic_vendor_keywords,
+                          self.banner_keywords, self.registry_name_keywords,
+                          self.registry_data_keywords, self.pool_domains):
+            structures.extend((automaton._goto, automaton._fail, automaton._out))
+        return _deep_sizeof(structures)
+
+    def stats(self):
+        """گزارش نسخه، زمان بارگذاری و حافظه"""
+        return {
+            'version': self.version,
+            'source': self.source,
+            'ports': len(self.port_services),
+            'port_profiles': {name: len(ports) for name, ports in self.port_profiles.items()},
+            'process_names': len(self.process_names),
+            'pool_addresses': len(self.pool_addresses),
+            'patterns': len(self.patterns),
+            'ja3_client': len(self.ja3_client),
+            'ja3_server': len(self.ja3_server),
+            'snmp_oids': len(self.snmp_scalars) + len(self.snmp_columns),
+            'load_time_ms': round(self.load_time_ms, 3),
+            'memory_bytes': self.memory_bytes,
+        }
+
+
+class SignatureStore:
+    """نگهدارنده بسته فعلی با بارگذاری مجدد اتمیک هنگام تغییر فایل
+
+    اسکن‌های در حال اجرا ارجاع خود به بسته قبلی را نگه می‌دارند؛ بسته جدید
+    فقط پس از کامپایل کامل جایگزین می‌شود و در صورت خطا بسته قبلی باقی می‌ماند.
+    فایل امضا باید با نوشتن در فایل موقت و os.replace به‌روزرسانی شود.
+    """
+
+    def __init__(self, path=DEFAULT_PACK_PATH, check_interval=2.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._last_check = 0.0
+        self._watcher = None
+        self.reloads = 0
+        self._pack = self._load()
+
+    def _load(self):
+        stat = os.stat(self.path)
+        pack = SignaturePack.from_file(self.path)
+        self._mtime = (stat.st_mtime_ns, stat.st_size)
+        logger.info(
+            f"بسته امضا {pack.version} بارگذاری شد: {pack.load_time_ms:.1f}ms، "
+            f"{pack.memory_bytes / 1024:.1f}KB"
+        )
+        return pack
+
+    @property
+    def pack(self):
+        """بسته فعلی؛ حداکثر هر check_interval ثانیه تغییر فایل بررسی می‌شود"""
+        now = time.monotonic()
+        if now - self._last_check >= self.check_interval:
+            self._last_check = now
+            self.reload_if_changed()
+        return self._pack
+
+    def reload_if_changed(self):
+        """بارگذاری مجدد در صورت تغییر فایل"""
+        try:
+            stat = os.stat(self.path)
+        except OSError as e:
+            logger.error(f"فایل امضا در دسترس نیست: {e}")
+            return False
+
+        if (stat.st_mtime_ns, stat.st_size) == self._mtime:
+            return False
+
+        with self._lock:
+            if (stat.st_mtime_ns, stat.st_size) == self._mtime:
+                return False
+            try:
+                pack = self._load()
+            except (OSError, ValueError) as e:
+                # نگه داشتن بسته قبلی و جلوگیری از تلاش مجدد تا تغییر بعدی فایل
+                self._mtime = (stat.st_mtime_ns, stat.st_size)
+                logger.error(f"بارگذاری مجدد بسته امضا ناموفق بود: {e}")
+                return False
+            self._pack = pack
+            self.reloads += 1
+        return True
+
+    def start_watching(self):
+        """رشته پس‌زمینه برای بررسی دوره‌ای فایل"""
+        if self._watcher is None:
+            def watch():
+                while True:
+                    time.sleep(self.check_interval)
+                    self.reload_if_changed()
+
+            self._watcher = threading.Thread(target=watch, name='signature-watcher', daemon=True)
+            self._watcher.start()
+
+    def stats(self):
+        stats = self._pack.stats()
+        stats['reloads'] = self.reloads
+        return stats
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_signature_store(path=None):
+    """نمونه مشترک SignatureStore برای همه detectorها"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = SignatureStore(path or DEFAULT_PACK_PATH)
+    return _store
+
+
+def _normalize_process(name):
+    name = (name or '').lower()
+    return name[:-4] if name.endswith('.exe') else name
+
+
+def _deep_sizeof(obj, seen=None):
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_deep_sizeof(k, seen) + _deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(_deep_sizeof(item, seen) for item in obj)
+    return size
@@ -0,0 +1,638 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+پرسش‌گر ناهمگام SNMP v2c برای تله‌متری ماینرها
+همه میزبان‌ها از یک موتور مشترک (یک سوکت UDP و جدول درخواست‌های در انتظار بر اساس
+request-id) پرسیده می‌شوند. مجموعه OIDها (نرخ هش، توضیح سیستم و ستون‌های جدول سنسور
+ENTITY-SENSOR-MIB برای دما، سرعت فن و توان) از بخش snmp بسته امضا خوانده می‌شود و در
+یک درخواست GETBULK ارسال می‌شود. میزبان‌های بی‌پاسخ با عقب‌نشینی نمایی کنار گذاشته و
+پاسخ‌ها برای مدت محدودی کش می‌شوند.
+"""
+
+import argparse
+import asyncio
+import bisect
+import json
+import logging
+import socket
+import threading
+import time
+
+from signature_pack import get_signature_store
+
+logger = logging.getLogger(__name__)
+
+SNMP_PORT = 161
+SNMP_V2C = 1
+
+# برچسب‌های BER
+TAG_INTEGER = 0x02
+TAG_OCTET_STRING = 0x04
+TAG_NULL = 0x05
+TAG_OID = 0x06
+TAG_SEQUENCE = 0x30
+TAG_IP_ADDRESS = 0x40
+TAG_COUNTER32 = 0x41
+TAG_GAUGE32 = 0x42
+TAG_TIMETICKS = 0x43
+TAG_OPAQUE = 0x44
+TAG_COUNTER64 = 0x46
+TAG_NO_SUCH_OBJECT = 0x80
+TAG_NO_SUCH_INSTANCE = 0x81
+TAG_END_OF_MIB = 0x82
+
+PDU_GET = 0xA0
+PDU_GET_NEXT = 0xA1
+PDU_RESPONSE = 0xA2
+PDU_GET_BULK = 0xA5
+
+EXCEPTION_TAGS = frozenset((TAG_NO_SUCH_OBJECT, TAG_NO_SUCH_INSTANCE, TAG_END_OF_MIB))
+UNSIGNED_TAGS = frozenset((TAG_COUNTER32, TAG_GAUGE32, TAG_TIMETICKS, TAG_COUNTER64))
+
+# مقادیر entPhySensorType در ENTITY-SENSOR-MIB (RFC 3433)
+SENSOR_WATTS = 6
+SENSOR_CELSIUS = 8
+SENSOR_RPM = 10
+
+
+class SnmpError(ValueError):
+    """پیام SNMP نامعتبر"""
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# کدگذاری BER
+# ─────────────────────────────────────────────────────────────────────────────
+def _length(n):
+    if n < 0x80:
+        return bytes((n,))
+    body = n.to_bytes((n.bit_length() + 7) // 8, 'big')
+    return bytes((0x80 | len(body),)) + body
+
+
+def tlv(tag, body):
+    return bytes((tag,)) + _length(len(body)) + body
+
+
+def encode_integer(value, tag=TAG_INTEGER):
+    return tlv(tag, value.to_bytes(value.bit_length() // 8 + 1, 'big', signed=True))
+
+
+def encode_unsigned(value, tag):
+    # بیت علامت نباید روشن باشد؛ در صورت نیاز یک بایت صفر پیشوند می‌شود
+    return tlv(tag, value.to_bytes(value.bit_length() // 8 + 1, 'big'))
+
+
+def encode_oid(oid):
+    body = bytearray((oid[0] * 40 + oid[1],))
+    for part in oid[2:]:
+        chunk = [part & 0x7F]
+        part >>= 7
+        while part:
+            chunk.append(0x80 | (part & 0x7F))
+            part >>= 7
+        body += bytes(reversed(chunk))
+    return tlv(TAG_OID, bytes(body))
+
+
+def encode_value(tag, value):
+    """کدگذاری مقدار یک varbind بر اساس برچسب"""
+    if tag == TAG_INTEGER:
+        return encode_integer(value)
+    if tag in UNSIGNED_TAGS:
+        return encode_unsigned(value, tag)
+    if tag in (TAG_OCTET_STRING, TAG_IP_ADDRESS, TAG_OPAQUE):
+        return tlv(tag, value.encode() if isinstance(value, str) else bytes(value))
+    if tag == TAG_OID:
+        return encode_oid(value)
+    return tlv(tag, b'')
+
+
+def encode_message(community, pdu_type, request_id, varbinds, field1=0, field2=0):
+    """پیام کامل v2c؛ برای GETBULK مقدار field1/field2 برابر non-repeaters/max-repetitions است
+
+    varbinds فهرست (oid, tag, value) است؛ در درخواست‌ها tag برابر TAG_NULL است.
+    """
+    bindings = b''.join(tlv(TAG_SEQUENCE, encode_oid(oid) + encode_value(tag, value))
+                        for oid, tag, value in varbinds)
+    pdu = tlv(pdu_type, encode_integer(request_id) + encode_integer(field1)
+              + encode_integer(field2) + tlv(TAG_SEQUENCE, bindings))
+    return tlv(TAG_SEQUENCE, encode_integer(SNMP_V2C) + encode_value(TAG_OCTET_STRING, community) + pdu)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# رمزگشایی BER
+# ─────────────────────────────────────────────────────────────────────────────
+def _header(data, offset):
+    """(tag, شروع بدنه, پایان بدنه)"""
+    try:
+        tag = data[offset]
+        length = data[offset + 1]
+        offset += 2
+        if length & 0x80:
+            count = length & 0x7F
+            length = int.from_bytes(data[offset:offset + count], 'big')
+            offset += count
+    except IndexError:
+        raise SnmpError('truncated BER header')
+    end = offset + length
+    if end > len(data):
+        raise SnmpError('truncated BER value')
+    return tag, offset, end
+
+
+def decode_oid(data):
+    if not data:
+        raise SnmpError('empty OID')
+    first = data[0]
+    oid = [min(first // 40, 2)]
+    oid.append(first - oid[0] * 40)
+    value = 0
+    for byte in data[1:]:
+        value = (value << 7) | (byte & 0x7F)
+        if not byte & 0x80:
+            oid.append(value)
+            value = 0
+    return tuple(oid)
+
+
+def decode_value(tag, data):
+    if tag == TAG_INTEGER:
+        return int.from_bytes(data, 'big', signed=True)
+    if tag in UNSIGNED_TAGS:
+        return int.from_bytes(data, 'big')
+    if tag == TAG_OID:
+        return decode_oid(data)
+    if tag == TAG_IP_ADDRESS:
+        return '.'.join(str(b) for b in data)
+    if tag == TAG_OCTET_STRING:
+        return bytes(data).decode('utf-8', errors='replace')
+    return None
+
+
+def decode_message(data):
+    """(community, نوع PDU, request-id, field1, field2, [(oid, tag, value)])"""
+    tag, start, end = _header(data, 0)
+    if tag != TAG_SEQUENCE:
+        raise SnmpError('not an SNMP message')
+    tag, start, offset = _header(data, start)           # version
+    tag, start, offset = _header(data, offset)          # community
+    community = bytes(data[start:offset]).decode('utf-8', errors='replace')
+    pdu_type, offset, _ = _header(data, offset)
+    fields = []
+    for _ in range(3):
+        tag, start, offset = _header(data, offset)
+        if tag != TAG_INTEGER:
+            raise SnmpError('malformed PDU header')
+        fields.append(int.from_bytes(data[start:offset], 'big', signed=True))
+    tag, offset, end = _header(data, offset)
+    varbinds = []
+    while offset < end:
+        _, start, offset = _header(data, offset)
+        tag, oid_start, oid_end = _header(data, start)
+        value_tag, value_start, value_end = _header(data, oid_end)
+        varbinds.append((decode_oid(data[oid_start:oid_end]), value_tag,
+                         decode_value(value_tag, data[value_start:value_end])))
+    return community, pdu_type, fields[0], fields[1], fields[2], varbinds
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# موتور مشترک و پرسش‌گر
+# ─────────────────────────────────────────────────────────────────────────────
+class SnmpEngine(asyncio.DatagramProtocol):
+    """یک سوکت UDP برای همه میزبان‌ها؛ پاسخ‌ها با request-id به درخواست برمی‌گردند"""
+
+    def __init__(self, receive_buffer=1 << 22):
+        self.transport = None
+        self.loop = None
+        self.opening = None
+        self.receive_buffer = receive_buffer
+        self._pending = {}
+        self._next_id = int(time.time() * 1000) & 0x3FFFFFFF
+        self.sent = 0
+        self.received = 0
+        self.malformed = 0
+
+    async def open(self, local_addr=('0.0.0.0', 0)):
+        self.loop = asyncio.get_running_loop()
+        await self.loop.create_datagram_endpoint(lambda: self, local_addr=local_addr)
+        return self
+
+    def connection_made(self, transport):
+        self.transport = transport
+        # پاسخ هزاران میزبان تقریباً هم‌زمان می‌رسند؛ بافر پیش‌فرض دریافت سرریز می‌شود
+        sock = transport.get_extra_info('socket')
+        for option in (getattr(socket, 'SO_RCVBUFFORCE', None), socket.SO_RCVBUF):
+            if option is None:
+                continue
+            try:
+                sock.setsockopt(socket.SOL_SOCKET, option, self.receive_buffer)
+                break
+            except OSError:
+                continue
+
+    def datagram_received(self, data, addr):
+        self.received += 1
+        try:
+            _, pdu_type, request_id, error_status, _, varbinds = decode_message(data)
+        except SnmpError:
+            self.malformed += 1
+            return
+        pending = self._pending.get(request_id)
+        if pending is None or pdu_type != PDU_RESPONSE or pending[0] != addr[0]:
+            return
+        future = pending[1]
+        if not future.done():
+            future.set_result((error_status, varbinds))
+
+    def error_received(self, exc):
+        # ICMP port unreachable؛ درخواست مربوطه با timeout تمام می‌شود
+        logger.debug("SNMP socket error: %s", exc)
+
+    async def request(self, host, port, message_factory, timeout, retries):
+        """ارسال پیام با تلاش مجدد؛ message_factory(request_id) بایت‌های پیام را می‌سازد"""
+        request_id = self._next_id
+        self._next_id = (self._next_id + 1) & 0x7FFFFFFF
+        future = self.loop.create_future()
+        self._pending[request_id] = (host, future)
+        message = message_factory(request_id)
+        try:
+            for _ in range(retries + 1):
+                self.transport.sendto(message, (host, port))
+                self.sent += 1
+                try:
+                    return await asyncio.wait_for(asyncio.shield(future), timeout)
+                except asyncio.TimeoutError:
+                    continue
+            raise asyncio.TimeoutError
+        finally:
+            del self._pending[request_id]
+
+    def close(self):
+        if self.transport is not None:
+            self.transport.close()
+            self.transport = None
+
+
+class SnmpTelemetry:
+    """نتیجه پرسش SNMP از یک میزبان"""
+
+    __slots__ = ('ip', 'timestamp', 'hash_rate', 'temperatures', 'fan_speeds', 'power',
+                 'sys_descr', 'sys_name', 'values', 'error')
+
+    def __init__(self, ip, timestamp, error=None):
+        self.ip = ip
+        self.timestamp = timestamp
+        self.hash_rate = None
+        self.temperatures = ()
+        self.fan_speeds = ()
+        self.power = None
+        self.sys_descr = None
+        self.sys_name = None
+        self.values = {}
+        self.error = error
+
+    def to_dict(self):
+        return {
+            'ip': self.ip,
+            'timestamp': self.timestamp,
+            'hash_rate': self.hash_rate,
+            'temperatures': list(self.temperatures),
+            'fan_speeds': list(self.fan_speeds),
+            'power': self.power,
+            'sys_descr': self.sys_descr,
+            'sys_name': self.sys_name,
+            'error': self.error,
+        }
+
+
+class SnmpCrawler:
+    """پرسش هم‌زمان از هزاران میزبان با یک موتور، کش پاسخ و عقب‌نشینی برای هر میزبان"""
+
+    def __init__(self, community='public', port=SNMP_PORT, concurrency=256, timeout=1.0,
+                 retries=1, max_repetitions=16, max_rounds=4, cache_ttl=300.0,
+                 backoff_base=30.0, backoff_max=3600.0, scalars=None, columns=None):
+        pack = get_signature_store().pack
+        self.community = community
+        self.port = port
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.max_repetitions = max_repetitions
+        self.max_rounds = max_rounds
+        self.cache_ttl = cache_ttl
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.scalars = dict(scalars if scalars is not None else pack.snmp_scalars)
+        self.columns = dict(columns if columns is not None else pack.snmp_columns)
+        self.engine = None
+        self._cache = {}        # host -> (زمان انقضا، SnmpTelemetry)
+        self._backoff = {}      # host -> (تعداد شکست، زمان تلاش بعدی)
+        self.counters = dict.fromkeys(
+            ('queries', 'responses', 'timeouts', 'errors', 'cache_hits', 'backoff_skips'), 0)
+
+    async def _engine(self):
+        # موتور به حلقه رویداد جاری وابسته است؛ با asyncio.run جدید از نو ساخته می‌شود.
+        # باز کردن یک task مشترک است تا پرسش‌های هم‌زمان فقط یک سوکت بسازند.
+        loop = asyncio.get_running_loop()
+        engine = self.engine
+        if (engine is None or engine.loop is not loop
+                or (engine.opening.done() and engine.transport is None)):
+            engine = self.engine = SnmpEngine()
+            engine.loop = loop
+            engine.opening = loop.create_task(engine.open())
+        await engine.opening
+        return engine
+
+    async def _bulk(self, engine, host, port, scalars, columns):
+        """یک GETBULK: اسکالرها به عنوان non-repeaters و ستون‌ها به عنوان repeaters"""
+        varbinds = [(oid, TAG_NULL, None) for oid in scalars + columns]
+
+        def message(request_id):
+            return encode_message(self.community, PDU_GET_BULK, request_id, varbinds,
+                                  len(scalars), self.max_repetitions if columns else 0)
+
+        error_status, response = await engine.request(host, port, message, self.timeout, self.retries)
+        if error_status:
+            raise SnmpError(f'error-status {error_status}')
+        return response
+
+    async def query(self, host, port=None):
+        """پرسش یک میزبان؛ None یعنی میزبان در دوره عقب‌نشینی است"""
+        now = time.time()
+        cached = self._cache.get(host)
+        if cached is not None and cached[0] > now:
+            self.counters['cache_hits'] += 1
+            return cached[1]
+        backoff = self._backoff.get(host)
+        if backoff is not None and backoff[1] > now:
+            self.counters['backoff_skips'] += 1
+            return None
+
+        self.counters['queries'] += 1
+        engine = await self._engine()
+        telemetry = SnmpTelemetry(host, now)
+        try:
+            await self._walk(engine, host, port or self.port, telemetry)
+        except asyncio.TimeoutError:
+            self.counters['timeouts'] += 1
+            failures = backoff[0] + 1 if backoff else 1
+            delay = min(self.backoff_base * 2 ** (failures - 1), self.backoff_max)
+            self._backoff[host] = (failures, now + delay)
+            telemetry.error = 'timeout'
+            return telemetry
+        except SnmpError as e:
+            self.counters['errors'] += 1
+            telemetry.error = str(e)
+            return telemetry
+
+        self.counters['responses'] += 1
+        self._backoff.pop(host, None)
+        self._cache[host] = (now + self.cache_ttl, telemetry)
+        return telemetry
+
+    async def _walk(self, engine, host, port, telemetry):
+        scalar_names = list(self.scalars)
+        column_names = list(self.columns)
+        prefixes = [self.columns[name] for name in column_names]
+        cursors = list(prefixes)
+        rows = {name: {} for name in column_names}
+        scalars = [self.scalars[name] for name in scalar_names]
+
+        for _ in range(self.max_rounds):
+            response = await self._bulk(engine, host, port, scalars, cursors)
+            for name, (oid, tag, value) in zip(scalar_names, response[:len(scalars)]):
+                if tag not in EXCEPTION_TAGS and oid[:len(self.scalars[name])] == self.scalars[name]:
+                    telemetry.values[name] = value
+            # پاسخ repeaters به ترتیب سطری است: هر تکرار یک OID برای هر ستون
+            active = [True] * len(cursors)
+            repeated = response[len(scalars):]
+            for i, (oid, tag, value) in enumerate(repeated):
+                column = i % len(cursors)
+                prefix = prefixes[column]
+                if tag in EXCEPTION_TAGS or oid[:len(prefix)] != prefix:
+                    active[column] = False
+                    continue
+                if active[column]:
+                    rows[column_names[column]][oid[len(prefix):]] = value
+                    cursors[column] = oid
+            scalars = []
+            # ستون‌هایی که تمام شده‌اند یا در این دور پاسخی نداشتند حذف می‌شوند
+            keep = [i for i in range(len(cursors)) if active[i] and len(repeated) > i]
+            if not keep:
+                break
+            cursors = [cursors[i] for i in keep]
+            prefixes = [prefixes[i] for i in keep]
+            column_names = [column_names[i] for i in keep]
+
+        apply_values(telemetry, rows)
+
+
+    async def crawl(self, hosts):
+        """پرسش هم‌زمان از فهرست میزبان‌ها (تکراری‌ها یک بار)؛ نتایج غیر None"""
+        hosts = list(dict.fromkeys(hosts))
+        now = time.time()
+        # کش منقضی‌شده پاک می‌شود تا حافظه با تعداد میزبان‌های فعال محدود بماند
+        for host in [h for h, (expires, _) in self._cache.items() if expires <= now]:
+            del self._cache[host]
+        # عقب‌نشینی‌هایی که بیش از backoff_max از زمان تلاش بعدی‌شان گذشته دیگر اثری ندارند؛
+        # میزبان‌هایی که هنوز تلاش می‌شوند تعداد شکست خود را نگه می‌دارند
+        for host in [h for h, (_, retry_at) in self._backoff.items() if retry_at + self.backoff_max <= now]:
+            del self._backoff[host]
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def bounded(host):
+            async with semaphore:
+                return await self.query(host)
+
+        results = await asyncio.gather(*(bounded(host) for host in hosts))
+        return [r for r in results if r is not None]
+
+    def is_miner(self, telemetry):
+        """پاسخ به OID نرخ هش یا توضیح/نام سیستم با کلیدواژه‌های ماینر"""
+        if telemetry.error is not None:
+            return False
+        if telemetry.hash_rate is not None:
+            return True
+        pack = get_signature_store().pack
+        return any(
+            text and (pack.banner_keywords.contains(text.lower())
+                      or pack.hostname_keywords.contains(text.lower()))
+            for text in (telemetry.sys_descr, telemetry.sys_name)
+        )
+
+    def stats(self):
+        stats = dict(self.counters)
+        stats.update({
+            'cached_hosts': len(self._cache),
+            'backoff_hosts': len(self._backoff),
+            'packets_sent': self.engine.sent if self.engine else 0,
+            'packets_received': self.engine.received if self.engine else 0,
+        })
+        return stats
+
+    def close(self):
+        if self.engine is not None:
+            self.engine.close()
+
+
+def apply_values(telemetry, rows):
+    """پر کردن فیلدهای تله‌متری از اسکالرها و جدول سنسور"""
+    values = telemetry.values
+    telemetry.sys_descr = values.get('sys_descr')
+    telemetry.sys_name = values.get('sys_name')
+    if isinstance(values.get('hash_rate'), (int, float)):
+        telemetry.hash_rate = float(values['hash_rate'])
+    elif isinstance(values.get('hash_rate'), str):
+        try:
+            telemetry.hash_rate = float(values['hash_rate'])
+        except ValueError:
+            pass
+
+    types = rows.get('sensor_type', {})
+    precisions = rows.get('sensor_precision', {})
+    temperatures, fans, power = [], [], []
+    for index, value in rows.get('sensor_value', {}).items():
+        if not isinstance(value, int):
+            continue
+        reading = value / 10 ** max(0, precisions.get(index, 0) or 0)
+        sensor = types.get(index)
+        if sensor == SENSOR_CELSIUS and 0 < reading < 200:
+            temperatures.append(reading)
+        elif sensor == SENSOR_RPM:
+            fans.append(reading)
+        elif sensor == SENSOR_WATTS:
+            power.append(reading)
+    telemetry.temperatures = tuple(temperatures)
+    telemetry.fan_speeds = tuple(fans)
+    telemetry.power = sum(power) if power else None
+
+
+_crawlers = {}
+_crawlers_lock = threading.Lock()
+
+
+def get_snmp_crawler(community='public'):
+    """نمونه مشترک SnmpCrawler برای هر community تا کش و عقب‌نشینی بین فراخوانی‌ها بماند"""
+    with _crawlers_lock:
+        crawler = _crawlers.get(community)
+        if crawler is None:
+            crawler = _crawlers[community] = SnmpCrawler(community=community)
+        return crawler
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# عامل SNMP شبیه‌سازی‌شده برای آزمایش و سنجش کارایی
+# ─────────────────────────────────────────────────────────────────────────────
+class EmulatedSnmpAgent(asyncio.DatagramProtocol):
+    """عامل محلی که GET، GETNEXT و GETBULK را روی یک MIB کوچک شبیه Antminer پاسخ می‌دهد"""
+
+    def __init__(self, community='public', model='Antminer S19', hash_rate=95000,
+                 temperatures=(64, 66, 65), fans=(6000, 6120), power=3250):
+        self.community = community
+        mib = {
+            (1, 3, 6, 1, 2, 1, 1, 1, 0): (TAG_OCTET_STRING, f'{model} cgminer 4.11.1'),
+            (1, 3, 6, 1, 2, 1, 1, 5, 0): (TAG_OCTET_STRING, 'antminer'),
+            (1, 3, 6, 1, 4, 1, 30297, 101, 1, 0): (TAG_GAUGE32, hash_rate),
+        }
+        sensors = ([(SENSOR_CELSIUS, 1, t * 10) for t in temperatures]
+                   + [(SENSOR_RPM, 0, f) for f in fans] + [(SENSOR_WATTS, 0, power)])
+        table = (1, 3, 6, 1, 2, 1, 99, 1, 1, 1)
+        for index, (sensor, precision, value) in enumerate(sensors, 1):
+            mib[table + (1, index)] = (TAG_INTEGER, sensor)
+            mib[table + (2, index)] = (TAG_INTEGER, 9)
+            mib[table + (3, index)] = (TAG_INTEGER, precision)
+            mib[table + (4, index)] = (TAG_INTEGER, value)
+            mib[table + (5, index)] = (TAG_INTEGER, 1)
+        self.oids = sorted(mib)
+        self.mib = mib
+        self.transport = None
+        self.requests = 0
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def _next(self, oid):
+        position = bisect.bisect_right(self.oids, oid)
+        if position == len(self.oids):
+            return oid, TAG_END_OF_MIB, None
+        found = self.oids[position]
+        return (found,) + self.mib[found]
+
+    def datagram_received(self, data, addr):
+        try:
+            community, pdu_type, request_id, field1, field2, varbinds = decode_message(data)
+        except SnmpError:
+            return
+        if community != self.community:
+            return
+        self.requests += 1
+        oids = [oid for oid, _, _ in varbinds]
+        if pdu_type == PDU_GET:
+            response = [(oid,) + self.mib.get(oid, (TAG_NO_SUCH_OBJECT, None)) for oid in oids]
+        elif pdu_type == PDU_GET_NEXT:
+            response = [self._next(oid) for oid in oids]
+        elif pdu_type == PDU_GET_BULK:
+            non_repeaters = max(0, min(field1, len(oids)))
+            response = [self._next(oid) for oid in oids[:non_repeaters]]
+            cursors = oids[non_repeaters:]
+            for _ in range(max(0, field2) if cursors else 0):
+                row = [self._next(oid) for oid in cursors]
+                response.extend(row)
+                cursors = [entry[0] for entry in row]
+                if all(entry[1] == TAG_END_OF_MIB for entry in row):
+                    break
+        else:
+            return
+        self.transport.sendto(
+            encode_message(community, PDU_RESPONSE, request_id, response), addr)
+
+
+async def _benchmark(count, rounds, port, dead):
+    loop = asyncio.get_running_loop()
+    agents = []
+    # هر عامل روی یک آدرس جداگانه 127.x.y.z گوش می‌دهد تا میزبان‌ها متمایز باشند
+    hosts = [f'127.1.{i // 250}.{i % 250 + 1}' for i in range(count)]
+    for host in hosts:
+        transport, agent = await loop.create_datagram_endpoint(EmulatedSnmpAgent, local_addr=(host, port))
+        agents.append(transport)
+    hosts += [f'127.2.{i // 250}.{i % 250 + 1}' for i in range(dead)]
+    crawler = SnmpCrawler(port=port, cache_ttl=0)
+    try:
+        for _ in range(rounds):
+            started = time.perf_counter()
+            results = await crawler.crawl(hosts)
+            elapsed = time.perf_counter() - started
+            ok = sum(1 for r in results if r.error is None)
+            print(f'{ok}/{len(hosts)} hosts in {elapsed:.2f}s '
+                  f'({len(hosts) / elapsed * 60:.0f} hosts/min), miners: '
+                  f'{sum(1 for r in results if crawler.is_miner(r))}')
+        print(json.dumps(results[0].to_dict(), ensure_ascii=False))
+        print(json.dumps(crawler.stats()))
+    finally:
+        crawler.close()
+        for transport in agents:
+            transport.close()
+
+
+def main():
+    p = argparse.ArgumentParser(description='SNMP miner telemetry crawler')
+    p.add_argument('hosts', nargs='*', help='hosts to query')
+    p.add_argument('--community', default='public')
+    p.add_argument('--port', type=int, default=SNMP_PORT)
+    p.add_argument('--emulate', type=int, metavar='N', help='benchmark against N local emulated agents')
+    p.add_argument('--dead', type=int, default=0, help='unreachable hosts added to the benchmark')
+    p.add_argument('--rounds', type=int, default=3)
+    args = p.parse_args()
+
+    if args.emulate:
+        asyncio.run(_benchmark(args.emulate, args.rounds, args.port if args.port != SNMP_PORT else 16100,
+                               args.dead))
+        return
+
+    crawler = SnmpCrawler(community=args.community, port=args.port)
+    for telemetry in asyncio.run(crawler.crawl(args.hosts)):
+        print(json.dumps(telemetry.to_dict(), ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+پروب فعال Stratum برای تأیید pool/proxy
+درخواست‌های JSON-RPC mining.subscribe و mining.authorize پشت‌سرهم (pipelined) روی
+اتصال ساده یا TLS ارسال می‌شوند و پاسخ طبقه‌بندی می‌شود. فقط پاسخ واقعی Stratum
+امتیاز کامل می‌گیرد تا سرویس‌های غیرماینر روی همان پورت‌ها مثبت کاذب نسازند.
+"""
+
+import asyncio
+import json
+import logging
+import ssl
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+STRATUM_CATEGORIES = ('stratum', 'stratum_tls')
+
+SUBSCRIBE = {'id': 1, 'method': 'mining.subscribe', 'params': ['MinerDetector/1.0']}
+AUTHORIZE = {'id': 2, 'method': 'mining.authorize', 'params': ['probe', 'x']}
+PROBE_PAYLOAD = (json.dumps(SUBSCRIBE) + '\n' + json.dumps(AUTHORIZE) + '\n').encode()
+
+# طبقه‌بندی پاسخ‌ها
+CONFIRMED = 'stratum'          # پاسخ موفق subscribe یا اعلان mining.*
+JSONRPC = 'jsonrpc'            # JSON-RPC پاسخ داد ولی subscribe را نپذیرفت (مثلاً Stratum مونرو)
+TLS_REQUIRED = 'tls_required'  # سرور روی اتصال ساده رکورد TLS برگرداند
+HTTP = 'http'
+OTHER = 'other'
+SILENT = 'silent'
+CLOSED = 'closed'
+
+# امتیاز هر طبقه برای پورت Stratum باز (جایگزین امتیاز ثابت باز بودن پورت)
+VERDICT_SCORES = {
+    CONFIRMED: 45,
+    JSONRPC: 30,
+    TLS_REQUIRED: 10,
+    SILENT: 5,
+    HTTP: 0,
+    OTHER: 0,
+    CLOSED: 0,
+}
+
+
+def classify_response(data):
+    """طبقه‌بندی پاسخ خام سرور به پروب Stratum"""
+    if not data:
+        return SILENT
+    if data[:1] == b'\x15' and data[1:2] == b'\x03':
+        return TLS_REQUIRED
+    if data.startswith(b'HTTP/'):
+        return HTTP
+
+    verdict = OTHER
+    for line in data.split(b'\n'):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            message = json.loads(line)
+        except ValueError:
+            continue
+        if not isinstance(message, dict):
+            continue
+        method = message.get('method')
+        if isinstance(method, str) and method.startswith('mining.'):
+            return CONFIRMED
+        if message.get('id') == 1 and message.get('result') is not None and not message.get('error'):
+            return CONFIRMED
+        if 'jsonrpc' in message or 'error' in message or 'result' in message:
+            verdict = JSONRPC
+    return verdict
+
+
+class StratumProber:
+    """پروب هم‌زمان تعداد زیادی هدف با timeout کوتاه"""
+
+    def __init__(self, timeout=1.5, concurrency=1024, max_bytes=4096):
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self.max_bytes = max_bytes
+        self._ssl_context = ssl.create_default_context()
+        self._ssl_context.check_hostname = False
+        self._ssl_context.verify_mode = ssl.CERT_NONE
+        self.stats = {}
+        # probe_ports از چند نخ (پویش موازی میزبان‌ها) فراخوانی می‌شود
+        self._stats_lock = threading.Lock()
+
+    async def _exchange(self, ip, port, use_tls):
+        writer = None
+        try:
+            reader, writer = await asyncio.open_connection(
+                ip, port, ssl=self._ssl_context if use_tls else None,
+                server_hostname='' if use_tls else None
+            )
+            writer.write(PROBE_PAYLOAD)
+            await writer.drain()
+            data = b''
+            # تا دریافت یک پاسخ قابل طبقه‌بندی یا پر شدن بافر
+            while len(data) < self.max_bytes:
+                chunk = await reader.read(self.max_bytes - len(data))
+                if not chunk:
+                    break
+                data += chunk
+                if classify_response(data) in (CONFIRMED, HTTP, TLS_REQUIRED):
+                    break
+            return data
+        finally:
+            if writer is not None:
+                writer.close()
+
+    async def _attempt(self, ip, port, use_tls):
+        try:
+            data = await asyncio.wait_for(self._exchange(ip, port, use_tls), self.timeout)
+        except asyncio.TimeoutError:
+            return SILENT
+        except ssl.SSLError:
+            return OTHER
+        except OSError:
+            return CLOSED
+        except Exception as e:
+            # پاسخ غیرعادی نباید پروب بقیه پورت‌های میزبان را متوقف کند
+            logger.debug("Stratum probe %s:%s failed: %s", ip, port, e)
+            return OTHER
+        try:
+            return classify_response(data)
+        except Exception as e:
+            logger.debug("Stratum reply from %s:%s not classifiable: %s", ip, port, e)
+            return OTHER
+
+    async def probe(self, ip, port, tls_first=False):
+        """طبقه‌بندی یک endpoint؛ در صورت نیاز با TLS دوباره امتحان می‌شود"""
+        started = time.perf_counter()
+        verdict = await self._attempt(ip, port, tls_first)
+        tls = tls_first
+        if verdict in (TLS_REQUIRED, SILENT, OTHER) and not tls_first:
+            tls_verdict = await self._attempt(ip, port, True)
+            if tls_verdict in (CONFIRMED, JSONRPC):
+                verdict, tls = tls_verdict, True
+        elif verdict in (OTHER, SILENT) and tls_first:
+            plain_verdict = await self._attempt(ip, port, False)
+            if plain_verdict in (CONFIRMED, JSONRPC):
+                verdict, tls = plain_verdict, False
+
+        with self._stats_lock:
+            counters = self.stats.setdefault(verdict, [0, 0.0])
+            counters[0] += 1
+            counters[1] += time.perf_counter() - started
+        return {'verdict': verdict, 'tls': tls}
+
+    async def probe_many(self, targets):
+        """targets: لیست (ip, port, tls_first) -> {(ip, port): نتیجه}"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def bounded(ip, port, tls_first):
+            async with semaphore:
+                return (ip, port), await self.probe(ip, port, tls_first)
+
+        return dict(await asyncio.gather(*(bounded(*target) for target in targets)))
+
+    def probe_ports(self, ip, ports, signatures):
+        """نسخه هم‌گام برای پورت‌های Stratum یک میزبان -> {port: نتیجه}"""
+        targets = [
+            (ip, port, signatures.port_categories.get(port) == 'stratum_tls')
+            for port in ports
+            if signatures.port_categories.get(port) in STRATUM_CATEGORIES
+        ]
+        if not targets:
+            return {}
+        results = asyncio.run(self.probe_many(targets))
+        return {port: result for (_, port), result in results.items()}
+
+    def summary(self):
+        """تعداد و میانگین زمان هر طبقه"""
+        with self._stats_lock:
+            return {
+                verdict: {'count': count, 'mean_ms': round(total / count * 1000, 3)}
+                for verdict, (count, total) in self.stats.items()
+            }
+
+
+def apply_stratum_verdicts(device_info, verdicts):
+    """افزودن نتیجه پروب به امتیاز و روش‌های تشخیص دستگاه"""
+    for port, result in verdicts.items():
+        verdict = result['verdict']
+        device_info.setdefault('stratum', {})[port] = result
+        device_info['suspicion_score'] += VERDICT_SCORES.get(verdict, 0)
+        if verdict == CONFIRMED:
+            device_info['detection_methods'].append(
+                f"stratum_confirmed_{port}" + ('_tls' if result['tls'] else '')
+            )
+        elif verdict == JSONRPC:
+            device_info['detection_methods'].append(f'stratum_jsonrpc_{port}')
+        elif VERDICT_SCORES.get(verdict, 0) > 0:
+            device_info['detection_methods'].append(f'stratum_{verdict}_{port}')
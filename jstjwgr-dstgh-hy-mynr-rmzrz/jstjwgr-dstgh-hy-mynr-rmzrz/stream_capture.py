@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+تحلیل‌گر جریانی بسته‌ها
+بسته‌ها مستقیماً از سوکت AF_PACKET با فیلتر BPF در هسته خوانده می‌شوند (یا از
+منبع pcap مانند scapy با همان فیلتر)، برای هر جریان فقط N بایت اول payload
+بازسازی می‌شود و تشخیص Stratum و TLS به‌صورت افزایشی انجام شده و هشدار بلافاصله
+صادر می‌شود. ظرفیت پردازش (بسته بر ثانیه) و شمارنده‌های drop گزارش می‌شوند.
+"""
+
+import ctypes
+import logging
+import socket
+import struct
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+ETH_P_ALL = 0x0003
+ETH_P_IP = 0x0800
+SOL_PACKET = 263
+PACKET_STATISTICS = 6
+SO_ATTACH_FILTER = 26
+
+# کدهای BPF کلاسیک (linux/filter.h)
+BPF_LD_H_ABS = 0x28
+BPF_LD_B_ABS = 0x30
+BPF_LD_H_IND = 0x48
+BPF_LDX_B_MSH = 0xb1
+BPF_JEQ_K = 0x15
+BPF_JSET_K = 0x45
+BPF_RET_K = 0x06
+
+_ETH = struct.Struct('!6s6sH')
+_IPV4 = struct.Struct('!BBHHHBBHII')
+_TCP = struct.Struct('!HHIIBB')
+_PACKET_STATS = struct.Struct('II')
+
+TCP_FIN = 0x01
+TCP_SYN = 0x02
+TCP_RST = 0x04
+
+STRATUM_MARKERS = (
+    b'mining.subscribe', b'mining.authorize', b'mining.submit',
+    b'mining.notify', b'mining.set_difficulty',
+)
+MONERO_LOGIN_MARKERS = (b'"method":"login"', b'"method": "login"')
+
+
+def int_to_ip(address):
+    """تبدیل آدرس IPv4 عددی (ترتیب شبکه) به رشته"""
+    return socket.inet_ntoa(address.to_bytes(4, 'big'))
+
+
+def compile_port_filter(ports, snaplen=0xFFFF):
+    """برنامه BPF برای «ip and tcp and not fragment and (src port P or dst port P)»
+
+    اگر ports خالی باشد همه بسته‌های TCP روی IPv4 پذیرفته می‌شوند. به علت محدودیت
+    پرش‌های 8 بیتی BPF، با بیش از 120 پورت فیلتر به «همه TCP» ساده می‌شود.
+    """
+    ports = sorted(set(ports or ()))
+    if len(ports) > 120:
+        ports = []
+
+    # هر دستور: (code, پرش درست، پرش نادرست، k) با برچسب‌های 'accept' و 'drop'
+    program = [
+        (BPF_LD_H_ABS, None, None, 12),
+        (BPF_JEQ_K, 0, 'drop', ETH_P_IP),
+        (BPF_LD_B_ABS, None, None, 23),
+        (BPF_JEQ_K, 0, 'drop', 6),
+        (BPF_LD_H_ABS, None, None, 20),
+        (BPF_JSET_K, 'drop', 0 if ports else 'accept', 0x1FFF),
+    ]
+    if ports:
+        program.append((BPF_LDX_B_MSH, None, None, 14))
+        for offset in (14, 16):
+            program.append((BPF_LD_H_IND, None, None, offset))
+            for port in ports:
+                program.append((BPF_JEQ_K, 'accept', 0, port))
+    program.append((BPF_RET_K, None, None, 0))
+    program.append((BPF_RET_K, None, None, snaplen))
+
+    drop_index = len(program) - 2
+    accept_index = len(program) - 1
+
+    compiled = []
+    for index, (code, jt, jf, k) in enumerate(program):
+        targets = []
+        for jump in (jt, jf):
+            if jump == 'accept':
+                jump = accept_index - index - 1
+            elif jump == 'drop':
+                jump = drop_index - index - 1
+            targets.append(jump or 0)
+        compiled.append((code, targets[0], targets[1], k))
+    return compiled
+
+
+def attach_filter(sock, program):
+    """اتصال برنامه BPF به سوکت (SO_ATTACH_FILTER)"""
+    blob = b''.join(struct.pack('HBBI', *instruction) for instruction in program)
+    buf = ctypes.create_string_buffer(blob)
+    fprog = struct.pack('HL', len(program), ctypes.addressof(buf))
+    sock.setsockopt(socket.SOL_SOCKET, SO_ATTACH_FILTER, fprog)
+    return buf
+
+
+def bpf_filter_expression(ports):
+    """همان فیلتر به زبان tcpdump برای منابع مبتنی بر libpcap"""
+    ports = sorted(set(ports or ()))
+    if not ports:
+        return 'ip and tcp'
+    return 'ip and tcp and (' + ' or '.join(f'port {p}' for p in ports) + ')'
+
+
+class FlowState:
+    """حالت بازسازی یک جهت از جریان TCP"""
+
+    __slots__ = ('next_seq', 'payload', 'done', 'first_seen', 'last_seen', 'packets')
+
+    def __init__(self, first_seen):
+        self.next_seq = None
+        self.payload = bytearray()
+        self.done = False
+        self.first_seen = first_seen
+        self.last_seen = first_seen
+        self.packets = 0
+
+
+class StreamAnalyzer:
+    """بازسازی محدود payload هر جریان و تشخیص افزایشی Stratum/TLS"""
+
+    def __init__(self, payload_limit=512, max_flows=65536, on_alert=None, tls_handler=None,
+                 idle_timeout=120.0, tls_limit=4096, alert_ports=None):
+        self.payload_limit = payload_limit
+        # ClientHello با extensionهای زیاد از payload_limit بزرگ‌تر است
+        self.tls_limit = tls_limit
+        # هشدار TLS فقط روی این پورت‌ها، مگر اثر انگشت با بسته امضا تطبیق کند (None = همه)
+        self.alert_ports = frozenset(alert_ports) if alert_ports is not None else None
+        self.max_flows = max_flows
+        # جریان بی‌فعالیت بیش از idle_timeout ثانیه (بر حسب زمان بسته‌ها) منقضی می‌شود؛
+        # برخلاف حذف بر اساس ظرفیت، نتیجه آن به ترتیب درهم‌آمیختگی جریان‌ها وابسته نیست
+        self.idle_timeout = idle_timeout
+        self.on_alert = on_alert
+        # پردازش اختیاری ClientHello/ServerHello (مثلاً محاسبه JA3)
+        self.tls_handler = tls_handler
+        self.flows = OrderedDict()
+        self.alerts = []
+        self.packets = 0
+        self.bytes = 0
+        self.evicted = 0
+        self.expired = 0
+        self.malformed = 0
+        self.busy_seconds = 0.0
+        self._sweep_countdown = 1024
+
+    def feed_frame(self, timestamp, frame):
+        """پردازش یک فریم اترنت"""
+        started = time.perf_counter()
+        self.packets += 1
+        self.bytes += len(frame)
+        try:
+            if len(frame) < 34 or _ETH.unpack_from(frame)[2] != ETH_P_IP:
+                return
+            self._feed_ip(timestamp, frame, 14)
+        except struct.error:
+            self.malformed += 1
+        finally:
+            self.busy_seconds += time.perf_counter() - started
+
+    def feed_ip(self, timestamp, packet):
+        """پردازش یک بسته IPv4 بدون سرآیند اترنت"""
+        started = time.perf_counter()
+        self.packets += 1
+        self.bytes += len(packet)
+        try:
+            self._feed_ip(timestamp, packet, 0)
+        except struct.error:
+            self.malformed += 1
+        finally:
+            self.busy_seconds += time.perf_counter() - started
+
+    def feed_tcp(self, timestamp, src, sport, dst, dport, seq, flags, payload):
+        """پردازش یک قطعه TCP ازپیش‌تجزیه‌شده (مثلاً از PcapReader)"""
+        started = time.perf_counter()
+        self.packets += 1
+        self.bytes += len(payload)
+        self.feed_segment(timestamp, src, sport, dst, dport, seq, flags, payload)
+        self.busy_seconds += time.perf_counter() - started
+
+    def _feed_ip(self, timestamp, buf, offset):
+        version_ihl, _, total_length, _, frag, _, proto, _, src, dst = _IPV4.unpack_from(buf, offset)
+        if version_ihl >> 4 != 4 or proto != 6 or frag & 0x1FFF:
+            return
+        ip_end = min(len(buf), offset + total_length)
+        tcp_offset = offset + (version_ihl & 0x0F) * 4
+        sport, dport, seq, _, data_offset, flags = _TCP.unpack_from(buf, tcp_offset)
+        payload_offset = tcp_offset + (data_offset >> 4) * 4
+        self.feed_segment(timestamp, src, sport, dst, dport, seq, flags,
+                          memoryview(buf)[payload_offset:ip_end])
+
+    def feed_segment(self, timestamp, src, sport, dst, dport, seq, flags, payload):
+        """افزودن یک قطعه TCP به جریان و اجرای تشخیص روی بایت‌های جدید"""
+        key = (src, sport, dst, dport)
+        flows = self.flows
+        self._sweep_countdown -= 1
+        if not self._sweep_countdown:
+            self._sweep_countdown = 1024
+            self.expire(timestamp)
+
+        flow = flows.get(key)
+        if flow is not None and timestamp - flow.last_seen > self.idle_timeout:
+            del flows[key]
+            self.expired += 1
+            flow = None
+        if flow is None:
+            if flags & (TCP_FIN | TCP_RST):
+                return
+            if not payload and not flags & TCP_SYN:
+                return
+            flow = flows[key] = FlowState(timestamp)
+            if len(flows) > self.max_flows:
+                flows.popitem(last=False)
+                self.evicted += 1
+        else:
+            flows.move_to_end(key)
+            flow.last_seen = timestamp
+
+        flow.packets += 1
+        if flags & (TCP_FIN | TCP_RST):
+            del flows[key]
+            return
+        if flow.done:
+            return
+        if flags & TCP_SYN:
+            flow.next_seq = (seq + 1) & 0xFFFFFFFF
+            return
+        if not payload:
+            return
+        if flow.next_seq is None:
+            flow.next_seq = seq
+        if seq != flow.next_seq:
+            # قطعه خارج از ترتیب یا تکراری؛ فقط بایت‌های به‌ترتیب بازسازی می‌شوند
+            return
+
+        limit = self.tls_limit if (flow.payload or payload)[:1] == b'\x16' else self.payload_limit
+        flow.payload += payload[:limit - len(flow.payload)]
+        flow.next_seq = (seq + len(payload)) & 0xFFFFFFFF
+        self._inspect(timestamp, key, flow, limit)
+        if len(flow.payload) >= limit:
+            flow.done = True
+
+    def expire(self, now):
+        """حذف جریان‌های بی‌فعالیت از ابتدای صف (ترتیب آخرین فعالیت)"""
+        flows = self.flows
+        deadline = now - self.idle_timeout
+        while flows:
+            key = next(iter(flows))
+            if flows[key].last_seen >= deadline:
+                break
+            del flows[key]
+            self.expired += 1
+
+    def _inspect(self, timestamp, key, flow, limit):
+        data = flow.payload
+        alert = None
+        if data[:1] == b'\x16' and data[1:2] == b'\x03' and len(data) >= 6:
+            if data[5] in (1, 2):
+                record_length = int.from_bytes(data[3:5], 'big')
+                if len(data) < 5 + record_length and len(data) < limit:
+                    return  # منتظر ادامه handshake
+                alert = {'type': 'TLS', 'handshake': 'client_hello' if data[5] == 1 else 'server_hello'}
+                if self.tls_handler is not None:
+                    extra = self.tls_handler(bytes(data), data[5] == 1)
+                    if extra:
+                        alert.update(extra)
+                if (self.alert_ports is not None and not alert.get('ja3_match')
+                        and key[1] not in self.alert_ports and key[3] not in self.alert_ports):
+                    flow.done = True
+                    return
+        else:
+            for marker in STRATUM_MARKERS:
+                if marker in data:
+                    alert = {'type': 'Stratum', 'info': marker.decode()}
+                    break
+            else:
+                if any(marker in data for marker in MONERO_LOGIN_MARKERS):
+                    alert = {'type': 'Stratum', 'info': 'login'}
+
+        if alert is not None:
+            flow.done = True
+            src, sport, dst, dport = key
+            alert.update({
+                'src': int_to_ip(src), 'sport': sport,
+                'dst': int_to_ip(dst), 'dport': dport,
+                'timestamp': timestamp,
+            })
+            self.alerts.append(alert)
+            if self.on_alert is not None:
+                self.on_alert(alert)
+
+    def stats(self):
+        return {
+            'packets': self.packets,
+            'bytes': self.bytes,
+            'flows': len(self.flows),
+            'evicted_flows': self.evicted,
+            'expired_flows': self.expired,
+            'malformed': self.malformed,
+            'alerts': len(self.alerts),
+            'capacity_pps': int(self.packets / self.busy_seconds) if self.busy_seconds else 0,
+        }
+
+
+class PacketCapture:
+    """خواندن فریم‌ها از AF_PACKET با فیلتر BPF هسته و بافر از پیش تخصیص‌یافته"""
+
+    def __init__(self, interface, ports=(), snaplen=2048, rcvbuf=32 << 20):
+        self.interface = interface
+        self.snaplen = snaplen
+        self.kernel_packets = 0
+        self.kernel_drops = 0
+        self.sock = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, socket.htons(ETH_P_ALL))
+        try:
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, rcvbuf)
+        except OSError:
+            pass
+        self._filter = attach_filter(self.sock, compile_port_filter(ports, snaplen))
+        self.sock.bind((interface, 0))
+        self._buf = bytearray(snaplen)
+        self._view = memoryview(self._buf)
+
+    def run(self, analyzer, duration, should_stop=None):
+        """ارسال فریم‌ها به analyzer تا پایان مدت یا درخواست توقف"""
+        deadline = time.monotonic() + duration
+        self.sock.settimeout(0.5)
+        while True:
+            now = time.monotonic()
+            if now >= deadline or (should_stop and should_stop()):
+                break
+            try:
+                size = self.sock.recv_into(self._buf, self.snaplen)
+            except socket.timeout:
+                continue
+            analyzer.feed_frame(time.time(), self._view[:size])
+        self.read_statistics()
+
+    def read_statistics(self):
+        """شمارنده‌های هسته (با هر خواندن صفر می‌شوند و اینجا جمع می‌شوند)"""
+        try:
+            packets, drops = _PACKET_STATS.unpack(
+                self.sock.getsockopt(SOL_PACKET, PACKET_STATISTICS, _PACKET_STATS.size)
+            )
+        except OSError:
+            return
+        self.kernel_packets += packets
+        self.kernel_drops += drops
+
+    def close(self):
+        self.sock.close()
+
+
+def capture(interface, ports, duration, on_alert=None, payload_limit=512, tls_handler=None):
+    """ضبط زنده با AF_PACKET و در نبود آن با scapy (libpcap + همان فیلتر BPF)"""
+    analyzer = StreamAnalyzer(payload_limit=payload_limit, on_alert=on_alert,
+                              tls_handler=tls_handler, alert_ports=ports or None)
+    stats = {}
+    try:
+        cap = PacketCapture(interface, ports)
+    except (AttributeError, OSError) as e:
+        logger.info(f"AF_PACKET در دسترس نیست ({e})؛ استفاده از scapy/libpcap")
+        try:
+            import scapy.all as scapy
+        except ImportError:
+            raise RuntimeError('neither AF_PACKET nor scapy is available for live capture')
+        scapy.sniff(
+            iface=interface,
+            filter=bpf_filter_expression(ports),
+            prn=lambda pkt: analyzer.feed_frame(float(pkt.time), bytes(pkt)),
+            store=False,
+            timeout=duration,
+        )
+    else:
+        try:
+            cap.run(analyzer, duration)
+        finally:
+            stats.update({'kernel_packets': cap.kernel_packets, 'kernel_drops': cap.kernel_drops})
+            cap.close()
+    stats.update(analyzer.stats())
+    return analyzer.alerts, stats